@@ -0,0 +1,75 @@
+"""
+Import-time benchmark for the RISE binding.
+
+Each sample runs in a fresh interpreter so module caching does not hide the
+cost. Two cases are measured:
+
+- import: `import rise.rise` only, which no longer touches the DLL
+- import+load: the import followed by load_library(), which is what every
+  import used to pay before the library was loaded lazily
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--library PATH]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BINDING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_ONLY = '''
+import time
+start = time.perf_counter()
+import rise.rise
+print(time.perf_counter() - start)
+'''
+
+IMPORT_AND_LOAD = '''
+import time
+start = time.perf_counter()
+import rise.rise
+rise.rise.load_library()
+print(time.perf_counter() - start)
+'''
+
+
+def sample(code: str, env: dict) -> float:
+    """Run one snippet in a fresh interpreter and return its reported duration."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=BINDING_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip())
+
+
+def report(name: str, code: str, runs: int, env: dict) -> None:
+    """Print median and spread for a benchmark case."""
+    try:
+        samples = [sample(code, env) for _ in range(runs)]
+    except RuntimeError as e:
+        print(f'{name:<12} unavailable ({e})')
+        return
+    print(f'{name:<12} median {statistics.median(samples) * 1000:8.2f} ms   '
+          f'min {min(samples) * 1000:8.2f} ms   max {max(samples) * 1000:8.2f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20, help='samples per case')
+    parser.add_argument('--library', help='binding library to load instead of python_binding.dll')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [BINDING_DIR, env.get('PYTHONPATH')]))
+    if args.library:
+        env['RISE_BINDING_PATH'] = os.path.abspath(args.library)
+
+    report('import', IMPORT_ONLY, args.runs, env)
+    report('import+load', IMPORT_AND_LOAD, args.runs, env)
+
+
+if __name__ == '__main__':
+    main()
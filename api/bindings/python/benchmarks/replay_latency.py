@@ -0,0 +1,64 @@
+"""
+Latency and throughput benchmark for the RISE binding on the fake engine.
+
+Drives send_rise_command() against rise.fake.FakeRiseEngine, so everything
+above the DLL is measured without a GPU. Responses are either replayed from a
+recording or generated with a fixed size, paced by the given latencies.
+
+Usage:
+    python benchmarks/replay_latency.py [--recording FILE] [--requests N]
+        [--first-token-latency S] [--token-latency S] [--response-chars N] [--chunk-chars N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise import fake, rise  # noqa: E402
+
+
+def percentile(samples: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recording', default='', help='JSON Lines recording to replay')
+    parser.add_argument('--requests', type=int, default=50, help='number of requests to send')
+    parser.add_argument('--first-token-latency', type=float, default=0.0, help='seconds before the first chunk')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='seconds between chunks')
+    parser.add_argument('--response-chars', type=int, default=2000,
+                        help='size of generated responses when no recording is given')
+    parser.add_argument('--chunk-chars', type=int, default=16, help='characters per generated chunk')
+    args = parser.parse_args()
+
+    fake.install(args.recording, token_latency=args.token_latency,
+                 first_token_latency=args.first_token_latency, chunk_chars=args.chunk_chars)
+    rise.register_rise_client()
+    prompt = 'x' * max(0, args.response_chars - len('Echo: '))
+
+    latencies = []
+    characters = 0
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        sent = time.perf_counter()
+        result = rise.send_rise_command(prompt)
+        latencies.append(time.perf_counter() - sent)
+        characters += len(result['completed_response']) + len(result['completed_chart'])
+    elapsed = time.perf_counter() - start
+
+    print(f'requests     {args.requests}')
+    print(f'latency      median {statistics.median(latencies) * 1000:.2f} ms   '
+          f'p95 {percentile(latencies, 0.95) * 1000:.2f} ms   max {max(latencies) * 1000:.2f} ms')
+    print(f'throughput   {args.requests / elapsed:.1f} requests/s   {characters / elapsed:,.0f} chars/s')
+    print(f'stats        {rise.get_request_stats()}')
+
+
+if __name__ == '__main__':
+    main()
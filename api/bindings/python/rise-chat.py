@@ -1,4 +1,4 @@
-from rise import rise
+from rise import broker, rise
 import time
 from colorama import Fore, Style, init  # type: ignore
 import sys
@@ -16,7 +16,9 @@ def thinking_bubble(stop_event):
 
 def main():
 
-    rise.register_rise_client()
+    # Use the shared RISE broker when RISE_BROKER_ADDRESS is set; it is already registered
+    rise_client = broker.client_from_env() or rise
+    rise_client.register_rise_client()
 
     while True:
         # Get user input
@@ -25,7 +27,7 @@ def main():
         thinking_thread = threading.Thread(
             target=thinking_bubble, args=(stop_event,))
         thinking_thread.start()  # Start the thinking dots in a separate thread
-        response = rise.send_rise_command(user_prompt)
+        response = rise_client.send_rise_command(user_prompt)
         stop_event.set()  # Signal the thinking thread to stop
         thinking_thread.join()  # Wait for the thread to finish
         print(Fore.YELLOW + "RISE: " + response)
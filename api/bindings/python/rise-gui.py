@@ -1,3 +1,4 @@
+import functools
 import os
 import sys
 import json
@@ -6,23 +7,63 @@ import threading
 import shutil
 import time
 import tempfile
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from rise import rise
+from rise import broker, rise, metrics as rise_metrics
+from rise.session import RiseSession
 
 # Create a Flask server to handle API requests from the Electron app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize RISE client
-try:
-    rise.register_rise_client()
-    print("RISE client initialization commented out")
-except Exception as e:
-    print(f"Error initializing RISE client: {str(e)}")
-    sys.exit(1)
+# Optional prompt sent once RISE is ready so the model is loaded before the first request
+RISE_WARMUP_PROMPT = os.environ.get('RISE_WARMUP_PROMPT', '')
+
+# Shared RISE broker named by RISE_BROKER_ADDRESS, or the in-process binding
+rise_client = broker.client_from_env() or rise
+
+# Conversation with the chat window; replaced when the adapter or system prompt changes
+chat_session = None
+chat_session_lock = threading.Lock()
+
+def get_chat_session(adapter, system_prompt):
+    """Get the chat session for an adapter and system prompt, starting a new one if they changed"""
+    global chat_session
+    with chat_session_lock:
+        if chat_session is None or (chat_session.adapter, chat_session.system_prompt) != (adapter, system_prompt):
+            # The chat window's system prompt is short, and without it the
+            # instructions are lost from the second turn on
+            chat_session = RiseSession(system_prompt=system_prompt, adapter=adapter,
+                                       resend_system_prompt=True, client=rise_client)
+        return chat_session
+
+def requires_rise(view):
+    """Reply with 503 until the RISE client has finished registering"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not rise_client.is_ready():
+            return jsonify({'error': 'RISE is not ready yet', 'startup': rise_client.get_startup_status()}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Liveness probe: the server is up, whether or not RISE is ready"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: RISE is registered and the warm-up prompt has run"""
+    status = rise_client.get_startup_status()
+    return jsonify(status), 200 if status['state'] == 'ready' else 503
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint for the RISE binding's request metrics"""
+    return Response(rise_metrics.registry.render_prometheus(), content_type=rise_metrics.PROMETHEUS_CONTENT_TYPE)
 
 @app.route('/api/send-message', methods=['POST'])
+@requires_rise
 def send_message():
     """API endpoint to send messages to RISE"""
     data = request.json
@@ -33,13 +74,25 @@ def send_message():
         return jsonify({'error': 'Empty message'}), 400
     
     try:
-        # Send message to RISE
-        response = rise.send_rise_command(message, adapter, system_prompt)
+        # Send message to RISE as the next turn of the conversation
+        response = get_chat_session(adapter, system_prompt).send(message)
         #response = f"RISE module is commented out. Your message was: {message}"
         return jsonify({'response': response})
+    except rise.RiseTimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except rise.RiseResponseTooLargeError as e:
+        return jsonify({'error': str(e)}), 502
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/reset-session', methods=['POST'])
+def reset_session():
+    """API endpoint to start a new conversation"""
+    with chat_session_lock:
+        if chat_session is not None:
+            chat_session.reset()
+    return jsonify({'status': 'ok'})
+
 def start_electron_app():
     """Start the Electron app"""
     # Create temp directory for the Electron app
@@ -1435,6 +1488,9 @@ textarea {
             print(f"Please open {os.path.join(electron_dir, 'public', 'index.html')} in your browser")
 
 def main():
+    # Register with RISE in the background so the server binds its port right away
+    rise_client.start_rise_client(RISE_WARMUP_PROMPT)
+
     # Start the Electron app in a separate thread
     threading.Thread(target=start_electron_app, daemon=True).start()
     
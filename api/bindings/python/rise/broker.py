@@ -0,0 +1,716 @@
+"""
+Shared RISE broker
+
+Every tool that imports the binding registers its own RISE client and waits
+for it to become ready. The broker is a small local daemon that owns the
+only registration instead: tools connect to it, their requests go into a
+single queue served in arrival order across all clients, and responses are
+streamed back chunk by chunk.
+
+The broker listens on a Unix domain socket, or on a loopback TCP port where
+Unix sockets are not available (Windows). Addresses that look like
+"host:port" select TCP, anything else is a socket path. The default comes
+from the RISE_BROKER_ADDRESS environment variable.
+
+Only the user running the broker may use it. The default socket lives in a
+per-user runtime directory that only that user can access, and the socket
+itself is created with 0600 permissions. A loopback port is open to every
+local user, so TCP clients must first authenticate with a token. The broker
+writes it to rise-broker.token in the same per-user directory, or takes it
+from RISE_BROKER_TOKEN:
+
+    -> {"op": "auth", "token": "..."}
+    <- {"id": null, "event": "authenticated"}
+
+A broker refuses to start on a socket path where another broker is still
+listening, instead of taking over its clients.
+
+Protocol: newline-delimited JSON in both directions. Requests carry an id
+chosen by the client (a string, an integer or null), which is echoed on
+every message about that request:
+
+    -> {"id": 1, "op": "send", "prompt": "...", "adapter": "", "system_prompt": "",
+        "timeout": 120, "stream": true}
+    <- {"id": 1, "event": "queued", "position": 0}
+    <- {"id": 1, "event": "chunk", "type": "text", "content": "Your GPU"}
+    <- {"id": 1, "event": "result", "result": {"completed_response": "...", ...}}
+    -> {"id": 2, "op": "cancel", "target": 1}
+    -> {"id": 3, "op": "status"}
+    <- {"id": 3, "event": "status", "startup": {...}, "requests": {...}, "queued": 0}
+
+A request's timeout counts from the moment the broker receives it, so time
+spent in the queue and waiting for RISE to become ready is included.
+
+Failures are reported as {"id": ..., "event": "error", "kind": ..., "error": ...}
+where kind is "timeout", "cancelled", "too_large" (response), "command_too_large",
+"failed" or "bad_request".
+
+Usage:
+    python -m rise.broker --warmup "Hello"
+
+    from rise import broker
+    client = broker.BrokerClient()
+    client.send_rise_command('What is my GPU?')
+
+The broker runs on the fake engine like any other client of the binding:
+set RISE_BINDING_LOADER=rise.fake:FakeRiseEngine before starting it.
+"""
+
+import argparse
+import codecs
+import errno
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import rise
+
+
+def get_runtime_dir() -> str:
+    """Per-user directory holding the broker's socket and token."""
+    if sys.platform == 'win32':
+        return os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), 'rise')
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'rise')
+    return os.path.join(tempfile.gettempdir(), f'rise-{os.getuid()}')
+
+
+if sys.platform == 'win32':
+    DEFAULT_ADDRESS = '127.0.0.1:50550'
+else:
+    DEFAULT_ADDRESS = os.path.join(get_runtime_dir(), 'rise-broker.sock')
+# Name of the file in get_runtime_dir() holding the token of a TCP broker
+TOKEN_FILE = 'rise-broker.token'
+
+# Messages buffered per connection; a slower client makes the RISE callback wait
+OUTBOX_MESSAGES = 256
+# Seconds a client waits past a request's timeout for the broker to report it
+RESPONSE_GRACE = 5.0
+# Seconds a client waits for the answer to a status request
+STATUS_TIMEOUT = 10.0
+
+CONTENT_TYPE_NAMES = {
+    rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT: 'text',
+    rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH: 'chart',
+}
+
+
+def get_address() -> str:
+    """Broker address from RISE_BROKER_ADDRESS, or the platform default."""
+    return os.environ.get('RISE_BROKER_ADDRESS') or DEFAULT_ADDRESS
+
+
+def _parse_address(address: str) -> Tuple[int, Any]:
+    """Split an address into a socket family and a bind/connect address."""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message) + '\n').encode('utf-8')
+
+
+def _valid_id(value: Any) -> bool:
+    """Whether a value can be a request id: a string, an integer or null."""
+    return value is None or (isinstance(value, (str, int)) and not isinstance(value, bool))
+
+
+def _private_dir(path: str) -> str:
+    """
+    Create a directory only the current user can access, or check an existing one.
+
+    Raises:
+        PermissionError: If the directory belongs to another user or is open to others
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if sys.platform != 'win32':
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f'{path} must be a directory only the current user can access')
+    return path
+
+
+def _write_token(token: str) -> str:
+    """Store a TCP broker's token for the clients of the current user; returns the file path."""
+    path = os.path.join(_private_dir(get_runtime_dir()), TOKEN_FILE)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as file:
+        file.write(token)
+    if sys.platform != 'win32':
+        os.chmod(path, 0o600)
+    return path
+
+
+def read_token() -> Optional[str]:
+    """Token for a TCP broker from RISE_BROKER_TOKEN, or the file the broker wrote."""
+    if os.environ.get('RISE_BROKER_TOKEN'):
+        return os.environ['RISE_BROKER_TOKEN']
+    try:
+        with open(os.path.join(get_runtime_dir(), TOKEN_FILE), encoding='utf-8') as file:
+            return file.read().strip() or None
+    except OSError:
+        return None
+
+
+def _is_listening(family: int, address: Any) -> bool:
+    """Whether something accepts connections at address."""
+    probe = socket.socket(family, socket.SOCK_STREAM)
+    probe.settimeout(1.0)
+    try:
+        probe.connect(address)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class _Job:
+    """A send request waiting in the broker queue."""
+
+    def __init__(self, connection: '_Connection', request_id: Any, request: Dict[str, Any],
+                 deadline: Optional[float]):
+        self.connection = connection
+        self.id = request_id
+        self.request = request
+        # time.monotonic() by which the response must be complete; None waits forever
+        self.deadline = deadline
+        self.cancel_event = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """One client connection: reads requests and writes events from its own queue."""
+
+    def setup(self) -> None:
+        super().setup()
+        self.outbox = queue.Queue(OUTBOX_MESSAGES)
+        self.jobs: Dict[Any, _Job] = {}
+        self.closed = threading.Event()
+        self.writer = threading.Thread(target=self._write_loop, name='rise-broker-writer', daemon=True)
+        self.writer.start()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """
+        Queue a message for the client; safe to call from any thread.
+
+        Blocks while the outbox is full, which holds up the response stream
+        instead of buffering without bound for a client that reads slowly.
+        """
+        while not self.closed.is_set():
+            try:
+                self.outbox.put(message, timeout=rise.CANCEL_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _write_loop(self) -> None:
+        while True:
+            message = self.outbox.get()
+            if message is None:
+                return
+            try:
+                self.wfile.write(_encode(message))
+                self.wfile.flush()
+            except OSError:
+                self.closed.set()
+                return
+
+    def _authenticate(self) -> bool:
+        """Check the token a TCP client sends first; answers and returns whether it matched."""
+        token = None
+        try:
+            message = json.loads(self.rfile.readline())
+            if message.get('op') == 'auth':
+                token = message.get('token')
+        except (ValueError, AttributeError):
+            pass
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode('utf-8'),
+                                                                 self.server.token.encode('utf-8')):
+            self.send({'id': None, 'event': 'error', 'kind': 'unauthorized', 'error': 'Invalid broker token'})
+            return False
+        self.send({'id': None, 'event': 'authenticated'})
+        return True
+
+    def handle(self) -> None:
+        if self.server.token is not None and not self._authenticate():
+            return
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+                request_id = message.get('id')
+                op = message.get('op')
+            except (ValueError, AttributeError):
+                self.send({'id': None, 'event': 'error', 'kind': 'bad_request', 'error': 'Invalid JSON'})
+                continue
+            if not _valid_id(request_id) or (op == 'cancel' and not _valid_id(message.get('target'))):
+                self.send({'id': None, 'event': 'error', 'kind': 'bad_request',
+                           'error': 'Request ids must be strings, integers or null'})
+                continue
+
+            if op == 'send':
+                timeout = message.get('timeout')
+                if timeout is None:
+                    timeout = rise.REQUEST_TIMEOUT
+                if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))):
+                    self.send({'id': request_id, 'event': 'error', 'kind': 'bad_request',
+                               'error': 'timeout must be a number of seconds'})
+                    continue
+                job = _Job(self, request_id, message, None if timeout is None else time.monotonic() + timeout)
+                self.jobs[request_id] = job
+                self.send({'id': request_id, 'event': 'queued', 'position': self.server.queue.qsize()})
+                self.server.queue.put(job)
+            elif op == 'cancel':
+                job = self.jobs.get(message.get('target'))
+                if job is not None:
+                    job.cancel_event.set()
+            elif op == 'status':
+                self.send({'id': request_id, 'event': 'status', 'startup': rise.get_startup_status(),
+                           'requests': rise.get_request_stats(), 'queued': self.server.queue.qsize()})
+            else:
+                self.send({'id': request_id, 'event': 'error', 'kind': 'bad_request',
+                           'error': f'Unknown op: {op}'})
+
+    def finish(self) -> None:
+        # Requests of a client that went away are not worth finishing
+        self.closed.set()
+        for job in list(self.jobs.values()):
+            job.cancel_event.set()
+        while self.writer.is_alive():
+            try:
+                self.outbox.put(None, timeout=rise.CANCEL_POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        self.writer.join()
+        super().finish()
+
+
+class _BrokerServerMixin:
+    """Holds the global request queue and the worker that drains it."""
+
+    daemon_threads = True
+    # Token TCP clients must authenticate with; None for Unix sockets
+    token: Optional[str] = None
+
+    def start_worker(self) -> None:
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self._work, name='rise-broker-worker', daemon=True)
+        self.worker.start()
+
+    def _work(self) -> None:
+        while True:
+            job = self.queue.get()
+            try:
+                self._run(job)
+            finally:
+                job.connection.jobs.pop(job.id, None)
+
+    def _wait_until_ready(self, job: _Job) -> Optional[Dict[str, Any]]:
+        """Wait for RISE to become ready; returns the error to report instead if the job cannot run."""
+        while not rise.ready.wait(rise.CANCEL_POLL_INTERVAL):
+            if job.cancel_event.is_set():
+                break
+            if rise.get_startup_status()['state'] == 'failed':
+                return {'kind': 'failed', 'error': 'RISE failed to start'}
+            remaining = job.remaining()
+            if remaining is not None and remaining <= 0:
+                return {'kind': 'timeout', 'error': 'RISE was not ready before the deadline'}
+        if job.cancel_event.is_set():
+            return {'kind': 'cancelled', 'error': 'Request was cancelled'}
+        remaining = job.remaining()
+        if remaining is not None and remaining <= 0:
+            return {'kind': 'timeout', 'error': 'Request expired in the broker queue'}
+        return None
+
+    def _run(self, job: _Job) -> None:
+        connection, request = job.connection, job.request
+        error = self._wait_until_ready(job)
+        if error is not None:
+            connection.send({'id': job.id, 'event': 'error', **error})
+            return
+
+        on_chunk = None
+        if request.get('stream'):
+            decoders = {}
+
+            def on_chunk(content_type: int, payload: bytes) -> None:
+                if content_type not in decoders:
+                    decoders[content_type] = codecs.getincrementaldecoder('utf-8')('replace')
+                text = decoders[content_type].decode(payload)
+                if text:
+                    connection.send({'id': job.id, 'event': 'chunk',
+                                     'type': CONTENT_TYPE_NAMES.get(content_type, 'text'), 'content': text})
+
+        try:
+            result = rise.send_rise_command(request.get('prompt', ''), request.get('adapter', ''),
+                                            request.get('system_prompt', ''), timeout=job.remaining(),
+                                            cancel_event=job.cancel_event, on_chunk=on_chunk)
+        except rise.RiseTimeoutError as e:
+            connection.send({'id': job.id, 'event': 'error', 'kind': 'timeout', 'error': str(e)})
+        except rise.RiseCancelledError as e:
+            connection.send({'id': job.id, 'event': 'error', 'kind': 'cancelled', 'error': str(e)})
+        except rise.RiseResponseTooLargeError as e:
+            connection.send({'id': job.id, 'event': 'error', 'kind': 'too_large', 'error': str(e)})
+        except rise.RiseCommandTooLargeError as e:
+            connection.send({'id': job.id, 'event': 'error', 'kind': 'command_too_large', 'error': str(e)})
+        except Exception as e:
+            connection.send({'id': job.id, 'event': 'error', 'kind': 'failed', 'error': str(e)})
+        else:
+            if result is None:
+                connection.send({'id': job.id, 'event': 'error', 'kind': 'failed', 'error': 'RISE request failed'})
+            else:
+                connection.send({'id': job.id, 'event': 'result', 'result': result})
+
+
+class _UnixBrokerServer(_BrokerServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+class _TCPBrokerServer(_BrokerServerMixin, socketserver.ThreadingTCPServer):
+    # On Windows SO_REUSEADDR lets a second server bind a port in use
+    allow_reuse_address = sys.platform != 'win32'
+
+    def server_bind(self) -> None:
+        if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        super().server_bind()
+
+
+def create_server(address: Optional[str] = None, token: Optional[str] = None) -> socketserver.BaseServer:
+    """
+    Bind a broker server without registering with RISE.
+
+    Args:
+        address: Socket path or "host:port"; defaults to get_address()
+        token: Token TCP clients authenticate with; defaults to RISE_BROKER_TOKEN
+            or a random one. It is written to TOKEN_FILE in get_runtime_dir()
+
+    Returns:
+        socketserver.BaseServer: The server; call serve_forever() to run it
+
+    Raises:
+        OSError: If another broker is listening at the address
+        PermissionError: If the runtime directory is open to other users
+    """
+    family, bind_address = _parse_address(address or get_address())
+    if family == socket.AF_UNIX:
+        directory = os.path.dirname(bind_address)
+        if directory == get_runtime_dir():
+            _private_dir(directory)
+        if os.path.exists(bind_address):
+            if _is_listening(family, bind_address):
+                raise OSError(errno.EADDRINUSE, f'A RISE broker is already listening on {bind_address}')
+            # Left behind by a broker that did not shut down cleanly
+            os.unlink(bind_address)
+        server = _UnixBrokerServer(bind_address, _Connection)
+        os.chmod(bind_address, 0o600)
+    else:
+        server = _TCPBrokerServer(bind_address, _Connection)
+        server.token = token or os.environ.get('RISE_BROKER_TOKEN') or secrets.token_urlsafe(32)
+        _write_token(server.token)
+    server.start_worker()
+    return server
+
+
+def serve(address: Optional[str] = None, warmup_prompt: str = '', show_progress: bool = True) -> None:
+    """
+    Register with RISE in the background and serve clients until interrupted.
+
+    Clients can connect right away; their requests wait in the queue until
+    RISE is ready.
+
+    Args:
+        address: Socket path or "host:port"; defaults to get_address()
+        warmup_prompt: Prompt sent once RISE is ready, see rise.start_rise_client()
+        show_progress: Render download/install progress in the terminal
+    """
+    server = create_server(address)
+    rise.start_rise_client(warmup_prompt, show_progress)
+    print(f'RISE broker listening on {address or get_address()}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server, _UnixBrokerServer):
+            os.unlink(server.server_address)
+
+
+class BrokerClient:
+    """
+    Client for the RISE broker with the same request API as the rise module.
+
+    send_rise_command() accepts the arguments of rise.send_rise_command() and
+    raises the same exceptions, so frontends can use either one. A client can
+    be shared between threads: requests are multiplexed over its connection
+    and a reader thread routes each message to the request it belongs to.
+    """
+
+    def __init__(self, address: Optional[str] = None, connect_timeout: float = 5.0,
+                 token: Optional[str] = None):
+        """
+        Args:
+            address: Socket path or "host:port"; defaults to get_address()
+            connect_timeout: Seconds to wait for the connection to open
+            token: Token of a TCP broker; defaults to read_token()
+
+        Raises:
+            OSError: If the broker is not reachable
+            PermissionError: If a TCP broker rejects the token
+        """
+        self.address = address or get_address()
+        family, connect_address = _parse_address(self.address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(connect_timeout)
+        try:
+            self.sock.connect(connect_address)
+            if family != socket.AF_UNIX:
+                self._authenticate(token or read_token())
+        except BaseException:
+            self.sock.close()
+            raise
+        self.sock.settimeout(None)
+        self._next_id = 0
+        self._pending: Dict[int, queue.SimpleQueue] = {}
+        self._lock = threading.Lock()
+        # Set once the reader stopped; no more messages will arrive
+        self._closed = False
+        self._ready = False
+        self._reader = threading.Thread(target=self._read_loop, name='rise-broker-client', daemon=True)
+        self._reader.start()
+
+    def _authenticate(self, token: Optional[str]) -> None:
+        """Send the token and wait for the broker to accept it, before the reader starts."""
+        if token is None:
+            raise PermissionError('No RISE broker token: set RISE_BROKER_TOKEN or start the broker as this user')
+        self.sock.sendall(_encode({'op': 'auth', 'token': token}))
+        # Read byte by byte so nothing after the answer is consumed before the reader starts
+        line = bytearray()
+        while not line.endswith(b'\n'):
+            byte = self.sock.recv(1)
+            if not byte:
+                raise ConnectionError('RISE broker closed the connection')
+            line += byte
+        if json.loads(line).get('event') != 'authenticated':
+            raise PermissionError('RISE broker rejected the token')
+
+    def close(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __enter__(self) -> 'BrokerClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _read_loop(self) -> None:
+        """Route every message from the broker to the queue of its request."""
+        try:
+            with self.sock.makefile('rb') as rfile:
+                for line in rfile:
+                    try:
+                        message = json.loads(line)
+                        request_id = message.get('id')
+                    except (ValueError, AttributeError):
+                        print(f'Ignoring malformed message from the RISE broker: {line[:200]!r}')
+                        continue
+                    inbox = self._pending.get(request_id)
+                    if inbox is not None:
+                        inbox.put(message)
+        except OSError:
+            pass
+        finally:
+            # Wake every waiting request; none of them will get an answer
+            with self._lock:
+                self._closed = True
+                pending, self._pending = self._pending, {}
+            for inbox in pending.values():
+                inbox.put(None)
+
+    def _call(self, message: Dict[str, Any]) -> Tuple[int, queue.SimpleQueue]:
+        """Send a request and return its id and the queue its messages arrive on."""
+        inbox = queue.SimpleQueue()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError('RISE broker closed the connection')
+            self._next_id += 1
+            message['id'] = self._next_id
+            self._pending[self._next_id] = inbox
+            self.sock.sendall(_encode(message))
+            return self._next_id, inbox
+
+    def _receive(self, inbox: queue.SimpleQueue, deadline: Optional[float]) -> Dict[str, Any]:
+        """Wait for the next message of a request until deadline (time.monotonic()), or forever if None."""
+        try:
+            message = inbox.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise rise.RiseTimeoutError('RISE broker did not answer in time') from None
+        if message is None:
+            raise ConnectionError('RISE broker closed the connection')
+        return message
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the broker's startup status, request counters and queue length."""
+        request_id, inbox = self._call({'op': 'status'})
+        try:
+            return self._receive(inbox, time.monotonic() + STATUS_TIMEOUT)
+        finally:
+            self._pending.pop(request_id, None)
+
+    def get_startup_status(self) -> Dict[str, Any]:
+        """Startup status of the broker's RISE client, see rise.get_startup_status()."""
+        return self.get_status()['startup']
+
+    def is_ready(self) -> bool:
+        """Check whether the broker's RISE client is ready; cached once it is."""
+        if not self._ready:
+            self._ready = self.get_startup_status()['state'] == 'ready'
+        return self._ready
+
+    def start_rise_client(self, warmup_prompt: str = '', show_progress: bool = True) -> None:
+        """No-op: the broker owns the RISE registration and its warm-up."""
+
+    def register_rise_client(self, timeout: Optional[float] = None, show_progress: bool = True) -> bool:
+        """Wait until the broker's RISE client is ready; the broker owns the registration."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_ready():
+            if self.get_startup_status()['state'] == 'failed':
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def send_rise_command(self, command: str, adapter: str = '', system_prompt: str = '',
+                          timeout: Optional[float] = None,
+                          cancel_event: Optional[threading.Event] = None,
+                          parse_chart: bool = False,
+                          on_chunk: Optional[Callable[[str, str], None]] = None) -> Optional[dict]:
+        """
+        Send a command through the broker and wait for the response.
+
+        Args:
+            command: The text command to send to RISE
+            adapter: Optional adapter to route the command to
+            system_prompt: Optional system prompt for the adapter
+            timeout: Seconds the broker waits for the response, including time in its queue;
+                defaults to rise.REQUEST_TIMEOUT
+            cancel_event: Optional event the caller can set to cancel the request
+            parse_chart: Also return the chart parsed into ChartSeries objects under 'charts'
+            on_chunk: Optional function called with the chunk type ('text' or 'chart')
+                and decoded text of every chunk as it is streamed back
+
+        Returns:
+            Optional[dict]: The response from RISE, or None if the request failed
+
+        Raises:
+            RiseTimeoutError: If the response does not complete in time
+            RiseCancelledError: If the request is cancelled
+            RiseResponseTooLargeError: If the response grows past the broker's size limit
+            RiseCommandTooLargeError: If the serialized command exceeds rise.MAX_COMMAND_BYTES
+            ConnectionError: If the broker goes away before answering
+        """
+        if timeout is None:
+            timeout = rise.REQUEST_TIMEOUT
+        # The broker reports its own timeout; this only catches a broker that stopped answering
+        deadline = None if timeout is None else time.monotonic() + timeout + RESPONSE_GRACE
+        request_id, inbox = self._call({'op': 'send', 'prompt': command, 'adapter': adapter,
+                                        'system_prompt': system_prompt, 'timeout': timeout,
+                                        'stream': on_chunk is not None})
+        done = threading.Event()
+        if cancel_event is not None:
+            threading.Thread(target=self._watch_cancel, args=(cancel_event, done, request_id),
+                             daemon=True).start()
+        try:
+            while True:
+                try:
+                    message = self._receive(inbox, deadline)
+                except rise.RiseTimeoutError:
+                    self._send_cancel(request_id)
+                    raise
+                event = message.get('event')
+                if event == 'chunk' and on_chunk is not None:
+                    on_chunk(message['type'], message['content'])
+                elif event == 'result':
+                    result = message['result']
+                    if parse_chart:
+                        from .chart import parse_charts
+                        result['charts'] = parse_charts(result['completed_chart'].encode('utf-8'))
+                    return result
+                elif event == 'error':
+                    if message['kind'] == 'timeout':
+                        raise rise.RiseTimeoutError(message['error'])
+                    if message['kind'] == 'cancelled':
+                        raise rise.RiseCancelledError(message['error'])
+                    if message['kind'] == 'too_large':
+                        raise rise.RiseResponseTooLargeError(message['error'])
+                    if message['kind'] == 'command_too_large':
+                        raise rise.RiseCommandTooLargeError(message['error'])
+                    print(f"RISE broker request failed: {message['error']}")
+                    return None
+        finally:
+            done.set()
+            self._pending.pop(request_id, None)
+
+    def _watch_cancel(self, cancel_event: threading.Event, done: threading.Event, request_id: int) -> None:
+        """Forward a cancellation to the broker while the request is pending."""
+        while not done.is_set():
+            if cancel_event.wait(rise.CANCEL_POLL_INTERVAL):
+                self._send_cancel(request_id)
+                return
+
+    def _send_cancel(self, request_id: int) -> None:
+        try:
+            with self._lock:
+                self.sock.sendall(_encode({'id': None, 'op': 'cancel', 'target': request_id}))
+        except OSError:
+            pass
+
+
+def client_from_env() -> Optional[BrokerClient]:
+    """
+    Connect to the broker named by RISE_BROKER_ADDRESS, if that variable is set.
+
+    Returns:
+        Optional[BrokerClient]: The client, or None to use the in-process binding
+    """
+    if not os.environ.get('RISE_BROKER_ADDRESS'):
+        return None
+    return BrokerClient()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Shared RISE broker')
+    parser.add_argument('--address', default=None, help=f'Socket path or host:port (default: {get_address()})')
+    parser.add_argument('--warmup', default=os.environ.get('RISE_WARMUP_PROMPT', ''),
+                        help='Prompt sent once RISE is ready')
+    parser.add_argument('--no-progress', action='store_true', help='Do not render download progress')
+    args = parser.parse_args()
+    serve(args.address, args.warmup, not args.no_progress)
+
+
+if __name__ == '__main__':
+    main()
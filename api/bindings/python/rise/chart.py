@@ -0,0 +1,112 @@
+"""
+Structured parsing of RISE chart payloads
+
+NV_RISE_CONTENT_TYPE_GRAPH content is a JSON array of chart series:
+
+    [{"chartTitle": "GPU Temperature", "xUnit": "s", "yUnit": "C",
+      "yUpperLimit": 100, "yLowerLimit": 0,
+      "data": [{"x": 0, "y": 41}, {"x": 1, "y": 43}, ...]}, ...]
+
+Chunks are accumulated as raw bytes by the binding and decoded once, when
+the response is complete, instead of being concatenated into a str and
+reparsed by every consumer. Values are stored in array('d') columns rather
+than lists of per-point dicts, and can be viewed as NumPy arrays without a
+copy.
+"""
+
+import json
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+
+@dataclass
+class ChartSeries:
+    """One chart series with its points stored column-wise."""
+    title: str = ''
+    x_unit: str = ''
+    y_unit: str = ''
+    y_upper_limit: Optional[float] = None
+    y_lower_limit: Optional[float] = None
+    x: Union[array, List[Any]] = field(default_factory=lambda: array('d'))
+    y: array = field(default_factory=lambda: array('d'))
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    @classmethod
+    def from_dict(cls, chart: Dict[str, Any]) -> 'ChartSeries':
+        """
+        Build a series from one decoded chart object.
+
+        x values are kept as floats when every one is numeric and as a list
+        otherwise (e.g. timestamps or category labels). Missing y values are
+        stored as NaN.
+        """
+        points = chart.get('data') or []
+        xs = [point.get('x') for point in points]
+        ys = _column([point.get('y') for point in points])
+        if all(type(value) in (int, float) for value in xs):
+            xs = array('d', xs)
+        return cls(title=chart.get('chartTitle', ''), x_unit=chart.get('xUnit', ''),
+                   y_unit=chart.get('yUnit', ''), y_upper_limit=chart.get('yUpperLimit'),
+                   y_lower_limit=chart.get('yLowerLimit'), x=xs, y=ys)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the RISE chart layout, e.g. for JSON responses."""
+        chart = {'chartTitle': self.title, 'xUnit': self.x_unit, 'yUnit': self.y_unit,
+                 'data': [{'x': x, 'y': y} for x, y in zip(self.x, self.y)]}
+        if self.y_upper_limit is not None:
+            chart['yUpperLimit'] = self.y_upper_limit
+        if self.y_lower_limit is not None:
+            chart['yLowerLimit'] = self.y_lower_limit
+        return chart
+
+    def to_numpy(self) -> tuple:
+        """
+        Get the series as NumPy arrays without copying the y column.
+
+        Returns:
+            tuple: (x, y) arrays
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        import numpy as np
+        x = np.frombuffer(self.x, dtype=np.float64) if isinstance(self.x, array) else np.asarray(self.x)
+        return x, np.frombuffer(self.y, dtype=np.float64)
+
+
+def _column(values: List[Any]) -> array:
+    """Pack values into a float column, mapping missing values to NaN."""
+    try:
+        return array('d', values)
+    except TypeError:
+        return array('d', [float('nan') if value is None else float(value) for value in values])
+
+
+def parse_charts(payload: Union[str, bytes, bytearray, memoryview]) -> List[ChartSeries]:
+    """
+    Parse a complete chart payload into typed series.
+
+    The payload is decoded once, straight from bytes, and the points are
+    packed into columns. Both an array of charts and a single chart object
+    are accepted.
+
+    Args:
+        payload: Chart JSON, e.g. the bytes accumulated from GRAPH callbacks
+
+    Returns:
+        List[ChartSeries]: The decoded series; empty if the payload is not valid chart JSON
+    """
+    if isinstance(payload, memoryview):
+        payload = payload.tobytes()
+    if not payload:
+        return []
+    try:
+        charts = json.loads(payload)
+        if isinstance(charts, dict):
+            charts = [charts]
+        return [ChartSeries.from_dict(chart) for chart in charts]
+    except (ValueError, TypeError, AttributeError):
+        return []
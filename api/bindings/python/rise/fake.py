@@ -0,0 +1,311 @@
+"""
+Fake RISE engine and session recorder
+
+This module lets the binding run without python_binding.dll or a GPU. The
+FakeRiseEngine stands in for the shared library: it accepts the same
+register_rise_callback/request_rise calls and answers them by driving the
+registered ctypes callback with recorded (or generated) callback sequences.
+The RiseRecorder wraps the real library and writes every exchange to a
+recording file that the fake engine can replay later.
+
+Recordings are JSON Lines files with one exchange per line:
+
+    {"request": {"prompt": "...", "context_assist": {}},
+     "events": [{"type": 1, "content": "Your GPU", "completed": 0, "delay": 0.21},
+                {"type": 1, "content": " is ...", "completed": 1, "delay": 0.02}]}
+
+`type` is an NV_RISE_CONTENT_TYPE value and `delay` the number of seconds
+since the previous event (or since the request, for the first one).
+
+Usage:
+    from rise import fake, rise
+    fake.install('session.jsonl', token_latency=0.01)
+    rise.register_rise_client()
+    rise.send_rise_command('What is my GPU?')
+
+The engine can also be selected without code changes by setting
+RISE_BINDING_LOADER=rise.fake:FakeRiseEngine and pointing
+RISE_BINDING_PATH at a recording (or at an empty string to echo prompts).
+"""
+
+import ctypes
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import rise
+
+
+class FakeFunction:
+    """Callable stand-in for a ctypes foreign function that tolerates argtypes/restype."""
+
+    def __init__(self, function: Callable[..., int]):
+        self.function = function
+        self.argtypes = None
+        self.restype = None
+
+    def __call__(self, *args: Any) -> int:
+        return self.function(*args)
+
+
+def _unwrap(argument: Any) -> Any:
+    """Get the structure behind a byref()/pointer() argument."""
+    if hasattr(argument, '_obj'):
+        return argument._obj
+    if hasattr(argument, 'contents'):
+        return argument.contents
+    return argument
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the exchanges stored in a recording file.
+
+    Args:
+        path: JSON Lines recording
+
+    Returns:
+        List[Dict[str, Any]]: The exchanges in file order
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def text_events(text: str, content_type: int = rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT,
+                chunk_chars: int = 16) -> List[Dict[str, Any]]:
+    """
+    Build a callback sequence that streams a text in fixed-size chunks.
+
+    Args:
+        text: Text to stream
+        content_type: Content type of every chunk
+        chunk_chars: Characters per chunk
+
+    Returns:
+        List[Dict[str, Any]]: Events without delays; the last one is completed
+    """
+    pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or ['']
+    return [{'type': int(content_type), 'content': piece, 'completed': int(i == len(pieces) - 1)}
+            for i, piece in enumerate(pieces)]
+
+
+class FakeRiseEngine:
+    """
+    Pure-Python replacement for python_binding.dll.
+
+    Construct it through the binding's library hook so it is used in place of
+    the real library:
+
+        rise.set_library_path('session.jsonl', FakeRiseEngine)
+
+    Requests are answered from the recording in order, preferring an exchange
+    whose prompt matches the request exactly. Without a recording, or once it
+    is exhausted and loop is off, the prompt is echoed back. Timing comes from the recording
+    unless token_latency or first_token_latency are given, in which case
+    every response is paced by those values instead.
+    """
+
+    def __init__(self, path: str = '', token_latency: Optional[float] = None,
+                 first_token_latency: Optional[float] = None, ready_delay: float = 0.0,
+                 chunk_chars: int = 16, loop: bool = True):
+        """
+        Args:
+            path: Recording to replay; empty to echo prompts
+            token_latency: Seconds between chunks, overriding recorded delays
+            first_token_latency: Seconds before the first chunk, overriding recorded delays
+            ready_delay: Seconds between registration and the READY callback
+            chunk_chars: Chunk size used when echoing prompts
+            loop: Start over once every recorded exchange was replayed
+        """
+        self.exchanges = load_recording(path) if path else []
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.ready_delay = ready_delay
+        self.chunk_chars = chunk_chars
+        self.loop = loop
+        self.requests: List[Dict[str, Any]] = []
+        self.callback = None
+        self._next = 0
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.register_rise_callback = FakeFunction(self._register)
+        self.request_rise = FakeFunction(self._request)
+
+    def _register(self, settings: Any) -> int:
+        self.callback = _unwrap(settings).callback
+        self._start(self._emit, [{'type': int(rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_READY),
+                                  'content': '', 'completed': 1, 'delay': self.ready_delay}])
+        return 0
+
+    def _request(self, content: Any) -> int:
+        content = _unwrap(content)
+        if self.callback is None:
+            return -1
+        if content.contentType != rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT:
+            return 0
+
+        with self._lock:
+            self._pending += content.content
+            if not content.completed:
+                return 0
+            command = json.loads(self._pending.decode('utf-8'))
+            self._pending.clear()
+            self.requests.append(command)
+            events = self._pace(self._select(command))
+
+        self._start(self._emit, events)
+        return 0
+
+    def _select(self, command: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Pick the recorded events that answer a command."""
+        prompt = command.get('prompt')
+        for index in range(self._next, len(self.exchanges)):
+            if self.exchanges[index].get('request', {}).get('prompt') == prompt:
+                self._next = index + 1
+                return self.exchanges[index]['events']
+
+        if self._next >= len(self.exchanges) and self.loop:
+            self._next = 0
+        if self._next < len(self.exchanges):
+            self._next += 1
+            return self.exchanges[self._next - 1]['events']
+        return text_events(f'Echo: {prompt}', chunk_chars=self.chunk_chars)
+
+    def _pace(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply the configured latencies to an event sequence."""
+        if self.token_latency is None and self.first_token_latency is None:
+            return events
+        paced = []
+        for index, event in enumerate(events):
+            delay = self.first_token_latency if index == 0 else self.token_latency
+            paced.append(dict(event, delay=delay if delay is not None else event.get('delay', 0.0)))
+        return paced
+
+    def _start(self, target: Callable[..., None], events: List[Dict[str, Any]]) -> None:
+        """Deliver events on a worker thread, after the previous delivery finished."""
+        previous = self._worker
+
+        def run() -> None:
+            if previous is not None:
+                previous.join()
+            target(events)
+
+        self._worker = threading.Thread(target=run, name='fake-rise', daemon=True)
+        self._worker.start()
+
+    def _emit(self, events: List[Dict[str, Any]]) -> None:
+        """Invoke the registered callback once per event."""
+        data = rise.NV_RISE_CALLBACK_DATA_V1()
+        for event in events:
+            delay = event.get('delay', 0.0)
+            if delay:
+                time.sleep(delay)
+            # Split like the binding splits commands, on character boundaries
+            pieces = rise.split_payload(event.get('content', '').encode('utf-8'))
+            for index, piece in enumerate(pieces):
+                data.contentType = event['type']
+                data.content = piece
+                data.completed = event.get('completed', 0) if index == len(pieces) - 1 else 0
+                self.callback(ctypes.pointer(data))
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued callback was delivered."""
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+
+class RiseRecorder:
+    """
+    Wrapper around the real binding library that records every exchange.
+
+    Use recording_loader() to install it through the binding's library hook.
+    Each completed response is appended to the recording file as soon as it
+    finishes, so partial sessions are kept if the process dies.
+    """
+
+    def __init__(self, lib: Any, path: str):
+        lib.register_rise_callback.argtypes = [ctypes.POINTER(rise.NV_RISE_CALLBACK_SETTINGS_V1)]
+        lib.register_rise_callback.restype = ctypes.c_int
+        lib.request_rise.argtypes = [ctypes.POINTER(rise.NV_REQUEST_RISE_SETTINGS_V1)]
+        lib.request_rise.restype = ctypes.c_int
+        self.lib = lib
+        self.path = path
+        self.register_rise_callback = FakeFunction(self._register)
+        self.request_rise = FakeFunction(self._request)
+        self._settings = None
+        self._callback = None
+        self._forward = None
+        self._pending = bytearray()
+        self._request_obj: Optional[Dict[str, Any]] = None
+        self._events: List[Dict[str, Any]] = []
+        self._last_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _register(self, settings: Any) -> int:
+        original = _unwrap(settings)
+        self._forward = original.callback
+        self._callback = rise.NV_RISE_CALLBACK_V1(self._on_callback)
+        self._settings = rise.NV_RISE_CALLBACK_SETTINGS_V1.from_buffer_copy(original)
+        self._settings.callback = self._callback
+        return self.lib.register_rise_callback(ctypes.byref(self._settings))
+
+    def _request(self, content: Any) -> int:
+        content = _unwrap(content)
+        if content.contentType == rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT:
+            with self._lock:
+                self._pending += content.content
+                if content.completed:
+                    self._request_obj = json.loads(self._pending.decode('utf-8'))
+                    self._pending.clear()
+                    self._events = []
+                    self._last_time = time.monotonic()
+        return self.lib.request_rise(ctypes.byref(content))
+
+    def _on_callback(self, data_ptr: Any) -> None:
+        data = data_ptr.contents
+        now = time.monotonic()
+        with self._lock:
+            event = {'type': data.contentType, 'content': data.content.decode('utf-8', errors='replace'),
+                     'completed': data.completed, 'delay': round(now - self._last_time, 6)}
+            self._last_time = now
+            if self._request_obj is not None and data.contentType in (
+                    rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT,
+                    rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH):
+                self._events.append(event)
+                if data.completed:
+                    self._write({'request': self._request_obj, 'events': self._events})
+                    self._request_obj = None
+        self._forward(data_ptr)
+
+    def _write(self, exchange: Dict[str, Any]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(exchange) + '\n')
+
+
+def install(path: str = '', **options: Any) -> None:
+    """
+    Make the binding use a FakeRiseEngine.
+
+    Args:
+        path: Recording to replay; empty to echo prompts
+        **options: Keyword arguments for FakeRiseEngine
+    """
+    rise.set_library_path(path, lambda recording: FakeRiseEngine(recording, **options))
+
+
+def recording_loader(path: str) -> Callable[[str], RiseRecorder]:
+    """
+    Create a library loader that records the real library's exchanges.
+
+    Usage:
+        rise.set_library_path(rise.LIB_PATH, fake.recording_loader('session.jsonl'))
+
+    Args:
+        path: Recording file the exchanges are appended to
+
+    Returns:
+        Callable[[str], RiseRecorder]: Loader for rise.set_library_path()
+    """
+    return lambda lib_path: RiseRecorder(ctypes.CDLL(lib_path), path)
@@ -0,0 +1,166 @@
+"""
+In-process metrics for the RISE binding
+
+A small, dependency-free registry of counters and histograms, plus a
+renderer for the Prometheus text exposition format so servers can expose
+the binding's metrics at /metrics without pulling in a client library.
+
+Usage:
+    from rise import metrics
+    print(metrics.registry.render_prometheus())
+"""
+
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default histogram buckets in seconds, from sub-millisecond callbacks to long generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing counter, optionally split by labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add to the counter for the given label values."""
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current value for the given label values."""
+        return self._values.get(tuple(str(labels[name]) for name in self.label_names), 0)
+
+    def samples(self) -> Iterable[Tuple[str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f'{self.name}{_format_labels(self.label_names, key)}', value
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile from the buckets.
+
+        Returns the upper bound of the bucket holding the quantile, or None
+        if nothing was observed.
+        """
+        with self._lock:
+            counts, total = list(self._counts), self._count
+        if not total:
+            return None
+        rank = q * total
+        running = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            if running >= rank:
+                return bound
+        return math.inf
+
+    def samples(self) -> Iterable[Tuple[str, float]]:
+        with self._lock:
+            counts, total, value_sum = list(self._counts), self._count, self._sum
+        running = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            yield f'{self.name}_bucket{{le="{_format_value(bound)}"}}', running
+        yield f'{self.name}_sum', value_sum
+        yield f'{self.name}_count', total
+
+
+class MetricsRegistry:
+    """Named collection of metrics; get-or-create accessors make registration idempotent."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text, label_names)
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+            return self._metrics[name]
+
+    def metrics(self) -> List[object]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name} {_format_value(value)}' for name, value in metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# Registry used by the binding
+registry = MetricsRegistry()
+
+# Content type for render_prometheus() output
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
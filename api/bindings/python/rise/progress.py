@@ -0,0 +1,129 @@
+"""
+Download/install progress events for the RISE binding
+
+The DLL callback must return quickly, so it only turns download, install
+and progress callbacks into ProgressEvent tuples and puts them on a queue.
+A dispatcher thread delivers them to subscribers and runs any work the
+callback must not do itself, such as starting the install request.
+
+Terminal output is one subscriber among others: TerminalProgress renders
+the events as tqdm bars, while a headless server can subscribe its own
+function and log or expose the structured events instead.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+
+class ProgressEvent(NamedTuple):
+    """
+    A progress notification from RISE.
+
+    kind is one of:
+    - 'download_requested': RISE asked for its model files to be downloaded
+    - 'installing': RISE started installing
+    - 'progress': percent holds the download/install progress (0-100)
+    - 'message': message holds a status text sent instead of a percentage
+    - 'ready': RISE is ready for requests
+    """
+    kind: str
+    percent: Optional[int] = None
+    message: str = ''
+    timestamp: float = 0.0
+
+
+Subscriber = Callable[[ProgressEvent], None]
+
+
+class ProgressPublisher:
+    """Queue-backed fan-out of progress events to subscribers."""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Register a function that receives every event on the dispatcher thread."""
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Stop delivering events to a subscriber."""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def publish(self, kind: str, percent: Optional[int] = None, message: str = '') -> None:
+        """Queue an event; safe to call from the DLL callback thread."""
+        self._ensure_dispatcher()
+        self._queue.put(ProgressEvent(kind, percent, message, time.time()))
+
+    def run_later(self, task: Callable[[], None]) -> None:
+        """Run a task on the dispatcher thread, in order with the queued events."""
+        self._ensure_dispatcher()
+        self._queue.put(task)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every event queued so far has been delivered.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        done = threading.Event()
+        self.run_later(done.set)
+        return done.wait(timeout)
+
+    def _ensure_dispatcher(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._dispatch, name='rise-progress', daemon=True)
+                    self._thread.start()
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if isinstance(item, ProgressEvent):
+                    for subscriber in self._subscribers:
+                        subscriber(item)
+                else:
+                    item()
+            except Exception as e:
+                print(f'Progress subscriber failed: {e}')
+
+
+class TerminalProgress:
+    """Subscriber that renders progress events as tqdm bars."""
+
+    def __init__(self):
+        self.bar = None
+
+    def __call__(self, event: ProgressEvent) -> None:
+        if event.kind == 'download_requested':
+            self._open('Downloading')
+        elif event.kind == 'progress':
+            if self.bar is None:
+                self._open('Progress')
+            self.bar.n = event.percent
+            self.bar.refresh()
+        elif event.kind == 'message':
+            self._close()
+            print(event.message)
+        elif event.kind == 'ready':
+            self._close()
+            print('RISE is ready')
+
+    def _open(self, description: str) -> None:
+        from tqdm import tqdm
+        self._close()
+        self.bar = tqdm(total=100, desc=description)
+
+    def _close(self) -> None:
+        if self.bar is not None:
+            self.bar.close()
+            self.bar = None
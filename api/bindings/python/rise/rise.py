@@ -13,30 +13,259 @@ The module includes:
 - CTypes structures for C/C++ interop
 - Core functionality for RISE client registration and command sending
 
+The shared library is loaded on first use rather than at import time, so
+importing the module is cheap and does not require the DLL to be present.
+Set the RISE_BINDING_PATH environment variable or call set_library_path() to
+load a different library, e.g. a fake engine for tests. RISE_BINDING_LOADER
+selects the callable that opens it ("module:attribute", ctypes.CDLL by
+default), which is how the pure-Python engine in rise.fake is plugged in.
+
 Dependencies:
     - ctypes: For C/C++ interoperability
-    - tqdm: For progress bar visualization
+    - tqdm: For progress bar visualization (imported on first use, see rise.progress)
     - json: For command serialization
 """
 
 import ctypes
 from enum import IntEnum
+import importlib
+import logging
 import os
+import threading
 import time
-import sys
 import json
-from tqdm import tqdm
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable, Iterator
+
+from .metrics import registry as metrics_registry
+from .progress import ProgressPublisher, TerminalProgress
+
+logger = logging.getLogger(__name__)
 
 # Global variables for state management
 global nvapi
 global callback_settings
+nvapi = None
 callback = None
-response = ''
-chart = ''
-response_done = False
-ready = False
-progress_bar = None
+response_done = threading.Event()
+ready = threading.Event()
+# Download/install progress is published here instead of being rendered in the callback
+progress_events = ProgressPublisher()
+terminal_progress = None
+# Guards the response buffers against the callback thread during resets
+state_lock = threading.Lock()
+# Serializes requests; responses carry no request id, so only one may be in flight
+request_lock = threading.Lock()
+# Set when a request was abandoned; its remaining chunks are dropped on arrival
+# until it completes or the next request is submitted
+discard_pending = False
+# Set while a request is submitted and waiting; chunks arriving outside one are dropped
+request_active = False
+cancel_requested = threading.Event()
+request_stats = {'sent': 0, 'completed': 0, 'failed': 0, 'timed_out': 0, 'cancelled': 0, 'too_large': 0}
+# Arrival times (time.perf_counter) of the first and latest chunk of the pending response
+first_chunk_time = None
+last_chunk_time = None
+response_chunks = 0
+# Optional function receiving each chunk of the pending response, see send_rise_command(on_chunk=...)
+chunk_listener = None
+# Size limits of the pending response, see send_rise_command(max_response_bytes=..., spill_to_disk=...)
+response_limit = None
+response_spill_bytes = None
+# Set by the callback when the text of the pending response held in memory
+# passed response_spill_bytes, for the waiting thread to write it out
+spill_requested = threading.Event()
+# Set by the callback when the pending response completed or went over response_limit
+response_complete = False
+response_overflow = False
+# Background startup bookkeeping, see start_rise_client()
+startup_lock = threading.Lock()
+startup_thread = None
+startup_time = None
+startup_status = {'state': 'idle', 'error': None, 'ready_seconds': None,
+                  'warmup_seconds': None, 'first_response_seconds': None}
+
+# Size of the content buffer shared by the RISE request and callback structures
+CONTENT_BUFFER_SIZE = 4096
+# Payload bytes sent per request; one byte is kept free for the NUL terminator
+MAX_CHUNK_BYTES = CONTENT_BUFFER_SIZE - 1
+# Upper bound for a serialized command split across several requests
+MAX_COMMAND_BYTES = 64 * 1024
+# Default number of seconds to wait for a response; None waits forever
+REQUEST_TIMEOUT = 120.0
+# Seconds between cancellation checks while waiting for a response
+CANCEL_POLL_INTERVAL = 0.1
+# Default upper bound for a response (text plus chart); larger responses are aborted. None disables it
+MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+# With spill_to_disk, text beyond this many bytes is moved to a temporary file
+RESPONSE_SPILL_BYTES = 256 * 1024
+# Chunks buffered by stream_rise_command before RISE's callback thread is made to wait
+STREAM_QUEUE_CHUNKS = 64
+
+
+class RiseCommandTooLargeError(ValueError):
+    """Raised when a serialized command is larger than MAX_COMMAND_BYTES."""
+
+
+class RiseTimeoutError(TimeoutError):
+    """Raised when RISE does not complete a response before the request deadline."""
+
+
+class RiseCancelledError(Exception):
+    """Raised when a pending request is cancelled by the caller."""
+
+
+class RiseResponseTooLargeError(Exception):
+    """Raised when a response grows past its size limit and is aborted."""
+
+
+# Per-request instrumentation, exported through rise.metrics.registry
+REQUESTS = metrics_registry.counter(
+    'rise_requests_total', 'RISE requests by outcome', ('outcome',))
+QUEUE_WAIT_SECONDS = metrics_registry.histogram(
+    'rise_request_queue_wait_seconds', 'Time spent waiting for an earlier request to finish')
+SERIALIZE_SECONDS = metrics_registry.histogram(
+    'rise_request_serialize_seconds', 'Time spent building and encoding the command')
+SUBMIT_SECONDS = metrics_registry.histogram(
+    'rise_request_submit_seconds', 'Time spent in request_rise calls')
+FIRST_CHUNK_SECONDS = metrics_registry.histogram(
+    'rise_response_first_chunk_seconds', 'Time from submitting a request to its first response chunk')
+CHUNK_INTERVAL_SECONDS = metrics_registry.histogram(
+    'rise_response_chunk_interval_seconds', 'Time between consecutive response chunks')
+DURATION_SECONDS = metrics_registry.histogram(
+    'rise_request_duration_seconds', 'Total time spent in send_rise_command')
+PAYLOAD_BYTES = metrics_registry.histogram(
+    'rise_request_payload_bytes', 'Size of serialized commands',
+    (256, 1024, 4096, 16384, 65536))
+
+
+class PayloadBuffer:
+    """
+    Growable byte buffer that accumulates callback payloads.
+
+    Chunks are copied straight from the callback structure into a pre-sized
+    bytearray with ctypes.memmove, so the callback thread does not create a
+    bytes or str object per chunk. The text is decoded once, when the
+    response is complete, which also keeps multi-byte UTF-8 sequences that
+    straddle two chunks intact.
+
+    The buffer only ever touches memory, so it is safe to fill from the
+    callback thread. Large payloads are moved out in blocks with detach(),
+    e.g. by a ResponseSpill writing them to a file on another thread.
+    """
+
+    def __init__(self, capacity: int = CONTENT_BUFFER_SIZE * 16):
+        self._length = 0
+        # Bytes moved out with detach(); offsets keep counting them
+        self._detached = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        data = bytearray(capacity)
+        if self._length:
+            data[:self._length] = self._data[:self._length]
+        self._data = data
+        # Keeping the ctypes view alive pins the bytearray so it cannot be resized
+        self._view = (ctypes.c_char * capacity).from_buffer(data)
+        self._address = ctypes.addressof(self._view)
+
+    def __len__(self) -> int:
+        return self._detached + self._length
+
+    @property
+    def held(self) -> int:
+        """Bytes held in memory, i.e. appended and not detached."""
+        return self._length
+
+    def append_from(self, address: int, size: int = CONTENT_BUFFER_SIZE) -> None:
+        """
+        Append the NUL-terminated payload stored at a memory address.
+
+        Args:
+            address: Start of the source buffer
+            size: Size of the source buffer; at most this many bytes are read
+        """
+        end = self._length + size
+        if end > len(self._data):
+            self._allocate(max(end, len(self._data) * 2))
+        ctypes.memmove(self._address + self._length, address, size)
+        nul = self._data.find(0, self._length, end)
+        self._length = end if nul < 0 else nul
+
+    def getvalue(self) -> str:
+        """Decode the accumulated payload as UTF-8."""
+        return self._data[:self._length].decode('utf-8', errors='replace')
+
+    def getbytes(self, start: int = 0) -> bytes:
+        """
+        Copy the payload held in memory, or its tail from offset start, without decoding it.
+
+        Offsets count every byte appended so far, including detached ones.
+        """
+        return bytes(self._data[max(start - self._detached, 0):self._length])
+
+    def detach(self) -> bytes:
+        """Take the payload held in memory out of the buffer, keeping the allocated capacity."""
+        data = bytes(self._data[:self._length])
+        self._detached += self._length
+        self._length = 0
+        return data
+
+    def clear(self) -> None:
+        """Drop the accumulated payload, keeping the allocated capacity."""
+        self._length = 0
+        self._detached = 0
+
+
+response = PayloadBuffer()
+chart = PayloadBuffer()
+
+
+class ResponseSpill:
+    """
+    Temporary file receiving the text of a response beyond a size threshold.
+
+    Only the thread waiting for the response writes to it. The callback
+    appends to memory and sets spill_requested once the text held there
+    passes the threshold; drain() then takes that text in one block under
+    state_lock and writes it after releasing the lock, so slow disks hold up
+    neither RISE's callback thread nor the chunks arriving meanwhile.
+    """
+
+    def __init__(self, buffer: PayloadBuffer, threshold: int):
+        """
+        Args:
+            buffer: Buffer the callback fills
+            threshold: Bytes kept in memory before the text goes to the file;
+                the first threshold bytes are also kept as a preview
+        """
+        self.buffer = buffer
+        self.threshold = threshold
+        self.file = None
+        self.head = b''
+
+    def drain(self) -> None:
+        """Move the text held in memory to the file, once it spilled or passed the threshold."""
+        with state_lock:
+            if self.file is None and self.buffer.held <= self.threshold:
+                return
+            data = self.buffer.detach()
+        if self.file is None:
+            import tempfile
+            self.file = tempfile.NamedTemporaryFile('wb', prefix='rise-response-', suffix='.txt', delete=False)
+            self.head = data[:self.threshold]
+        self.file.write(data)
+
+    def close(self) -> str:
+        """Close the file; returns its path, which the caller now owns."""
+        path = self.file.name
+        self.file.close()
+        self.file = None
+        return path
+
+    def discard(self) -> None:
+        """Close and delete the file, if there is one."""
+        if self.file is not None:
+            os.unlink(self.close())
 
 
 class NV_RISE_CONTENT_TYPE(IntEnum):
@@ -73,7 +302,7 @@ class NV_RISE_CALLBACK_DATA_V1(ctypes.Structure):
     """Structure containing callback data from RISE."""
     _fields_ = [("super", NV_CLIENT_CALLBACK_SETTINGS_SUPER_V1),
                 ("contentType", ctypes.c_int),
-                ("content", ctypes.c_char * 4096),
+                ("content", ctypes.c_char * CONTENT_BUFFER_SIZE),
                 ("completed", ctypes.c_int)]
 
 
@@ -81,11 +310,14 @@ class NV_REQUEST_RISE_SETTINGS_V1(ctypes.Structure):
     """Structure for RISE request settings."""
     _fields_ = [("version", ctypes.c_int),
                 ("contentType", ctypes.c_int),
-                ("content", ctypes.c_char * 4096),
+                ("content", ctypes.c_char * CONTENT_BUFFER_SIZE),
                 ("completed", ctypes.c_uint8),
                 ("reserved", ctypes.c_uint8 * 32)]
 
 
+# Offset of the content buffer inside the callback structure
+CALLBACK_CONTENT_OFFSET = NV_RISE_CALLBACK_DATA_V1.content.offset
+
 # Define callback function type
 NV_RISE_CALLBACK_V1 = ctypes.CFUNCTYPE(
     None, ctypes.POINTER(NV_RISE_CALLBACK_DATA_V1))
@@ -111,118 +343,555 @@ def base_function_callback(data_ptr: ctypes.POINTER(NV_RISE_CALLBACK_DATA_V1)) -
         data_ptr: Pointer to the callback data structure containing response information
 
     Global State:
-        response: Accumulates text responses
-        response_done: Flags when a response is complete
-        ready: Indicates RISE system readiness
-        progress_bar: Manages download/installation progress visualization
+        response: Accumulates text response bytes
+        chart: Accumulates graph payload bytes
+        chunk_listener: Receives each text/graph chunk of the pending request
+        response_done: Set when a response is complete
+        discard_pending: Drops chunks that belong to an abandoned request
+        response_limit: Aborts the response once text and chart exceed it
+        response_spill_bytes: Has the waiting thread spill the text held in memory beyond it
+        ready: Set once RISE reports it is ready
+        progress_events: Receives download, install and progress events
     """
-    global response, response_done, ready, progress_bar, chart
+    global discard_pending, first_chunk_time, last_chunk_time, response_chunks
+    global response_complete, response_overflow
 
     data = data_ptr.contents
     if data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_READY:
         if data.completed == 1:
-           ready = True
-           print('RISE is ready')
-           if progress_bar is not None:
-               progress_bar.close()
+           ready.set()
+           progress_events.publish('ready')
            return
 
-    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT:
-        response += data.content.decode('utf-8')
-        if data.completed == 1:
-            response_done = True
-    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH:
-        chart += data.content.decode('utf-8')
+    elif data.contentType in (NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT,
+                              NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_GRAPH):
+        with state_lock:
+            if discard_pending:
+                if data.completed == 1:
+                    discard_pending = False
+                return
+            if not request_active:
+                # Stray chunk of an earlier response; it must not be timed or
+                # leak into the next one
+                return
 
-        if data.completed == 1:
-            response_done = True
+            now = time.perf_counter()
+            if first_chunk_time is None:
+                first_chunk_time = now
+            else:
+                CHUNK_INTERVAL_SECONDS.observe(now - last_chunk_time)
+            last_chunk_time = now
+            response_chunks += 1
+
+            target = response if data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT else chart
+            start = len(target)
+            target.append_from(ctypes.addressof(data) + CALLBACK_CONTENT_OFFSET)
+            listener = chunk_listener
+            piece = target.getbytes(start) if listener is not None else b''
+            completed = data.completed == 1
+
+            if response_limit is not None and len(response) + len(chart) > response_limit:
+                # Abort early: wake the waiting request and drop the rest of the response
+                response_overflow = True
+                response.clear()
+                chart.clear()
+                discard_pending = not completed
+                listener = None
+                completed = True
+            elif target is response and response_spill_bytes is not None and target.held > response_spill_bytes:
+                # Written out by the waiting thread; the callback stays in memory
+                spill_requested.set()
+            response_complete = completed
+
+        # Outside the lock, so a listener that blocks to apply backpressure does not stall the watchdog
+        if listener is not None:
+            try:
+                listener(data.contentType, piece)
+            except Exception as e:
+                print(f'Chunk listener failed: {e}')
+        if completed:
+            response_done.set()
 
     elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST:
-        intiate_rise_install()
-        progress_bar = tqdm(total=100, desc="Downloading")
+        # The install request is sent from the dispatcher thread, not from inside the callback
+        progress_events.publish('download_requested')
+        progress_events.run_later(intiate_rise_install)
+
+    elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_INSTALLING:
+        progress_events.publish('installing')
 
     elif data.contentType == NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_PROGRESS_UPDATE:
         data_content = data.content.decode('utf-8')
-        if progress_bar is None:
-            progress_bar = tqdm(total=100, desc="Progress")
         if data_content.isdigit():
-            progress_bar.n = int(data_content)
-            progress_bar.refresh()
+            progress_events.publish('progress', percent=int(data_content))
         else:
-            progress_bar.close()
-            print(data_content)
+            progress_events.publish('message', message=data_content)
 
 
-# Initialize DLL/shared library path
+# Default DLL/shared library path
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-LIB_PATH = os.path.join(SCRIPT_DIR, "python_binding.dll")
-try:
-    nvapi = ctypes.CDLL(LIB_PATH)
-except OSError as e:
-    if "vcruntime" in str(e).lower() or "msvcp" in str(e).lower() or "cannot load" in str(e).lower():
-        print("\n❌ Missing Visual C++ Redistributable (x64)")
-        print("Download and install it from:")
-        print("https://aka.ms/vs/17/release/vc_redist.x64.exe\n")
-        sys.exit(1)
-    else:
-        raise  # re-raise unexpected errors
-    
-# Configure API function signatures
-nvapi.register_rise_callback.argtypes = [ctypes.POINTER(NV_RISE_CALLBACK_SETTINGS_V1)]
-nvapi.register_rise_callback.restype = ctypes.c_int
-nvapi.request_rise.argtypes = [ctypes.POINTER(NV_REQUEST_RISE_SETTINGS_V1)]
-nvapi.request_rise.restype = ctypes.c_int
+LIB_PATH = os.environ.get('RISE_BINDING_PATH', os.path.join(SCRIPT_DIR, "python_binding.dll"))
+library_loader: Optional[Callable[[str], Any]] = None
+library_lock = threading.Lock()
+
+
+class RiseLibraryError(OSError):
+    """Raised when the RISE binding library cannot be loaded."""
+
+
+def _default_loader() -> Callable[[str], Any]:
+    """Resolve the RISE_BINDING_LOADER environment variable, falling back to ctypes.CDLL."""
+    spec = os.environ.get('RISE_BINDING_LOADER')
+    if not spec:
+        return ctypes.CDLL
+    module_name, _, attribute = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def set_library_path(path: str, loader: Callable[[str], Any] = ctypes.CDLL) -> None:
+    """
+    Select the library used for RISE calls.
+
+    Takes effect on the next call that needs the library; a library that was
+    already loaded is dropped.
+
+    Args:
+        path: Path of the shared library to load
+        loader: Callable that opens the library; defaults to ctypes.CDLL
+    """
+    global LIB_PATH, library_loader, nvapi
+
+    with library_lock:
+        LIB_PATH = path
+        library_loader = loader
+        nvapi = None
+
+
+def load_library() -> Any:
+    """
+    Load the RISE binding library and configure its function signatures.
+
+    The library is loaded once and cached; later calls return the cached handle.
+
+    Returns:
+        The loaded library
+
+    Raises:
+        RiseLibraryError: If the library cannot be loaded
+    """
+    global nvapi
+
+    if nvapi is not None:
+        return nvapi
+
+    with library_lock:
+        if nvapi is not None:
+            return nvapi
+
+        try:
+            lib = (library_loader or _default_loader())(LIB_PATH)
+        except OSError as e:
+            message = str(e).lower()
+            if "vcruntime" in message or "msvcp" in message or "cannot load" in message:
+                raise RiseLibraryError(
+                    'Missing Visual C++ Redistributable (x64). Download and install it from: '
+                    'https://aka.ms/vs/17/release/vc_redist.x64.exe') from e
+            raise RiseLibraryError(f'Unable to load RISE binding from {LIB_PATH}: {e}') from e
+
+        # Configure API function signatures
+        lib.register_rise_callback.argtypes = [ctypes.POINTER(NV_RISE_CALLBACK_SETTINGS_V1)]
+        lib.register_rise_callback.restype = ctypes.c_int
+        lib.request_rise.argtypes = [ctypes.POINTER(NV_REQUEST_RISE_SETTINGS_V1)]
+        lib.request_rise.restype = ctypes.c_int
+
+        nvapi = lib
+        return nvapi
+
 
 callback_settings = NV_RISE_CALLBACK_SETTINGS_V1()
 
 
-def register_rise_client() -> None:
+def register_rise_client(timeout: Optional[float] = None, show_progress: bool = True) -> bool:
     """
     Register the client with the RISE service.
 
     Initializes the connection to RISE and sets up the callback mechanism.
     Waits until RISE signals ready status before returning.
 
+    Args:
+        timeout: Seconds to wait for RISE to become ready; None waits forever
+        show_progress: Render download/install progress in the terminal. Headless
+            callers can pass False and subscribe to progress_events instead
+
+    Returns:
+        bool: True if RISE is ready, False if registration failed or timed out
+
     Raises:
         AttributeError: If there's an error accessing the RISE API
+        RiseLibraryError: If the binding library cannot be loaded
     """
-    global nvapi, callback_settings, callback, ready
+    global callback_settings, callback, terminal_progress
+
+    lib = load_library()
+    if show_progress and terminal_progress is None:
+        terminal_progress = TerminalProgress()
+        progress_events.subscribe(terminal_progress)
 
     try:
-        callback_settings.callback = NV_RISE_CALLBACK_V1(base_function_callback)
+        if callback is None:
+            # Created once and kept here: the library calls it for as long as it
+            # runs, and registering again must not free a thunk still in use
+            callback = NV_RISE_CALLBACK_V1(base_function_callback)
+        callback_settings.callback = callback
         callback_settings.version = ctypes.sizeof(NV_RISE_CALLBACK_SETTINGS_V1) | (1 << 16)
 
-        ret = nvapi.register_rise_callback(ctypes.byref(callback_settings))
+        ret = lib.register_rise_callback(ctypes.byref(callback_settings))
         if ret != 0:
             print('Registration Failed')
-            return
+            return False
 
-        while not ready:
-            time.sleep(1)
+        return ready.wait(timeout)
 
     except AttributeError as e:
         print(f"An error occurred: {e}")
+        return False
+
+
+def is_ready() -> bool:
+    """Check whether RISE has reported that it is ready for requests."""
+    return ready.is_set()
+
+
+def start_rise_client(warmup_prompt: str = '', show_progress: bool = True) -> threading.Thread:
+    """
+    Register the client with RISE on a background thread.
+
+    Lets servers bind their port immediately instead of blocking on
+    register_rise_client(). Once RISE is ready the optional warm-up prompt is
+    sent so the model is loaded before the first real request. Progress is
+    reported through get_startup_status(). Calling this again returns the
+    thread that is already running.
+
+    Args:
+        warmup_prompt: Prompt sent once RISE is ready; skipped when empty
+        show_progress: Render download/install progress in the terminal
+
+    Returns:
+        threading.Thread: The startup thread
+    """
+    global startup_thread, startup_time
+
+    with startup_lock:
+        if startup_thread is None:
+            startup_time = time.monotonic()
+            startup_status['state'] = 'registering'
+            startup_thread = threading.Thread(target=_run_startup, args=(warmup_prompt, show_progress),
+                                              name='rise-startup', daemon=True)
+            startup_thread.start()
+        return startup_thread
+
+
+def _startup_elapsed() -> Optional[float]:
+    """Seconds since start_rise_client() was called, if it was."""
+    return None if startup_time is None else round(time.monotonic() - startup_time, 3)
+
 
+def _run_startup(warmup_prompt: str, show_progress: bool) -> None:
+    """Body of the startup thread: register, then warm up the model."""
+    try:
+        if not register_rise_client(show_progress=show_progress):
+            startup_status.update(state='failed', error='Registration failed')
+            return
+        startup_status['ready_seconds'] = _startup_elapsed()
+    except Exception as e:
+        startup_status.update(state='failed', error=str(e))
+        return
+
+    if warmup_prompt:
+        # A failed warm-up only costs latency later, so RISE is still reported ready
+        startup_status['state'] = 'warming_up'
+        try:
+            if send_rise_command(warmup_prompt) is not None:
+                startup_status['warmup_seconds'] = _startup_elapsed()
+            else:
+                startup_status['error'] = 'Warm-up prompt failed'
+        except Exception as e:
+            startup_status['error'] = f'Warm-up prompt failed: {e}'
+
+    startup_status['state'] = 'ready'
+    if startup_status['warmup_seconds'] is not None:
+        logger.info(f"RISE ready after {startup_status['ready_seconds']}s, "
+                    f"warm after {startup_status['warmup_seconds']}s")
+    else:
+        logger.info(f"RISE ready after {startup_status['ready_seconds']}s")
+
+
+def get_startup_status() -> Dict[str, Any]:
+    """
+    Get the progress of a background startup.
+
+    Returns:
+        Dict[str, Any]: The startup state ('idle', 'registering', 'warming_up',
+        'ready' or 'failed'), the last error, and the seconds from
+        start_rise_client() until RISE was ready, the warm-up finished and
+        the first response completed
+    """
+    return dict(startup_status)
+
+
+def split_payload(payload: bytes, chunk_size: int = MAX_CHUNK_BYTES) -> List[bytes]:
+    """
+    Split a serialized command into pieces that fit the request content buffer.
+
+    Pieces end on UTF-8 character boundaries, so each one decodes on its own.
+    Only a character longer than chunk_size is cut.
+
+    Args:
+        payload: The encoded command
+        chunk_size: Maximum number of bytes per piece
+
+    Returns:
+        List[bytes]: The payload pieces in send order; always at least one entry
+    """
+    if not payload:
+        return [b'']
+    pieces = []
+    start = 0
+    while start < len(payload):
+        end = min(start + chunk_size, len(payload))
+        cut = end
+        # Back off over continuation bytes (0b10xxxxxx) to the start of their character
+        while start < cut < len(payload) and payload[cut] & 0xC0 == 0x80:
+            cut -= 1
+        if cut > start:
+            end = cut
+        pieces.append(payload[start:end])
+        start = end
+    return pieces
+
+
+def command_bytes(text: str) -> int:
+    """
+    Bytes a string takes in a serialized command, without its quotes.
+
+    Commands are serialized with json.dumps, which escapes every non-ASCII
+    character: one from the Basic Multilingual Plane takes 6 bytes and one
+    beyond it, e.g. an emoji, 12.
+    """
+    return len(json.dumps(text)) - 2
+
+
+def truncate_to_command_bytes(text: str, max_bytes: int) -> str:
+    """
+    Cut a string to its longest prefix that takes at most max_bytes in a serialized command.
+
+    Use this rather than a character count to keep user-supplied text, such
+    as an email body, under MAX_COMMAND_BYTES.
+
+    Args:
+        text: Text to cut
+        max_bytes: Size budget, see command_bytes()
+
+    Returns:
+        str: The text, or as much of its start as fits
+    """
+    # Every character takes at least one byte
+    text = text[:max(0, max_bytes)]
+    if command_bytes(text) <= max_bytes:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if command_bytes(text[:middle]) <= max_bytes:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def _build_request(content_type: int, payload: bytes = b'', completed: bool = True) -> NV_REQUEST_RISE_SETTINGS_V1:
+    """Create a versioned request structure holding a single payload chunk."""
+    content = NV_REQUEST_RISE_SETTINGS_V1()
+    content.content = payload
+    content.contentType = content_type
+    content.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
+    content.completed = 1 if completed else 0
+    return content
+
+
+def _count(stat: str) -> None:
+    """Increment one of the request_stats counters."""
+    with state_lock:
+        request_stats[stat] += 1
+    REQUESTS.inc(outcome=stat)
+
+
+def get_request_stats() -> Dict[str, int]:
+    """
+    Get a snapshot of the request counters.
+
+    Returns:
+        Dict[str, int]: Number of requests sent, completed, failed, timed out, cancelled
+        and aborted for exceeding the response size limit
+    """
+    with state_lock:
+        return dict(request_stats)
+
+
+def cancel_rise_command() -> None:
+    """
+    Cancel the request currently waiting in send_rise_command.
+
+    The waiting call raises RiseCancelledError. Has no effect when no request
+    is pending.
+    """
+    cancel_requested.set()
 
-def send_rise_command(command: str, adapter: str = '', system_prompt: str = '') -> Optional[dict]:
+
+def _abandon_request() -> bool:
+    """
+    Reset the response state after a request was given up on.
+
+    Any chunks the abandoned request still produces before the next request is
+    submitted are dropped, so they do not leak into the next response. Dropping
+    stops at the next submission, so a generation that never finishes cannot
+    hold up every later request.
+
+    Returns:
+        bool: True if the response completed just before it was abandoned
+    """
+    global discard_pending, chunk_listener
+
+    with state_lock:
+        if response_complete:
+            return True
+        discard_pending = True
+        chunk_listener = None
+        response.clear()
+        chart.clear()
+        return False
+
+
+def _wait_for_response(deadline: Optional[float], cancel_event: Optional[threading.Event],
+                       spill: Optional[ResponseSpill] = None) -> None:
+    """
+    Block until the pending response completes, acting as the request watchdog.
+
+    With a spill, text the callback asked to spill is written out between waits.
+
+    Raises:
+        RiseTimeoutError: If the deadline passes first
+        RiseCancelledError: If the request is cancelled first
+    """
+    while True:
+        wait = CANCEL_POLL_INTERVAL
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if _abandon_request():
+                    return
+                _count('timed_out')
+                raise RiseTimeoutError('RISE did not complete the response before the deadline')
+            wait = min(wait, remaining)
+
+        if response_done.wait(wait):
+            return
+
+        if spill is not None and spill_requested.is_set():
+            spill_requested.clear()
+            spill.drain()
+
+        if cancel_requested.is_set() or (cancel_event is not None and cancel_event.is_set()):
+            if _abandon_request():
+                return
+            _count('cancelled')
+            raise RiseCancelledError('RISE request was cancelled')
+
+
+def send_rise_command(command: str, adapter: str = '', system_prompt: str = '',
+                      timeout: Optional[float] = None,
+                      cancel_event: Optional[threading.Event] = None,
+                      parse_chart: bool = False,
+                      on_chunk: Optional[Callable[[int, bytes], None]] = None,
+                      max_response_bytes: Optional[int] = None,
+                      spill_to_disk: bool = False) -> Optional[dict]:
     """
     Send a command to RISE and wait for the response.
 
     Formats the command as a JSON object with a prompt and context,
-    sends it to RISE, and waits for the complete response.
+    sends it to RISE, and waits for the complete response. Commands that do
+    not fit the 4096-byte request buffer are sent as a sequence of requests
+    where only the last one is flagged as completed.
+
+    Requests are handled one at a time. Time spent waiting for an earlier
+    request counts against the deadline.
+
+    Each request records where its time went (queue wait, serialization,
+    request_rise calls, time to first chunk, chunk inter-arrival, total) in
+    rise.metrics.registry, and returns the same timings under 'timings'.
 
     Args:
         command: The text command to send to RISE
+        adapter: Optional adapter to route the command to
+        system_prompt: Optional system prompt for the adapter
+        timeout: Seconds to wait for the response; defaults to REQUEST_TIMEOUT
+        cancel_event: Optional event the caller can set to cancel the request
+        parse_chart: Also return the chart payload parsed into ChartSeries
+            objects under the 'charts' key
+        on_chunk: Optional function called with the content type and raw bytes
+            of every response chunk as it arrives, for streaming. It runs on
+            the RISE callback thread and must return quickly; a multi-byte
+            UTF-8 character may be split across two chunks
+        max_response_bytes: Abort the response once text and chart exceed this
+            many bytes; defaults to MAX_RESPONSE_BYTES
+        spill_to_disk: Move text beyond RESPONSE_SPILL_BYTES to a temporary
+            file instead of keeping it in memory. The path is returned under
+            'response_file' (the caller deletes it) and 'completed_response'
+            then only holds the first RESPONSE_SPILL_BYTES
 
     Returns:
         Optional[dict]: The response from RISE, or None if an error occurs
 
     Raises:
         AttributeError: If there's an error accessing the RISE API
+        RiseCommandTooLargeError: If the serialized command exceeds MAX_COMMAND_BYTES
+        RiseLibraryError: If the binding library cannot be loaded
+        RiseTimeoutError: If the response does not complete in time
+        RiseCancelledError: If the request is cancelled while waiting
+        RiseResponseTooLargeError: If the response grows past max_response_bytes
     """
-    global nvapi, response_done, response, chart
+    global discard_pending, request_active, first_chunk_time, last_chunk_time, response_chunks
+    global chunk_listener, response_limit, response_spill_bytes, response_complete, response_overflow
 
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
+    if max_response_bytes is None:
+        max_response_bytes = MAX_RESPONSE_BYTES
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    lib = load_library()
+    started = time.perf_counter()
+    if not request_lock.acquire(timeout=-1 if timeout is None else timeout):
+        _count('timed_out')
+        raise RiseTimeoutError('Timed out waiting for an earlier RISE request to finish')
+
+    spill = ResponseSpill(response, RESPONSE_SPILL_BYTES) if spill_to_disk else None
     try:
+        acquired = time.perf_counter()
+        cancel_requested.clear()
+        response_done.clear()
+        spill_requested.clear()
+        with state_lock:
+            # An abandoned request that never completed must not swallow this
+            # one's chunks; RISE is assumed to have dropped it
+            discard_pending = False
+            first_chunk_time = last_chunk_time = None
+            response_chunks = 0
+            chunk_listener = on_chunk
+            response_limit = max_response_bytes
+            response_spill_bytes = RESPONSE_SPILL_BYTES if spill_to_disk else None
+            response_complete = response_overflow = False
+
         command_obj = {
             'prompt': command,
             'context_assist': {}
@@ -234,51 +903,194 @@ def send_rise_command(command: str, adapter: str = '', system_prompt: str = '')
         if(system_prompt != ''):
             command_obj['context_assist']['officialAdapterSystemPrompt'] = system_prompt
 
-        content = NV_REQUEST_RISE_SETTINGS_V1()
-        content.content = json.dumps(command_obj).encode('utf-8')
-        content.contentType = NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT
-        content.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
-        content.completed = 1
+        payload = json.dumps(command_obj).encode('utf-8')
+        if len(payload) > MAX_COMMAND_BYTES:
+            raise RiseCommandTooLargeError(
+                f'Command is {len(payload)} bytes once serialized; the limit is {MAX_COMMAND_BYTES} bytes')
+        serialized = time.perf_counter()
 
-        ret = nvapi.request_rise(content)
-        if ret != 0:
-            print(f'Send RISE command failed with {ret}')
-            return None
+        chunks = split_payload(payload)
+        with state_lock:
+            request_active = True
+        for index, chunk in enumerate(chunks):
+            content = _build_request(NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT,
+                                     chunk, index == len(chunks) - 1)
+            ret = lib.request_rise(content)
+            if ret != 0:
+                print(f'Send RISE command failed with {ret} (chunk {index + 1} of {len(chunks)})')
+                _count('failed')
+                return None
+        submitted = time.perf_counter()
+        _count('sent')
+
+        _wait_for_response(deadline, cancel_event, spill)
+        if spill is not None:
+            # The rest of a response that spilled or ended past the threshold
+            spill.drain()
 
-        while not response_done:
-            time.sleep(1)
+        response_file = None
+        with state_lock:
+            response_done.clear()
+            overflow = response_overflow
+            if spill is None or spill.file is None:
+                completed_response = response.getvalue()
+            completed_chart = chart.getvalue()
+            chart_bytes = chart.getbytes() if parse_chart else b''
+            response.clear()
+            chart.clear()
+            first_chunk = first_chunk_time
+            chunk_count = response_chunks
+        if spill is not None and spill.file is not None and not overflow:
+            response_file = spill.close()
+            completed_response = spill.head.decode('utf-8', errors='replace')
+        if overflow:
+            _count('too_large')
+            raise RiseResponseTooLargeError(
+                f'Response exceeded {max_response_bytes} bytes and was aborted')
+        _count('completed')
+        if startup_status['first_response_seconds'] is None:
+            startup_status['first_response_seconds'] = _startup_elapsed()
+
+        finished = time.perf_counter()
+        timings = {
+            'queue_wait': acquired - started,
+            'serialize': serialized - acquired,
+            'submit': submitted - serialized,
+            # A fast engine may answer before request_rise() returns
+            'first_chunk': None if first_chunk is None else max(0.0, first_chunk - submitted),
+            'total': finished - started,
+            'chunks': chunk_count,
+        }
+        QUEUE_WAIT_SECONDS.observe(timings['queue_wait'])
+        SERIALIZE_SECONDS.observe(timings['serialize'])
+        SUBMIT_SECONDS.observe(timings['submit'])
+        if timings['first_chunk'] is not None:
+            FIRST_CHUNK_SECONDS.observe(timings['first_chunk'])
+        DURATION_SECONDS.observe(timings['total'])
+        PAYLOAD_BYTES.observe(len(payload))
 
-        response_done = False
-        completed_response = response
-        completed_chart = chart
-        response = ''
-        chart = ''
-        return {'completed_response': completed_response,'completed_chart': completed_chart}
+        result = {'completed_response': completed_response,'completed_chart': completed_chart,
+                  'timings': timings}
+        if response_file is not None:
+            result['response_file'] = response_file
+        if parse_chart:
+            from .chart import parse_charts
+            result['charts'] = parse_charts(chart_bytes)
+        return result
 
     except AttributeError as e:
         print(f"An error occurred: {e}")
+        _count('failed')
         return None
 
+    finally:
+        with state_lock:
+            request_active = False
+            chunk_listener = None
+            response_limit = response_spill_bytes = None
+        if spill is not None:
+            # The file of a response that failed; a returned one was closed already
+            spill.discard()
+        request_lock.release()
+
+
+def stream_rise_command(command: str, adapter: str = '', system_prompt: str = '',
+                        timeout: Optional[float] = None,
+                        max_response_bytes: Optional[int] = None,
+                        max_queued_chunks: int = STREAM_QUEUE_CHUNKS) -> Iterator[str]:
+    """
+    Send a command to RISE and yield the text of the response as it arrives.
+
+    Chunks are handed over through a queue holding at most max_queued_chunks
+    entries. When the consumer falls behind, RISE's callback thread waits for
+    room instead of the backlog growing without bound. Closing the generator
+    early cancels the request.
+
+    Args:
+        command: The text command to send to RISE
+        adapter: Optional adapter to route the command to
+        system_prompt: Optional system prompt for the adapter
+        timeout: Seconds to wait for the response; defaults to REQUEST_TIMEOUT
+        max_response_bytes: Response size limit; defaults to MAX_RESPONSE_BYTES
+        max_queued_chunks: Chunks buffered before RISE is made to wait
+
+    Yields:
+        str: Decoded pieces of the text response
+
+    Raises:
+        RiseTimeoutError, RiseCancelledError, RiseResponseTooLargeError: As in
+            send_rise_command, after the chunks received before the failure
+    """
+    import codecs
+    import queue
+
+    chunks = queue.Queue(max_queued_chunks)
+    closed = threading.Event()
+    cancel_event = threading.Event()
+    outcome = {}
+
+    def on_chunk(content_type: int, payload: bytes) -> None:
+        if content_type != NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT:
+            return
+        while not closed.is_set():
+            try:
+                chunks.put(payload, timeout=CANCEL_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def run() -> None:
+        try:
+            outcome['result'] = send_rise_command(command, adapter, system_prompt, timeout=timeout,
+                                                  cancel_event=cancel_event, on_chunk=on_chunk,
+                                                  max_response_bytes=max_response_bytes)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            while not closed.is_set():
+                try:
+                    chunks.put(None, timeout=CANCEL_POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    continue
+
+    sender = threading.Thread(target=run, name='rise-stream', daemon=True)
+    sender.start()
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    try:
+        while True:
+            payload = chunks.get()
+            if payload is None:
+                break
+            text = decoder.decode(payload)
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+        if 'error' in outcome:
+            raise outcome['error']
+    finally:
+        cancel_event.set()
+        closed.set()
+        sender.join()
+
 
 def intiate_rise_install() -> None:
     """
     Initiate the RISE installation process.
 
     Sends a download request to begin the RISE installation.
-    Progress is tracked through the callback mechanism.
+    Progress is reported by the callback through progress_events. Called on
+    the progress dispatcher thread when RISE requests a download.
 
     Raises:
         AttributeError: If there's an error accessing the RISE API
     """
-    global nvapi
-
     try:
-        content = NV_REQUEST_RISE_SETTINGS_V1()
-        content.contentType = NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST
-        content.version = ctypes.sizeof(NV_REQUEST_RISE_SETTINGS_V1) | (1 << 16)
-        content.completed = 1
-        
-        ret = nvapi.request_rise(content)
+        content = _build_request(NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_DOWNLOAD_REQUEST)
+
+        ret = load_library().request_rise(content)
         if ret != 0:
             print(f'Send RISE INSTALL failed with {ret}')
             return
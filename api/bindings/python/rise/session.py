@@ -0,0 +1,109 @@
+"""
+Client-side conversation sessions for RISE
+
+send_rise_command() is stateless: every call carries its own prompt and,
+optionally, an adapter system prompt. RiseSession keeps the state of a
+conversation on the client so callers do not have to rebuild it for every
+turn:
+
+- The system prompt is passed through the officialAdapterSystemPrompt
+  field of the first request of the session instead of being pasted into
+  every prompt. Callers whose adapter does not keep it between requests
+  pass resend_system_prompt=True to send it every time.
+- Earlier turns are kept in a bounded window (by number of turns and by
+  characters) and only that window is sent along with a new prompt, so the
+  size of each request stays bounded however long the conversation runs.
+
+Every request must fit in rise.MAX_COMMAND_BYTES (64 KB) once serialized.
+It carries the prompt, up to max_history_chars of history and, when sent,
+the system prompt. Serialization escapes non-ASCII text, to 6 bytes per
+character or 12 per emoji (see rise.command_bytes()), so the default
+1000-character history takes 1 to 12 KB.
+
+Usage:
+    from rise import rise
+    from rise.session import RiseSession
+
+    rise.register_rise_client()
+    session = RiseSession(system_prompt='You are a helpful assistant.', adapter='my-adapter')
+    session.send('What is my GPU?')
+    session.send('And how hot is it?')
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Optional, Tuple
+
+from . import rise
+
+
+class RiseSession:
+    """A conversation with RISE whose history is tracked client-side."""
+
+    def __init__(self, system_prompt: str = '', adapter: str = '', max_turns: int = 4,
+                 max_history_chars: int = 1000, resend_system_prompt: bool = False,
+                 client: Any = rise):
+        """
+        Args:
+            system_prompt: System prompt for the adapter, sent with the first request
+            adapter: Adapter the session's requests are routed to
+            max_turns: Number of earlier turns kept as context; 0 disables history
+            max_history_chars: Character budget for the context sent with each request
+            resend_system_prompt: Send the system prompt with every request, for
+                adapters that do not keep it between requests
+            client: Object whose send_rise_command() sends the requests: the rise
+                module (default) or a rise.broker.BrokerClient
+        """
+        self.system_prompt = system_prompt
+        self.adapter = adapter
+        self.max_history_chars = max_history_chars
+        self.resend_system_prompt = resend_system_prompt
+        self.client = client
+        self.history: Deque[Tuple[str, str]] = deque(maxlen=max_turns)
+        self._system_prompt_sent = False
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Forget the conversation; the next request sends the system prompt again."""
+        with self._lock:
+            self.history.clear()
+            self._system_prompt_sent = False
+
+    def build_prompt(self, prompt: str) -> str:
+        """
+        Prefix a prompt with as much recent history as fits the character budget.
+
+        Older turns are dropped first; a turn is either sent whole or not at all.
+        """
+        context = []
+        budget = self.max_history_chars
+        for user, assistant in reversed(self.history):
+            turn = f'User: {user}\nAssistant: {assistant}\n'
+            if len(turn) > budget:
+                break
+            context.append(turn)
+            budget -= len(turn)
+        if not context:
+            return prompt
+        return 'Conversation so far:\n' + ''.join(reversed(context)) + f'User: {prompt}'
+
+    def send(self, prompt: str, **kwargs: Any) -> Optional[dict]:
+        """
+        Send the next turn of the conversation.
+
+        Args:
+            prompt: The user's message
+            **kwargs: Passed on to send_rise_command (timeout, cancel_event, ...)
+
+        Returns:
+            Optional[dict]: The send_rise_command result, or None if the request failed
+        """
+        with self._lock:
+            send_system_prompt = self.resend_system_prompt or not self._system_prompt_sent
+            result = self.client.send_rise_command(self.build_prompt(prompt), self.adapter,
+                                                   self.system_prompt if send_system_prompt else '', **kwargs)
+            if result is not None:
+                self._system_prompt_sent = True
+                if self.history.maxlen:
+                    self.history.append((prompt, result['completed_response']))
+            return result
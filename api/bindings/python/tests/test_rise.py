@@ -0,0 +1,139 @@
+"""
+Tests of the RISE binding against the fake engine.
+
+Run from api/bindings/python:
+    python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise import fake, rise  # noqa: E402
+
+TEXT = int(rise.NV_RISE_CONTENT_TYPE.NV_RISE_CONTENT_TYPE_TEXT)
+
+
+class AbandonedRequestTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as recording:
+            # The engine starts answering but never completes the response
+            recording.write(json.dumps({'request': {'prompt': 'hang'},
+                                        'events': [{'type': TEXT, 'content': 'partial', 'completed': 0}]}) + '\n')
+        self.addCleanup(os.remove, recording.name)
+        # Once the recording is replayed, prompts are echoed
+        fake.install(recording.name, loop=False)
+        self.assertTrue(rise.register_rise_client(show_progress=False))
+
+    def test_request_after_hung_request_completes(self):
+        with self.assertRaises(rise.RiseTimeoutError):
+            rise.send_rise_command('hang', timeout=0.2)
+        for prompt in ('first', 'second'):
+            result = rise.send_rise_command(prompt, timeout=5)
+            self.assertEqual(result['completed_response'], f'Echo: {prompt}')
+
+
+class StrayChunkTest(unittest.TestCase):
+    def setUp(self):
+        fake.install()
+        self.assertTrue(rise.register_rise_client(show_progress=False))
+
+    def test_chunk_between_requests_is_dropped(self):
+        rise.nvapi._emit([{'type': TEXT, 'content': 'stray', 'completed': 1}])
+        result = rise.send_rise_command('prompt', timeout=5)
+        self.assertEqual(result['completed_response'], 'Echo: prompt')
+        self.assertGreaterEqual(result['timings']['first_chunk'], 0)
+
+
+class CommandSizeTest(unittest.TestCase):
+    # Emoji are escaped to 12 bytes each by json.dumps
+    BODY = '\U0001F389\U0001F37E ' * 3000
+
+    def setUp(self):
+        fake.install()
+        self.assertTrue(rise.register_rise_client(show_progress=False))
+
+    def test_emoji_body_over_the_limit_is_rejected(self):
+        with self.assertRaises(rise.RiseCommandTooLargeError):
+            rise.send_rise_command('Summarize: ' + self.BODY[:8000], timeout=5)
+
+    def test_truncated_emoji_body_fits(self):
+        body = rise.truncate_to_command_bytes(self.BODY, 32 * 1024)
+        self.assertLessEqual(rise.command_bytes(body), 32 * 1024)
+        self.assertGreater(rise.command_bytes(self.BODY[:len(body) + 1]), 32 * 1024)
+        self.assertTrue(self.BODY.startswith(body))
+        result = rise.send_rise_command('Summarize: ' + body, timeout=5)
+        self.assertEqual(result['completed_response'], 'Echo: Summarize: ' + body)
+
+    def test_command_bytes_counts_escapes(self):
+        self.assertEqual(rise.command_bytes('ab"'), 4)
+        self.assertEqual(rise.command_bytes('\u00e9'), 6)
+        self.assertEqual(rise.command_bytes('\U0001F600'), 12)
+        self.assertEqual(rise.truncate_to_command_bytes('\U0001F600' * 3, 30), '\U0001F600' * 2)
+
+
+class MultiByteChunkTest(unittest.TestCase):
+    # Over one content buffer of characters taking 2 to 4 bytes each, shifted
+    # so buffer boundaries fall inside characters
+    TEXT = 'x' + '\u00e9\u20ac\U0001F600' * 1000
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as recording:
+            recording.write(json.dumps({'request': {'prompt': 'utf-8'},
+                                        'events': [{'type': TEXT, 'content': self.TEXT, 'completed': 1}]}) + '\n')
+        self.addCleanup(os.remove, recording.name)
+        fake.install(recording.name)
+        self.assertTrue(rise.register_rise_client(show_progress=False))
+
+    def test_chunks_end_on_character_boundaries(self):
+        pieces = []
+        result = rise.send_rise_command('utf-8', timeout=5, on_chunk=lambda content_type, piece: pieces.append(piece))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual(''.join(piece.decode('utf-8') for piece in pieces), self.TEXT)
+        self.assertEqual(result['completed_response'], self.TEXT)
+
+    def test_split_payload_keeps_characters_whole(self):
+        payload = self.TEXT.encode('utf-8')
+        pieces = rise.split_payload(payload, 1000)
+        self.assertEqual(b''.join(pieces), payload)
+        for piece in pieces:
+            self.assertLessEqual(len(piece), 1000)
+            piece.decode('utf-8')
+
+
+class SpillTest(unittest.TestCase):
+    TEXT = ''.join(f'line {i} \u00e9\n' for i in range(60000))
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as recording:
+            recording.write(json.dumps({'request': {'prompt': 'big'},
+                                        'events': fake.text_events(self.TEXT, chunk_chars=3000)}) + '\n')
+        self.addCleanup(os.remove, recording.name)
+        fake.install(recording.name)
+        self.assertTrue(rise.register_rise_client(show_progress=False))
+
+    def test_spilled_response_is_written_by_the_waiting_thread(self):
+        writers = set()
+        drain = rise.ResponseSpill.drain
+
+        def record_writer(spill):
+            writers.add(threading.current_thread())
+            drain(spill)
+
+        with mock.patch.object(rise.ResponseSpill, 'drain', record_writer):
+            result = rise.send_rise_command('big', timeout=30, spill_to_disk=True)
+        self.addCleanup(os.remove, result['response_file'])
+        with open(result['response_file'], encoding='utf-8') as file:
+            self.assertEqual(file.read(), self.TEXT)
+        self.assertTrue(self.TEXT.startswith(result['completed_response'].rstrip('\ufffd')))
+        self.assertEqual(writers, {threading.current_thread()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 import json
 import logging
 import os
-import requests
-from ctypes import byref, windll, wintypes
 from typing import Optional
+from rise_plugin import (Plugin, configure_logging, generate_failure_response, generate_success_response,
+                         load_manifest)
+
+# The handlers that post to Discord import requests, which is slow to import,
+# when they first run rather than when the plugin starts
+
 # Data Types
 Response = dict[bool, Optional[str]]
 
@@ -18,21 +22,13 @@ CSV_DIRECTORY = os.path.join(os.environ.get("USERPROFILE", "."), 'Videos', 'NVID
 BASE_MP4_DIRECTORY = os.path.join(os.environ.get("USERPROFILE", "."), 'Videos', 'NVIDIA')
 BASE_SCREENSHOT_DIRECTORY = os.path.join(os.environ.get("USERPROFILE", "."), 'Videos', 'NVIDIA')
 
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+configure_logging(LOG_FILE, level=logging.INFO)
 
 BOT_TOKEN = None
 CHANNEL_ID = None
 GAME_DIRECTORY = None
 
 def main():
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'messages'
-    SYSTEM_INFO_PROPERTY = 'system_info'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
     commands = {
         'initialize': execute_initialize_command,
         'shutdown': execute_shutdown_command,
@@ -42,115 +38,10 @@ def main():
         'send_latest_screenshot_to_discord_channel': send_latest_screenshot_to_discord_channel,
     }
 
-    cmd = ''
-    logging.info('Plugin started')
-
-    while cmd != SHUTDOWN_COMMAND:
-        response = None
-        input = read_command()
-        if input is None:
-            logging.error('Error reading command')
-            continue
-
-        logging.info(f'Received input: {input}')
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logging.info(f'Processing command: {cmd}')
-                    if cmd in commands:
-                        if cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND:
-                            response = commands[cmd]()
-                        else:
-                            execute_initialize_command()
-                            params = tool_call.get(PARAMS_PROPERTY, {})
-                            context = tool_call.get(CONTEXT_PROPERTY, {})
-                            system_info = tool_call.get(SYSTEM_INFO_PROPERTY, {})
-                            logging.info(f'Executing command: {cmd} with params: {params}, context: {context}, system_info: {system_info}')
-                            response = commands[cmd](params, context, system_info)
-                    else:
-                        logging.warning(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'Unknown command: {cmd}')
-                else:
-                    logging.warning('Malformed input: missing function property')
-                    response = generate_failure_response('Malformed input.')
-        else:
-            logging.warning('Malformed input: missing tool_calls property')
-            response = generate_failure_response('Malformed input.')
-
-        logging.info(f'Sending response: {response}')
-        write_response(response)
-
-        if cmd == SHUTDOWN_COMMAND:
-            logging.info('Shutdown command received, terminating plugin')
-            break
-
-    logging.info('G-Assist Plugin stopped.')
-    return 0
-
-
-def read_command() -> dict | None:
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(pipe, buffer, BUFFER_SIZE, byref(message_bytes), None)
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error('Failed to decode JSON input')
-        return None
-    except Exception as e:
-        logging.error(f'Unexpected error in read_command: {str(e)}')
-        return None
-
-
-def write_response(response: Response) -> None:
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(pipe, message_bytes, message_len, byref(bytes_written), None)
-    except Exception as e:
-        logging.error(f'Failed to write response: {str(e)}')
-        pass
-
-
-def generate_failure_response(message: str = None) -> Response:
-    response = { 'success': False }
-    if message:
-        response['message'] = message
-    return response
-
-
-def generate_success_response(message: str = None) -> Response:
-    response = { 'success': True }
-    if message:
-        response['message'] = message
-    return response
+    # Reload the config after a failure, in case it has been fixed. The
+    # manifest's validators reject calls without the parameters they need.
+    plugin = Plugin(commands, error_message='', reinitialize_on_failure=True, manifest=load_manifest())
+    return plugin.run()
 
 
 def execute_initialize_command() -> dict:
@@ -188,6 +79,7 @@ def send_message_to_discord_channel(params: dict = None, context: dict = None, s
     try:
         global CHANNEL_ID
         global BOT_TOKEN
+        import requests
 
         logging.info(f'Sending message to Discord channel: {CHANNEL_ID}')
         
@@ -223,6 +115,8 @@ def find_latest_file(directory: str, extension: str) -> Optional[str]:
 
 def send_latest_chart_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
+        import requests
+
         caption = params.get('caption', '')
         file_path = find_latest_file(CSV_DIRECTORY, '.csv')
 
@@ -248,7 +142,9 @@ def send_latest_chart_to_discord_channel(params: dict = None, context: dict = No
 
 def send_latest_shadowplay_clip_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
-        caption = params.get('caption', '') if params else ''
+        import requests
+
+        caption = params.get('caption', '')
         mp4_directory = os.path.join(BASE_MP4_DIRECTORY, GAME_DIRECTORY)
         file_path = find_latest_file(mp4_directory, '.mp4')
 
@@ -273,7 +169,9 @@ def send_latest_shadowplay_clip_to_discord_channel(params: dict = None, context:
 
 def send_latest_screenshot_to_discord_channel(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     try:
-        caption = params.get('caption', '') if params else ''
+        import requests
+
+        caption = params.get('caption', '')
         screenshot_directory = os.path.join(BASE_SCREENSHOT_DIRECTORY, GAME_DIRECTORY)
         file_path = find_latest_file(screenshot_directory, '.png')
 
@@ -15,18 +15,16 @@
 
 ''' Google Gemini G-Assist plugin. '''
 import copy
-import ctypes
 import json
 import logging
 import os
 
-from ctypes import byref, windll, wintypes, GetLastError, create_string_buffer
 import re
 import traceback
 from typing import Optional
 
-from google import genai
-from google.genai.types import (ModelContent, Part, UserContent, GoogleSearch, Tool, GenerateContentConfig)
+from rise_plugin import (Plugin, abbreviate, configure_logging, generate_failure_response, generate_message_response,
+                         generate_success_response, open_transport, unescape_printable)
 
 # Data Types
 Response = dict[str, bool | Optional[str]]
@@ -36,80 +34,38 @@ API_KEY_FILE = os.path.join(f'{os.environ.get("PROGRAMDATA", ".")}{r'\NVIDIA Cor
 CONFIG_FILE = os.path.join(f'{os.environ.get("PROGRAMDATA", ".")}{r'\NVIDIA Corporation\nvtopps\rise\plugins\google'}', 'config.json')
 
 LOG_FILE = os.path.join(os.environ.get("USERPROFILE", "."), 'gemini.log')
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+configure_logging(LOG_FILE, level=logging.INFO)
 
 API_KEY = None
+# Created by get_client() on the first query
 client = None
 model: str = 'gemini-pro'  # Default model
 
+# Streaming handlers send partial responses through the plugin while they run.
+# Queries run one at a time so their streamed messages do not interleave.
+plugin = Plugin(transport=open_transport(input_filter=unescape_printable),
+                error_message='Could not process request.', max_workers=1)
+
 def main():
     ''' Main entry point.
     
-    Sits in a loop listening to a pipe, waiting for commands to be issued. After
-    receiving the command, it is processed and the result returned. The loop
-    continues until the "shutdown" command is issued.
+    Registers the command handlers and runs the plugin's command loop, which
+    processes commands from the pipe until the "shutdown" command is issued.
 
     Returns:
         0 if no errors occurred during execution; non-zero if an error occurred
     '''
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'messages'
-    SYSTEM_INFO_PROPERTY = 'system_info'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'properties'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
-    ERROR_MESSAGE = 'Could not process request.'
-
     # Generate command handler mapping
-    commands = {
+    plugin.register_commands({
         "initialize": execute_initialize_command,
         "shutdown": execute_shutdown_command,
         "query_gemini": execute_query_gemini_command,
-    }
-    cmd = ''
+    })
 
     logging.info('Google Gemini plugin started.')
-    while True:
-        response = None
-        input = read_command()
-        if input is None:
-            logging.error('Error reading command')
-            continue
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    if cmd in commands:
-                        if(cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND):
-                            response = commands[cmd]()
-                        else:
-                            response = commands[cmd](
-                                input[PARAMS_PROPERTY] if PARAMS_PROPERTY in input else None,
-                                input[CONTEXT_PROPERTY] if CONTEXT_PROPERTY in input else None,
-                                input[SYSTEM_INFO_PROPERTY] if SYSTEM_INFO_PROPERTY in input else None
-                            )
-                    else:
-                        logging.warning(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    logging.warning('Malformed input.')
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            logging.warning('Malformed input.')
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        logging.info(f'Response: {response}')
-        write_response(response)
-
-        if cmd == SHUTDOWN_COMMAND:
-            break
-
+    result = plugin.run()
     logging.info('Google Gemini plugin stopped.')
-    return 0
+    return result
 
 def remove_unicode(s: str) -> str:
     '''Remove non-ASCII characters from a string.
@@ -130,136 +86,32 @@ def remove_unicode(s: str) -> str:
     ascii_only = ''.join(c for c in s_decoded if ord(c) < 128)
     return ascii_only
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-    
-    Reads data in chunks until the full message is received, then processes it as JSON.
-    Handles Unicode escapes and ensures the text is printable.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        logging.info(f'Raw Input: {retval}')
-        clean_text = retval.encode('utf-8').decode('raw_unicode_escape')
-        clean_text = ''.join(ch for ch in clean_text if ch.isprintable() or ch in ['\n', '\t', '\r'])
-        return json.loads(clean_text)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {clean_text}')
-        logging.exception("JSON decoding failed:")
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
+def get_client():
+    ''' Returns the Gemini client, creating it on first use.
 
-
-def write_response(response: Response) -> None:
-    ''' Writes a response to the communication pipe.
-    
-    Converts the response to JSON and sends it through the pipe with an end marker.
-
-    Args:
-        response: Dictionary containing return value(s)
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-    except Exception:
-        logging.error('Unknown exception caught.')
-        pass
-
-
-def generate_failure_response(message: str = None) -> Response:
-    ''' Generates a response indicating failure.
-
-    Args:
-        message: String to be returned in the response (optional)
-
-    Returns:
-        A failure response with the attached message
-    '''
-    response = { 'success': False }
-    if message:
-        response['message'] = message
-    return response
-
-
-def generate_success_response(message: str = None) -> Response:
-    ''' Generates a response indicating success.
-
-    Args:
-        message: String to be returned in the response (optional)
+    The Google Gen AI SDK takes long to import, so it is imported by the first
+    query rather than when the plugin starts or is initialized.
 
     Returns:
-        A success response with the attached message
+        The google.genai client
     '''
-    response = { 'success': True }
-    if message:
-        response['message'] = message
-    return response
-
-
-def generate_message_response(message:str):
-    ''' Generates a message response.
-
-    Args:
-        message: String to be returned to the driver
+    global client
 
-    Returns:
-        A message response dictionary
-    '''
-    return { 'message': message }
+    if client is None:
+        from google import genai
 
+        client = genai.Client(api_key=API_KEY)
+        logging.info('Successfully configured Gemini API')
+    return client
 
 def execute_initialize_command() -> dict:
     ''' Initialize the Gemini API connection.
     
-    Reads the API key from file and configures the Gemini client.
+    Reads the API key from file. The Gemini client is created by the first
+    query (see get_client()).
     
     Returns:
-        Success or failure response
+        Success response
     '''
     global API_KEY, API_KEY_FILE, client
 
@@ -272,15 +124,9 @@ def execute_initialize_command() -> dict:
         logging.error('No API key found')
         return generate_success_response() # this allows us to print the error ##bug to be fixed in driver
 
-    try:
-        client = genai.Client(api_key=key)
-        logging.info('Successfully configured Gemini API')
-        API_KEY = key
-        return generate_success_response()
-    except Exception as e:
-        logging.error(f'Configuration failed: {str(e)}')
-        API_KEY = None
-        return generate_failure_response(str(e))
+    API_KEY = key
+    client = None
+    return generate_success_response()
 
 def execute_shutdown_command() -> dict:
     ''' Cleanup resources.
@@ -318,6 +164,8 @@ def convert_openai_history_to_google_gemini(openai_history):
     Returns:
         List of UserContent or ModelContent objects
     """
+    from google.genai.types import ModelContent, Part, UserContent
+
     google_history = []
     for message in openai_history:
         role = message.get("role")
@@ -338,6 +186,8 @@ def extract_parts(history):
     Returns:
         List of Part objects containing text
     """
+    from google.genai.types import Part
+
     parts = []
     for message in history:
         for part in message.parts:
@@ -367,7 +217,7 @@ def execute_query_gemini_command(params: dict = None, context: dict = None, syst
             f"{API_KEY_FILE} with a valid key and restart G-Assist.\n\n" +
             "To obtain an API, visit https://ai.google.dev."
         )
-        write_response(generate_message_response(ERROR_MESSAGE))
+        plugin.send(generate_message_response(ERROR_MESSAGE))
         return generate_success_response() #print nothing, the initialize will have done so ## bug to be fixed in driver
 
     # Load model config
@@ -397,16 +247,16 @@ def execute_query_gemini_command(params: dict = None, context: dict = None, syst
       
         # Convert OpenAI-style context to Google Gemini format
         gemini_history = convert_openai_history_to_google_gemini(context[:-1])
-        logging.info(f"GEMINI_HANDLER: Converted to Gemini format: {gemini_history}")
+        logging.info("GEMINI_HANDLER: Converted to Gemini format: %s", abbreviate(gemini_history))
 
         # Initialize model and chat session
         if len(gemini_history):
             logging.info("GEMINI_HANDLER: Multi-turn conversation detected")
-            chat = client.chats.create(model=model, history=gemini_history)
+            chat = get_client().chats.create(model=model, history=gemini_history)
             logging.info("GEMINI_HANDLER: Created chat with history")
         else:
             logging.info("GEMINI_HANDLER: First-turn conversation detected")
-            chat = client.chats.create(model=model)
+            chat = get_client().chats.create(model=model)
             logging.info("GEMINI_HANDLER: Created new chat")
 
         # Send the message to get classifier response
@@ -425,9 +275,11 @@ def execute_query_gemini_command(params: dict = None, context: dict = None, syst
                 try:
                     # Search path: Use Google Search Tool for search queries
                     logging.info("GEMINI_HANDLER: Initializing Google Search Tool")
+                    from google.genai.types import GenerateContentConfig, GoogleSearch, Tool
+
                     gemini_history = convert_openai_history_to_google_gemini(context)
                     parts = extract_parts(gemini_history)
-                    response = client.models.generate_content_stream(
+                    response = get_client().models.generate_content_stream(
                         model=model,
                         contents=parts,
                         config=GenerateContentConfig(
@@ -439,13 +291,13 @@ def execute_query_gemini_command(params: dict = None, context: dict = None, syst
                     for chunk in response:
                         if chunk.text:
                             logging.info(f'GEMINI_HANDLER: Search response chunk: {chunk.text[:30]}...')
-                            write_response(generate_message_response(chunk.text))
+                            plugin.send(generate_message_response(chunk.text))
                     logging.info("GEMINI_HANDLER: Search response completed successfully")
                     return generate_success_response()
                 except Exception as search_error:
                     # If search fails, fall back to LLM
                     logging.error(f'GEMINI_HANDLER: Search failed, falling back to LLM: {str(search_error)}')
-                    write_response(generate_message_response("Unable to ground search the query, falling back to LLM.\n"))
+                    plugin.send(generate_message_response("Unable to ground search the query, falling back to LLM.\n"))
                     return execute_llm_query(gemini_history, incoming_context, system_info)
         except json.JSONDecodeError:
             # Handle JSON parsing errors from classifier response
@@ -476,14 +328,14 @@ def execute_llm_query(gemini_history, incoming_context, system_info):
     aug_prompt = f"You are a helpful AI assistant that can help with a wide range of topics. You are a plugin within the Nvidia G-Assist ecosystem of plugins. Keep your responses concise and within 100 words if possible. If a user is inquiring about games and Nvidia GPUs, keep in mind the list of games installed on the user PC including the current playing game as: {system_info}. {incoming_context[-1]['content']}"
     logging.info("GEMINI_HANDLER: Reset context with system information")
     
-    chat = client.chats.create(model=model, history=gemini_history)
+    chat = get_client().chats.create(model=model, history=gemini_history)
     logging.info("GEMINI_HANDLER: Created new chat with updated history")
     
     response = chat.send_message_stream(aug_prompt)
     for chunk in response:
         if chunk.text:
             logging.info(f'GEMINI_HANDLER: Response chunk: {chunk.text[:30]}...')
-            write_response(generate_message_response(chunk.text))
+            plugin.send(generate_message_response(chunk.text))
     logging.info("GEMINI_HANDLER: LLM response completed successfully")
     return generate_success_response()
 
@@ -0,0 +1,187 @@
+"""
+Micro-benchmark and fuzz run for the Gmail backend's response parsers.
+
+Parses a corpus of model outputs (benchmarks/model_outputs.jsonl, optionally
+extended with recordings made by rise.fake.RiseRecorder) with
+response_parser and with the split/regex parsers it replaced, and reports
+the time per parse and the failure rate of each output kind.
+
+--fuzz N mutates corpus entries N times (inserted, deleted and replaced
+characters, truncation, case changes) and checks that the parsers never
+raise and always return values of the documented types. It does not check that
+the parses are right; tests/test_response_parser.py does.
+
+Usage:
+    python benchmarks/parser_benchmark.py [--corpus FILE] [--recording FILE ...]
+        [--repeat N] [--fuzz N] [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import response_parser  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_outputs.jsonl')
+
+
+def legacy_parse_calendar_event(response_text):
+    """The parse_calendar_event the backend used before response_parser, without its logging."""
+    event_data = {"event": None, "datetime": None}
+    if response_text.startswith("Event:"):
+        if ' | ' in response_text:
+            parts = response_text.split(' | ')
+        else:
+            parts = re.split(r'(?=\b[A-Z][a-z]*:)', response_text.strip())
+            parts = [part.strip() for part in parts if part.strip()]
+        event_name = date_str = time_str = None
+        for part in parts:
+            if ': ' in part:
+                key, value = part.split(': ', 1)
+                key = key.strip().lower()
+                value = value.strip()
+                if key == 'event':
+                    event_name = value
+                elif key == 'date':
+                    date_str = value
+                elif key == 'time':
+                    time_str = value
+        if event_name:
+            event_data['event'] = event_name
+        if date_str:
+            try:
+                if time_str:
+                    event_data['datetime'] = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+                else:
+                    event_data['datetime'] = datetime.strptime(date_str, "%Y-%m-%d")
+            except ValueError:
+                event_data['datetime'] = datetime.now()
+    return event_data
+
+
+def legacy_parse_labels(response_text):
+    """The parse_labels the backend used before response_parser, without its logging."""
+    if not response_text or not isinstance(response_text, str):
+        return []
+    labels = [label.strip().lower() for label in response_text.split(',')]
+    labels = [label for label in labels if label]
+    for label in labels:
+        if len(label) > 30:
+            return []
+    return labels
+
+
+def load_corpus(path, recordings):
+    """Read corpus entries, plus the responses stored in RiseRecorder recordings."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for recording in recordings:
+        with open(recording, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                exchange = json.loads(line)
+                prompt = exchange['request'].get('prompt', '')
+                output = ''.join(event['content'] for event in exchange['events'] if event['type'] == 1)
+                if 'three sections' in prompt:
+                    kind = 'combined'
+                elif 'calendar' in prompt:
+                    kind = 'event'
+                elif 'labels' in prompt:
+                    kind = 'labels'
+                else:
+                    continue
+                entries.append({'kind': kind, 'output': output})
+    return entries
+
+
+PARSERS = {
+    'event': (response_parser.parse_events, legacy_parse_calendar_event),
+    'labels': (response_parser.parse_labels, legacy_parse_labels),
+    'combined': (response_parser.parse_combined, None),
+}
+
+
+def benchmark(entries, repeat):
+    for kind, (parse, legacy) in PARSERS.items():
+        outputs = [entry['output'] for entry in entries if entry['kind'] == kind]
+        if not outputs:
+            continue
+        for name, function in (('response_parser', parse), ('legacy', legacy)):
+            if function is None:
+                continue
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for output in outputs:
+                    function(output)
+            elapsed = time.perf_counter() - start
+            print(f'{kind:<9} {name:<16} {elapsed / (repeat * len(outputs)) * 1e6:8.2f} us/parse')
+
+    response_parser.stats.reset()
+    for entry in entries:
+        PARSERS[entry['kind']][0](entry['output'])
+    print()
+    for kind, counts in response_parser.stats.snapshot().items():
+        print(f'{kind:<9} {counts["failures"]}/{counts["attempts"]} failed ({counts["failure_rate"]:.0%})')
+
+
+def mutate(text, rng):
+    """Apply a few random edits to a model output."""
+    alphabet = 'abcXYZ019:|,;-*\n .é–'
+    for _ in range(rng.randint(1, 4)):
+        operation = rng.randrange(5)
+        position = rng.randint(0, len(text))
+        if operation == 0:
+            text = text[:position] + rng.choice(alphabet) + text[position:]
+        elif operation == 1:
+            text = text[:position] + text[position + 1:]
+        elif operation == 2:
+            text = text[:position] + rng.choice(alphabet) + text[position + 1:]
+        elif operation == 3:
+            text = text[:position]
+        else:
+            text = text.upper() if rng.random() < 0.5 else text.lower()
+    return text
+
+
+def fuzz(entries, runs, seed):
+    rng = random.Random(seed)
+    for _ in range(runs):
+        text = mutate(rng.choice(entries)['output'], rng)
+        events = response_parser.parse_events(text, record=False)
+        assert all(isinstance(event.name, str) and event.name and event.date is not None for event in events), text
+        labels = response_parser.parse_labels(text, record=False)
+        assert all(isinstance(label, str) and 0 < len(label) <= response_parser.MAX_LABEL_LENGTH
+                   for label in labels), text
+        combined = response_parser.parse_combined(text)
+        assert combined.labels is None or combined.labels, text
+        response_parser.event_result(combined.events or [])
+    print(f'fuzz      {runs} mutated outputs parsed without errors')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='JSON Lines corpus of model outputs')
+    parser.add_argument('--recording', action='append', default=[], help='rise.fake recording to add to the corpus')
+    parser.add_argument('--repeat', type=int, default=2000, help='passes over the corpus per parser')
+    parser.add_argument('--fuzz', type=int, default=0, help='number of mutated outputs to parse')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the fuzz run')
+    args = parser.parse_args()
+
+    entries = load_corpus(args.corpus, args.recording)
+    print(f'corpus    {len(entries)} outputs\n')
+    benchmark(entries, args.repeat)
+    if args.fuzz:
+        print()
+        fuzz(entries, args.fuzz, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,12 @@
+import functools
+import json
 import os
+import threading
 import sys
 import shutil
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from rise import rise
+from rise import broker, rise, metrics as rise_metrics
 import re
 import unicodedata
 from google.oauth2.credentials import Credentials
@@ -12,20 +15,85 @@ from googleapiclient.discovery import build
 import shutil
 import base64
 import html
+import response_parser
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 # Create a Flask server to handle API requests from the Electron app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
+# Email bodies are truncated to this many characters before prompting, to keep
+# the prompt within the model's context
+MAX_EMAIL_BODY_CHARS = 8000
+# and to this many bytes once escaped in the JSON command. json.dumps escapes
+# every non-ASCII character, an emoji to 12 bytes, so only a byte budget keeps
+# the command under rise.MAX_COMMAND_BYTES, with room left for the prompts.
+MAX_EMAIL_BODY_BYTES = 32 * 1024
+# Email bodies and model responses are logged up to this many characters
+LOG_PREVIEW_CHARS = 200
 
-# Initialize RISE client
-try:
-    rise.register_rise_client()
-    print("RISE client initialization commented out")
-except Exception as e:
-    print(f"Error initializing RISE client: {str(e)}")
-    sys.exit(1)
+# Optional prompt sent once RISE is ready so the model is loaded before the first request
+RISE_WARMUP_PROMPT = os.environ.get('RISE_WARMUP_PROMPT', '')
+
+# Ask for the event, summary and labels of an email in one inference and cache each of them.
+# Set GMAIL_COMBINED_ANALYSIS=0 to prompt for every analysis separately.
+COMBINED_ANALYSIS = os.environ.get('GMAIL_COMBINED_ANALYSIS', '1') != '0'
+# Number of emails whose analysis results are kept
+ANALYSIS_CACHE_EMAILS = 512
+COMBINED_ANALYSIS_PROMPT = "Hey G-assist. Forget you are a hardware assistant. Instead, you are an assistant that analyzes emails. Answer with these three sections and nothing else. Labels: 1 to 3 short, lowercase labels separated by commas that describe the main topic or intent of the email, for example laboratory, meetings, billing, travel, job, promotion, support, social, subscription. Summary: one or two sentences on what the email is about. Event: if the email mentions a specific date and/or time for a meeting, event, or appointment, [Name] | Date: [YYYY-MM-DD] | Time: [HH:MM] (Use 24-hour time format. If the time is not mentioned but the date is, omit the time field.), with one Event line per event, otherwise NO. Hey G-assist, the email is the following: "
+
+# Set GMAIL_JSON_OUTPUT=1 to ask for JSON answers, described in the adapter system prompt,
+# and validate them instead of using the free-text prompts and parsers. The schema only
+# reaches the model through an adapter, so this also needs GMAIL_ADAPTER.
+JSON_OUTPUT = os.environ.get('GMAIL_JSON_OUTPUT', '0') == '1'
+# Adapter the JSON analyses are routed to
+GMAIL_ADAPTER = os.environ.get('GMAIL_ADAPTER', '')
+if JSON_OUTPUT and not GMAIL_ADAPTER:
+    print('GMAIL_JSON_OUTPUT needs GMAIL_ADAPTER to describe the JSON schema; using the free-text prompts')
+    JSON_OUTPUT = False
+# Repair prompts sent for facets whose JSON answer was invalid
+MAX_REPAIR_ATTEMPTS = 1
+# JSON schema of each analysis facet, as described to the model
+JSON_FACET_SCHEMAS = {
+    'labels': '"labels": a list of 1 to 3 short, lowercase labels for the main topic or intent of the email, for example ["billing", "travel"]',
+    'summary': '"summary": one or two sentences on what the email is about',
+    'event': '"events": a list with one object per meeting, event, or appointment that has a specific date, each {"name": string, "date": "YYYY-MM-DD", "time": "HH:MM" in 24-hour format or null if no time is given}, or [] if there is none',
+}
+
+# Shared RISE broker named by RISE_BROKER_ADDRESS, or the in-process binding
+rise_client = broker.client_from_env() or rise
+
+def log_preview(text):
+    """Shorten text for the log so long emails and responses do not flood it"""
+    if len(text) <= LOG_PREVIEW_CHARS:
+        return text
+    return f'{text[:LOG_PREVIEW_CHARS]}... ({len(text)} characters)'
+
+def requires_rise(view):
+    """Reply with 503 until the RISE client has finished registering"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not rise_client.is_ready():
+            return jsonify({'error': 'RISE is not ready yet', 'startup': rise_client.get_startup_status()}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Liveness probe: the server is up, whether or not RISE is ready"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: RISE is registered and the warm-up prompt has run"""
+    status = rise_client.get_startup_status()
+    return jsonify(status), 200 if status['state'] == 'ready' else 503
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint for the RISE binding's request metrics"""
+    return Response(rise_metrics.registry.render_prometheus(), content_type=rise_metrics.PROMETHEUS_CONTENT_TYPE)
 
 def clean_single_line(text):
     # Replace literal \r\n with newline if present
@@ -73,85 +141,6 @@ def remove_urls(text):
     
     return text
 
-def parse_calendar_event(response_text):
-    """Parse the calendar event response into a structured format"""    
-    # Create the result dictionary
-    event_data = { "event": None, "datetime": None }
-    
-    if response_text.startswith("Event:"):
-        # Check if the format uses pipe separators or space separators
-        if ' | ' in response_text:
-            # Format: "Event: Name | Date: YYYY-MM-DD | Time: HH:MM"
-            parts = response_text.split(' | ')
-        else:
-            # Format: "Event: Name Date: YYYY-MM-DD Time: HH:MM"
-            # Use regex to split on pattern "Word:"
-            parts = re.split(r'(?=\b[A-Z][a-z]*:)', response_text.strip())
-            parts = [part.strip() for part in parts if part.strip()]
-        
-        event_name = None
-        date_str = None
-        time_str = None
-        
-        # Parse each part
-        for part in parts:
-            if ': ' in part:
-                key, value = part.split(': ', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                if key == 'event':
-                    event_name = value
-                elif key == 'date':
-                    date_str = value
-                elif key == 'time':
-                    time_str = value
-        
-        if event_name:
-            event_data['event'] = event_name
-        
-        # Combine date and time into datetime object
-        if date_str:
-            try:
-                if time_str:
-                    # Combine date and time
-                    datetime_str = f"{date_str} {time_str}"
-                    print(f"Combined datetime string: {datetime_str}")
-                    event_data['datetime'] = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
-                else:
-                    # Date only, set time to 00:00
-                    print(f"Date string: {date_str}")
-                    event_data['datetime'] = datetime.strptime(date_str, "%Y-%m-%d")
-            except ValueError as e:
-                print(f"Error parsing datetime: {e}")
-                # Fallback: store as strings if parsing fails
-                today = datetime.now()
-                event_data['datetime'] = today
-        
-    return event_data
-
-def parse_labels(response_text):
-    """Parse comma-separated labels into an array"""
-    try:
-        if not response_text or not isinstance(response_text, str):
-            return []
-        # Split by comma and clean up each label
-        labels = [label.strip().lower() for label in response_text.split(',')]
-        # Filter out empty labels
-        labels = [label for label in labels if label]
-        
-        # Check if any label is too large (more than 50 characters) and return empty list
-        max_label_length = 30
-        for label in labels:
-            if len(label) > max_label_length:
-                print(f"Label too large: '{label}' ({len(label)} characters), returning empty list")
-                return []
-        
-        return labels
-    except Exception as e:
-        print(f"Error parsing labels: {e}")
-        return []
-
 @app.route('/api/get-emails', methods=['GET'])
 def get_emails():
     try:
@@ -200,6 +189,7 @@ def get_emails():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/send-message', methods=['POST'])
+@requires_rise
 def send_message():
     """API endpoint to send messages to RISE"""
     data = request.json
@@ -210,8 +200,8 @@ def send_message():
     
     try:
         # Send message to RISE
-        print(f'message: {message}')
-        response = rise.send_rise_command(message)
+        print(f'message: {log_preview(message)}')
+        response = rise_client.send_rise_command(message)
         if "_gmail>_" in response['completed_response']:
           response = clean_single_line(response['completed_response'].replace("_gmail>_", "")) + " " + filter_date
           type = 'message'
@@ -223,10 +213,256 @@ def send_message():
               type = 'generate_labels'
 
         return jsonify({'response': response, 'type': type})
+    except rise.RiseTimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except rise.RiseResponseTooLargeError as e:
+        return jsonify({'error': str(e)}), 502
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_gmail_service():
+    """Authorize with Gmail, running the OAuth flow on first use, and build the API client"""
+    creds = None
+    if os.path.exists('token.json'):
+        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+    else:
+        flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
+        creds = flow.run_local_server(port=0)
+        with open('token.json', 'w') as token:
+            token.write(creds.to_json())
+    return build('gmail', 'v1', credentials=creds)
+
+def fetch_email_body(email_id):
+    """Fetch the plain-text body of an email, cleaned and truncated for prompting"""
+    service = get_gmail_service()
+    msg = service.users().messages().get(userId='me', id=email_id).execute()
+    parts = msg['payload'].get('parts', [])
+    body = ''
+    for part in parts:
+        if part['mimeType'] == 'text/plain':
+            data = part['body']['data']
+            decoded_bytes = base64.urlsafe_b64decode(data)
+            body = decoded_bytes.decode('utf-8')
+            break
+    body = remove_urls(html.unescape(clean_single_line(body)))[:MAX_EMAIL_BODY_CHARS]
+    body = rise.truncate_to_command_bytes(body, MAX_EMAIL_BODY_BYTES)
+    print(f"Body: {log_preview(body)}")
+    return body
+
+def prompt_rise(prompt, system_prompt='', adapter='', body=''):
+    """
+    Send a prompt followed by an email body to RISE and return the completed text.
+
+    If the command is still too large, e.g. with a long system prompt, the
+    body is cut to half its size and the prompt sent again.
+    """
+    while True:
+        try:
+            response = rise_client.send_rise_command(prompt + body, adapter, system_prompt)
+            break
+        except rise.RiseCommandTooLargeError:
+            if not body:
+                raise
+            body = rise.truncate_to_command_bytes(body, rise.command_bytes(body) // 2)
+            print(f'Command too large, retrying with the email body cut to {len(body)} characters')
+    if response is None:
+        raise RuntimeError('RISE request failed')
+    print(f'response["completed_response"]: {log_preview(response["completed_response"])}')
+    return response['completed_response']
+
+class AnalysisCache:
+    """Per-email cache of analysis results, one entry per facet, evicting the oldest emails first"""
+
+    def __init__(self, max_emails):
+        self.max_emails = max_emails
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, email_id, facet):
+        with self.lock:
+            facets = self.entries.get(email_id)
+            if facets is None or facet not in facets:
+                return None
+            self.entries.move_to_end(email_id)
+            return facets[facet]
+
+    def put(self, email_id, facet, value):
+        with self.lock:
+            self.entries.setdefault(email_id, {})[facet] = value
+            self.entries.move_to_end(email_id)
+            while len(self.entries) > self.max_emails:
+                self.entries.popitem(last=False)
+
+analysis_cache = AnalysisCache(ANALYSIS_CACHE_EMAILS)
+
+def parse_combined_analysis(response_text):
+    """
+    Split a combined analysis response into facet results.
+
+    Each facet is returned in the shape of its single-analysis endpoint;
+    facets that are missing or unusable are left out so they can be asked
+    for on their own.
+    """
+    analysis = response_parser.parse_combined(response_text)
+    facets = {}
+    if analysis.labels:
+        facets['labels'] = {'labels': analysis.labels}
+    if analysis.summary is not None:
+        facets['summary'] = {'response': analysis.summary}
+    if analysis.events is not None:
+        facets['event'] = response_parser.event_result(analysis.events)
+    return facets
+
+# Single-analysis prompts and parsers, used when combined analysis is off or misses a facet
+FACET_PROMPTS = {
+    'event': ("Hey G-assist. Forget you are a hardware assistant. Instead, you are an assistant that analyzes email content to determine whether it contains an appointment or event the user should add to their calendar. Your task is to extract the relevant information only if a specific date and/or time is mentioned for a meeting, event, or appointment. For each calendar-worthy event in the email, respond with one line in the following format: Event: [Name] | Date: [YYYY-MM-DD] | Time: [HH:MM] (Use 24-hour time format. If the time is not mentioned but the date is, omit the time field.) If no date or event is found, respond with: NO. Be concise. Do not include any other commentary or information."
+              "Hey G-assist, the email is the following: ",
+              lambda response: response_parser.event_result(response_parser.parse_events(response))),
+    'summary': ("Hey G-assist, what is this message about: ",
+                lambda response: {'response': response}),
+    'labels': ("Hey G-assist, assign 1 to 3 short, relevant labels that describe the main topic or intent of the text below. Labels should be lowercase, concise, and separated by commas. Examples include: laboratory, meetings, billing, travel, job, promotion, support, social, subscription. Be concise. Do not include any other commentary or information."
+               "Hey G-assist, the text is the following: ",
+               lambda response: {'labels': response_parser.parse_labels(response)}),
+}
+
+def json_system_prompt(facets):
+    """System prompt asking for a JSON object with the keys of the given facets"""
+    fields = '; '.join(JSON_FACET_SCHEMAS[facet] for facet in ('labels', 'summary', 'event') if facet in facets)
+    return ("You are an assistant that analyzes emails. Answer with a single JSON object and nothing else, "
+            f"with exactly these keys: {fields}.")
+
+def json_repair_prompt(problems):
+    """Prompt, followed by the email, asking the model to correct the invalid parts of its previous answer"""
+    return ("Your previous answer for the email below was invalid: " + ' '.join(problems) +
+            " Answer again with corrected JSON for these keys only. The email is the following: ")
+
+def analyze_email_json(email_id, facets, body):
+    """
+    Analyze an email with JSON answers and cache every facet that validated.
+
+    The schema goes out through the adapter system prompt and the email as
+    the prompt. Facets whose answer is invalid are asked for again with a
+    repair prompt naming the problems, up to MAX_REPAIR_ATTEMPTS times;
+    valid facets and valid events are kept and not asked for again. How
+    often the first answer needed a repair is counted under 'json_first_try'
+    in the parse stats, and how often a repair worked under 'json_repair'.
+
+    Returns:
+        dict: Result per facet, in the shape of its single-analysis endpoint
+    """
+    pending = list(facets)
+    labels, summary, events = [], '', []
+    prompt = "The email is the following: "
+    for attempt in range(1 + MAX_REPAIR_ATTEMPTS):
+        problems = []
+        try:
+            output = response_parser.extract_json(prompt_rise(prompt, json_system_prompt(pending), GMAIL_ADAPTER, body))
+        except response_parser.OutputError as e:
+            output, problems = {}, [str(e)]
+
+        still_pending = []
+        for facet in pending:
+            try:
+                if facet == 'event':
+                    valid, invalid = response_parser.validate_events(output)
+                    events.extend(event for event in valid if event not in events)
+                    if invalid:
+                        still_pending.append(facet)
+                        problems.append('These events were invalid: ' + '; '.join(
+                            f'{json.dumps(item)} ({reason})' for item, reason in invalid) +
+                            '. List only the corrected versions of these events.')
+                elif facet == 'labels':
+                    labels = response_parser.validate_facet(facet, output)
+                else:
+                    summary = response_parser.validate_facet(facet, output)
+            except response_parser.OutputError as e:
+                still_pending.append(facet)
+                if output:
+                    problems.append(str(e))
+
+        response_parser.stats.record('json_repair' if attempt else 'json_first_try', not still_pending)
+        for facet in pending:
+            if facet not in still_pending:
+                analysis_cache.put(email_id, facet, json_facet_result(facet, labels, summary, events))
+        pending = still_pending
+        if not pending:
+            break
+        print(f'Invalid JSON analysis of {email_id}: {" ".join(problems)}')
+        prompt = json_repair_prompt(problems)
+
+    # Facets that stayed invalid get what validated, without being cached
+    return {facet: json_facet_result(facet, labels, summary, events) for facet in facets}
+
+def json_facet_result(facet, labels, summary, events):
+    """Shape a validated JSON facet like its single-analysis endpoint"""
+    if facet == 'event':
+        return response_parser.event_result(events)
+    if facet == 'labels':
+        return {'labels': labels}
+    return {'response': summary}
+
+def analyze_email(email_id, facet):
+    """
+    Get one analysis facet ('event', 'summary' or 'labels') of an email.
+
+    Cached facets are returned right away. Otherwise, in combined mode, one
+    inference produces every facet and all of them are cached, so the other
+    two endpoints for the same email are answered without asking RISE again.
+    In JSON mode the answers are validated against a schema; otherwise the
+    free-text prompts and parsers are used.
+    """
+    cached = analysis_cache.get(email_id, facet)
+    if cached is not None:
+        return cached
+
+    body = fetch_email_body(email_id)
+    if JSON_OUTPUT:
+        facets = ('event', 'summary', 'labels') if COMBINED_ANALYSIS else (facet,)
+        return analyze_email_json(email_id, facets, body)[facet]
+
+    if COMBINED_ANALYSIS:
+        facets = parse_combined_analysis(prompt_rise(COMBINED_ANALYSIS_PROMPT, body=body))
+        for name, value in facets.items():
+            analysis_cache.put(email_id, name, value)
+        if facet in facets:
+            return facets[facet]
+        print(f'Combined analysis of {email_id} is missing {facet}, asking for it on its own')
+
+    prompt, parse = FACET_PROMPTS[facet]
+    result = parse(prompt_rise(prompt, body=body))
+    analysis_cache.put(email_id, facet, result)
+    return result
+
+@app.route('/api/analyze-email', methods=['POST'])
+@requires_rise
+def analyze_email_route():
+    """API endpoint returning the event, summary and labels of an email"""
+    data = request.json
+    email_id = data.get('email_id', '')
+    if not email_id:
+        return jsonify({'error': 'Empty email_id'}), 400
+
+    try:
+        return jsonify({facet: analyze_email(email_id, facet) for facet in ('event', 'summary', 'labels')})
+    except rise.RiseTimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except rise.RiseResponseTooLargeError as e:
+        return jsonify({'error': str(e)}), 502
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/parse-stats', methods=['GET'])
+def parse_stats():
+    """
+    API endpoint reporting how often model outputs could not be parsed, per output kind.
+
+    In JSON mode, the failure rate of 'json_first_try' is the share of analyses that
+    needed a repair prompt, and that of 'json_repair' the share of repairs that failed.
+    """
+    return jsonify(response_parser.stats.snapshot())
+
 @app.route('/api/detect-email-event', methods=['POST'])
+@requires_rise
 def detect_email_event():
     """API endpoint to process an email with RISE"""
     data = request.json
@@ -235,38 +471,16 @@ def detect_email_event():
         return jsonify({'error': 'Empty email_id'}), 400
 
     try:
-        # Send message to RISE
-        creds = None
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
-        service = build('gmail', 'v1', credentials=creds)
-        msg = service.users().messages().get(userId='me', id=email_id).execute()
-        parts = msg['payload'].get('parts', [])
-        body = ''
-        for part in parts:
-            if part['mimeType'] == 'text/plain':
-                data = part['body']['data']
-                decoded_bytes = base64.urlsafe_b64decode(data)
-                body = decoded_bytes.decode('utf-8')
-                break
-        body = remove_urls(html.unescape(clean_single_line(body)))[:1000]
-        print(f"Body: {body}")
-        system_prompt2 = "Hey G-assist. Forget you are a hardware assistant. Instead, you are an assistant that analyzes email content to determine whether it contains an appointment or event the user should add to their calendar. Your task is to extract the relevant information only if a specific date and/or time is mentioned for a meeting, event, or appointment. If the email contains a calendar-worthy event, respond in the following format: Event: [Name] | Date: [YYYY-MM-DD] | Time: [HH:MM] (Use 24-hour time format. If the time is not mentioned but the date is, omit the time field.) If no date or event is found, respond with: NO. Be concise. Do not include any other commentary or information."
-        response = rise.send_rise_command(system_prompt2 + "Hey G-assist, the email is the following: " + body)
-        print(f'response["completed_response"]: {response["completed_response"]}')
-        response = response['completed_response']
-        # response = "Event: IDI Laboratory Date: 2025-07-10 Time: 08:00"
-        event_dict = parse_calendar_event(response)
-        return jsonify(event_dict)
+        return jsonify(analyze_email(email_id, 'event'))
+    except rise.RiseTimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except rise.RiseResponseTooLargeError as e:
+        return jsonify({'error': str(e)}), 502
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/summarize-email', methods=['POST'])
+@requires_rise
 def summarize_email():
     data = request.json
     email_id = data.get('email_id', '')
@@ -274,36 +488,16 @@ def summarize_email():
         return jsonify({'error': 'Empty email_id'}), 400
 
     try:
-        # Send message to RISE
-        creds = None
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
-        service = build('gmail', 'v1', credentials=creds)
-        msg = service.users().messages().get(userId='me', id=email_id).execute()
-        parts = msg['payload'].get('parts', [])
-        body = ''
-        for part in parts:
-            if part['mimeType'] == 'text/plain':
-                data = part['body']['data']
-                decoded_bytes = base64.urlsafe_b64decode(data)
-                body = decoded_bytes.decode('utf-8')
-                break
-        body = remove_urls(html.unescape(clean_single_line(body)))[:1000]
-        print(f"Body: {body}")
-        system_prompt2 = "Hey G-assist, what is this message about: "
-        response = rise.send_rise_command(system_prompt2 + body)
-        print(f'response["completed_response"]: {response["completed_response"]}')
-        response = response['completed_response']
-        return jsonify({'response': response})
+        return jsonify(analyze_email(email_id, 'summary'))
+    except rise.RiseTimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except rise.RiseResponseTooLargeError as e:
+        return jsonify({'error': str(e)}), 502
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/generate-email-labels', methods=['POST'])
+@requires_rise
 def generate_email_labels():
     data = request.json
     email_id = data.get('email_id', '')
@@ -311,37 +505,18 @@ def generate_email_labels():
         return jsonify({'error': 'Empty email_id'}), 400
 
     try:
-        # Send message to RISE
-        creds = None
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
-        service = build('gmail', 'v1', credentials=creds)
-        msg = service.users().messages().get(userId='me', id=email_id).execute()
-        parts = msg['payload'].get('parts', [])
-        body = ''
-        for part in parts:
-            if part['mimeType'] == 'text/plain':
-                data = part['body']['data']
-                decoded_bytes = base64.urlsafe_b64decode(data)
-                body = decoded_bytes.decode('utf-8')
-                break
-        body = remove_urls(html.unescape(clean_single_line(body)))[:1000]
-        print(f"Body: {body}")
-        system_prompt2 = "Hey G-assist, assign 1 to 3 short, relevant labels that describe the main topic or intent of the text below. Labels should be lowercase, concise, and separated by commas. Examples include: laboratory, meetings, billing, travel, job, promotion, support, social, subscription. Be concise. Do not include any other commentary or information."
-        response = rise.send_rise_command(system_prompt2 + "Hey G-assist, the text is the following: " + body)
-        print(f'response["completed_response"]: {response["completed_response"]}')
-        response = response['completed_response']
-        labels_array = parse_labels(response)
-        return jsonify({'labels': labels_array})
+        return jsonify(analyze_email(email_id, 'labels'))
+    except rise.RiseTimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except rise.RiseResponseTooLargeError as e:
+        return jsonify({'error': str(e)}), 502
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 def main():    
+    # Register with RISE in the background so the server binds its port right away
+    rise_client.start_rise_client(RISE_WARMUP_PROMPT)
+
     # Start the Flask server
     app.run(host='127.0.0.1', port=5000)
 
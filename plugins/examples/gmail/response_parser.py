@@ -0,0 +1,363 @@
+"""
+Parsers for the structured text the Gmail backend asks RISE for
+
+Four kinds of model output are handled:
+
+- events:   "Event: Flight to Paris | Date: 2025-07-10 | Time: 08:00", one or
+            more per response, or "NO"
+- labels:   "billing, travel"
+- combined: "Labels: ...", "Summary: ..." and "Event: ..." sections
+- JSON:     {"labels": [...], "summary": "...", "events": [...]} or any
+            subset of those keys, validated per facet by validate_facet()
+
+All patterns are compiled once at import. The text is lowercased or scanned
+at most once per call, and nothing falls back to made-up values: a date that
+does not parse is reported as missing rather than replaced with the current
+time. Every call is counted in `stats`, so the failure rate of each output
+kind can be watched as prompts and models change.
+"""
+
+import json
+import re
+import threading
+from datetime import date, datetime, time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Start of an event block. Spelled-out case classes instead of re.IGNORECASE keep the scan fast
+EVENT_HEADER = re.compile(r'(?<![A-Za-z])[Ee][Vv][Ee][Nn][Tt]\**\s*:\**\s*')
+# End of the event name: a field separator or the next field header
+EVENT_NAME_END = re.compile(r'\s*(?:\||;|\n|\b(?:[Dd]ate|[Tt]ime|DATE|TIME)\**\s*:)')
+# Date of an event, and its optional "Time:" field, before or after the date
+EVENT_DATE = re.compile(r'\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b')
+EVENT_TIME = re.compile(r'\b(?:[Tt]ime|TIME)\**\s*:\**\s*(\d{1,2})[:.](\d{2})\s*([AaPp])?')
+# Answers meaning "no event", possibly followed by chatter on later lines
+NO_EVENT = re.compile(r'^[\s*"\'`]*(?:no|none|n/a)(?:\s+events?(?:\s+found)?)?\b[ \t.!*"\'`]*(?:\n|$)',
+                      re.IGNORECASE)
+
+# Bullets, quotes and punctuation stripped from each label, and numbered-list prefixes
+LABEL_DECORATION = ' \t-*#>"\'`.!'
+LABEL_NUMBER = re.compile(r'^\d+[.)]\s*')
+LABELS_HEADER = re.compile(r'^[\s*#>-]*labels?\**\s*:\**\s*')
+MAX_LABEL_LENGTH = 30
+
+# Strict formats of JSON output fields
+JSON_DATE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+JSON_TIME = re.compile(r'^(\d{2}):(\d{2})$')
+# JSON key holding each analysis facet
+FACET_KEYS = {'event': 'events', 'summary': 'summary', 'labels': 'labels'}
+
+# Section headers of a combined response, at line starts or, as a fallback, anywhere
+SECTION_LINE = re.compile(r'^[\s*#>-]*(labels?|summary|event)\**\s*:\**\s*', re.IGNORECASE | re.MULTILINE)
+SECTION_INLINE = re.compile(r'(?:^|(?<=\s))[*#>-]*(labels?|summary|event)\**\s*:\**\s*', re.IGNORECASE)
+
+
+class ParsedEvent(NamedTuple):
+    """A calendar event found in a model response."""
+    name: str
+    date: Optional[date] = None
+    time: Optional[time] = None
+
+    @property
+    def datetime(self) -> Optional[datetime]:
+        """Date and time combined; midnight when only the date is known, None without a date."""
+        if self.date is None:
+            return None
+        return datetime.combine(self.date, self.time or time())
+
+
+class ParseStats:
+    """Thread-safe counts of parse attempts and failures per output kind."""
+
+    def __init__(self):
+        self._counts: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, ok: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(kind, [0, 0])
+            counts[0] += 1
+            if not ok:
+                counts[1] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Attempts, failures and failure rate per output kind."""
+        with self._lock:
+            return {kind: {'attempts': attempts, 'failures': failures,
+                           'failure_rate': failures / attempts if attempts else 0.0}
+                    for kind, (attempts, failures) in self._counts.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+stats = ParseStats()
+
+
+def _parse_details(block: str) -> tuple:
+    """Find the date and the optional time of an event block; None for each one that is missing or invalid."""
+    match = EVENT_DATE.search(block)
+    if match is None:
+        return None, None
+    try:
+        event_date = date(*map(int, match.groups()))
+    except ValueError:
+        return None, None
+    match = EVENT_TIME.search(block)
+    if match is None:
+        return event_date, None
+    hour, minute, meridiem = match.groups()
+    hour = int(hour)
+    if meridiem in ('p', 'P') and hour < 12:
+        hour += 12
+    elif meridiem in ('a', 'A') and hour == 12:
+        hour = 0
+    try:
+        return event_date, time(hour, int(minute))
+    except ValueError:
+        return event_date, None
+
+
+def parse_events(response_text: str, record: bool = True) -> List[ParsedEvent]:
+    """
+    Find every event in a model response.
+
+    Each "Event:" starts a new event; its name runs to the first separator or
+    field header, and its date and time are searched for up to the next event.
+    Answers such as "NO" give an empty list, which is not a failure. A response
+    with event text but no usable date counts as a failure.
+
+    Args:
+        response_text: Model output
+        record: Count the call in stats
+
+    Returns:
+        List[ParsedEvent]: Events in response order; events without a valid
+        date are dropped
+    """
+    text = response_text or ''
+    headers = list(EVENT_HEADER.finditer(text))
+    events = []
+    no_answers = 0
+    for header, next_header in zip(headers, headers[1:] + [None]):
+        block = text[header.end():next_header.start() if next_header else len(text)]
+        if NO_EVENT.match(block):
+            no_answers += 1
+            continue
+        name_end = EVENT_NAME_END.search(block)
+        name = (block[:name_end.start()] if name_end else block).strip(' \t*"\'`.')
+        event_date, event_time = _parse_details(block)
+        if name and event_date is not None:
+            events.append(ParsedEvent(name, event_date, event_time))
+
+    if record:
+        answered_no = no_answers == len(headers) if headers else NO_EVENT.match(text) is not None
+        stats.record('event', bool(events) or answered_no)
+    return events
+
+
+def parse_labels(response_text: str, record: bool = True) -> List[str]:
+    """
+    Parse a comma-separated label list.
+
+    An optional "Labels:" header, list bullets, quotes and trailing periods
+    are stripped, duplicates are dropped, and labels longer than
+    MAX_LABEL_LENGTH characters mean the model answered with prose, in which
+    case nothing is returned.
+
+    Args:
+        response_text: Model output
+        record: Count the call in stats
+
+    Returns:
+        List[str]: Lowercase labels in response order; empty on failure
+    """
+    text = (response_text or '').lower()
+    if ':' in text:
+        text = LABELS_HEADER.sub('', text, count=1)
+    labels = []
+    for piece in text.replace(';', ',').replace('\n', ',').split(','):
+        label = piece.strip(LABEL_DECORATION)
+        if label[:1].isdigit():
+            label = LABEL_NUMBER.sub('', label)
+        if not label:
+            continue
+        if len(label) > MAX_LABEL_LENGTH:
+            labels = []
+            break
+        if label not in labels:
+            labels.append(label)
+    if record:
+        stats.record('labels', bool(labels))
+    return labels
+
+
+def split_sections(response_text: str) -> Dict[str, str]:
+    """
+    Split a combined response into its "labels", "summary" and "event" sections.
+
+    Headers are looked for at line starts first, and the first occurrence of
+    each section wins. If the model put the sections on one line, headers are
+    looked for anywhere and the last occurrence of each section wins, so that
+    e.g. "event:" in the middle of a summary does not end the summary early.
+    """
+    text = response_text or ''
+    matches = list(SECTION_LINE.finditer(text))
+    if len(matches) < 2:
+        last = {}
+        for match in SECTION_INLINE.finditer(text):
+            name = match.group(1).lower()
+            last['labels' if name == 'label' else name] = match
+        matches = sorted(last.values(), key=lambda match: match.start())
+
+    sections = {}
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        name = match.group(1).lower()
+        name = 'labels' if name == 'label' else name
+        sections.setdefault(name, text[match.end():next_match.start() if next_match else len(text)].strip())
+    return sections
+
+
+class CombinedAnalysis(NamedTuple):
+    """Facets parsed from a combined response; None marks a facet that is missing or unusable."""
+    labels: Optional[List[str]]
+    summary: Optional[str]
+    events: Optional[List[ParsedEvent]]
+
+
+def parse_combined(response_text: str) -> CombinedAnalysis:
+    """
+    Parse a combined labels/summary/event response.
+
+    Args:
+        response_text: Model output
+
+    Returns:
+        CombinedAnalysis: The facets; each one that could not be parsed is None
+    """
+    sections = split_sections(response_text)
+    labels = parse_labels(sections['labels'], record=False) if 'labels' in sections else []
+    summary = sections.get('summary') or None
+
+    events = None
+    if 'event' in sections:
+        event_text = 'Event: ' + sections['event']
+        parsed = parse_events(event_text, record=False)
+        if parsed or NO_EVENT.match(sections['event']):
+            events = parsed
+
+    stats.record('combined', bool(labels) and summary is not None and events is not None)
+    return CombinedAnalysis(labels or None, summary, events)
+
+
+def event_result(events: List[ParsedEvent]) -> dict:
+    """
+    Shape events like the detect-email-event endpoint: the first event and its
+    datetime at the top level, for existing clients, and all of them under 'events'.
+    """
+    first = events[0] if events else None
+    return {'event': first.name if first else None,
+            'datetime': first.datetime if first else None,
+            'events': [{'event': event.name, 'datetime': event.datetime} for event in events]}
+
+
+class OutputError(ValueError):
+    """Raised when a JSON output is missing or does not match its schema; the message is shown to the model."""
+
+
+def extract_json(response_text: str) -> Dict[str, Any]:
+    """
+    Decode the JSON object in a model response.
+
+    Code fences and text around the object are tolerated; the first object
+    in the response is used.
+
+    Raises:
+        OutputError: If the response holds no JSON object
+    """
+    text = response_text or ''
+    start = text.find('{')
+    if start < 0:
+        raise OutputError('The answer did not contain a JSON object.')
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+    except ValueError as e:
+        raise OutputError(f'The answer was not valid JSON: {e}.')
+    if not isinstance(value, dict):
+        raise OutputError('The answer must be a JSON object.')
+    return value
+
+
+def _validate_event(item: Any) -> ParsedEvent:
+    if not isinstance(item, dict):
+        raise OutputError('each event must be an object')
+    name = item.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise OutputError('"name" must be a non-empty string')
+    event_date = item.get('date')
+    date_match = JSON_DATE.match(event_date) if isinstance(event_date, str) else None
+    if date_match is None:
+        raise OutputError('"date" must be a YYYY-MM-DD string')
+    try:
+        event_date = date(*map(int, date_match.groups()))
+    except ValueError:
+        raise OutputError(f'"{item["date"]}" is not a valid date')
+
+    event_time = None
+    if item.get('time') is not None:
+        time_match = JSON_TIME.match(item['time']) if isinstance(item['time'], str) else None
+        if time_match is None:
+            raise OutputError('"time" must be a 24-hour HH:MM string or null')
+        try:
+            event_time = time(*map(int, time_match.groups()))
+        except ValueError:
+            raise OutputError(f'"{item["time"]}" is not a valid time')
+    return ParsedEvent(name.strip(), event_date, event_time)
+
+
+def validate_events(output: Dict[str, Any]) -> Tuple[List[ParsedEvent], List[Tuple[Any, str]]]:
+    """
+    Validate the "events" list of a JSON output item by item.
+
+    Returns:
+        Tuple: The valid events, and each invalid item with the reason it was rejected
+
+    Raises:
+        OutputError: If "events" is missing or not a list
+    """
+    items = output.get('events')
+    if not isinstance(items, list):
+        raise OutputError('"events" must be a list, empty when the email has no event.')
+    events, invalid = [], []
+    for item in items:
+        try:
+            events.append(_validate_event(item))
+        except OutputError as e:
+            invalid.append((item, str(e)))
+    return events, invalid
+
+
+def validate_facet(facet: str, output: Dict[str, Any]) -> Any:
+    """
+    Validate the "labels" or "summary" facet of a JSON output.
+
+    Returns:
+        The labels list or the summary string
+
+    Raises:
+        OutputError: If the facet is missing or does not match its schema
+    """
+    if facet == 'labels':
+        labels = output.get('labels')
+        if not isinstance(labels, list) or not labels or not all(isinstance(label, str) for label in labels):
+            raise OutputError('"labels" must be a list of 1 to 3 strings.')
+        labels = parse_labels(', '.join(labels), record=False)
+        if not labels:
+            raise OutputError(f'"labels" must be short words of at most {MAX_LABEL_LENGTH} characters.')
+        return labels[:3]
+    if facet == 'summary':
+        summary = output.get('summary')
+        if not isinstance(summary, str) or not summary.strip():
+            raise OutputError('"summary" must be a non-empty string.')
+        return summary.strip()
+    raise KeyError(facet)
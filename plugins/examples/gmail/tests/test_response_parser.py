@@ -0,0 +1,120 @@
+"""
+Tests of the Gmail backend's response parsers.
+
+Run from plugins/examples/gmail:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_parser import (OutputError, ParsedEvent, extract_json, parse_combined,  # noqa: E402
+                             parse_events, parse_labels, split_sections)
+
+
+class ParseEventsTest(unittest.TestCase):
+    def test_single_event(self):
+        self.assertEqual(parse_events('Event: Flight to Paris | Date: 2025-07-10 | Time: 08:00'),
+                         [ParsedEvent('Flight to Paris', date(2025, 7, 10), time(8, 0))])
+
+    def test_time_before_date(self):
+        self.assertEqual(parse_events('Event: Standup | Time: 9:30 | Date: 2025-07-10'),
+                         [ParsedEvent('Standup', date(2025, 7, 10), time(9, 30))])
+        self.assertEqual(parse_events('Event: Standup\nTime: 2:15 PM\nDate: 2025/07/10'),
+                         [ParsedEvent('Standup', date(2025, 7, 10), time(14, 15))])
+
+    def test_several_events(self):
+        text = ('Event: Dentist | Date: 2025-03-01 | Time: 12:00 AM\n'
+                'Event: Dinner | Date: 2025-03-02 | Time: 19:00')
+        self.assertEqual(parse_events(text),
+                         [ParsedEvent('Dentist', date(2025, 3, 1), time(0, 0)),
+                          ParsedEvent('Dinner', date(2025, 3, 2), time(19, 0))])
+
+    def test_time_of_next_event_is_not_borrowed(self):
+        text = 'Event: Dentist | Date: 2025-03-01\nEvent: Dinner | Time: 19:00 | Date: 2025-03-02'
+        self.assertEqual([event.time for event in parse_events(text)], [None, time(19, 0)])
+
+    def test_no_event(self):
+        for text in ('NO', 'No events found.', '**None**', 'Event: NO'):
+            self.assertEqual(parse_events(text), [], text)
+
+    def test_invalid_date_is_dropped(self):
+        self.assertEqual(parse_events('Event: Party | Date: 2025-02-30'), [])
+        self.assertEqual(parse_events('Event: Party | Date: next Friday'), [])
+
+
+class ParseLabelsTest(unittest.TestCase):
+    def test_plain_list(self):
+        self.assertEqual(parse_labels('Billing, Travel'), ['billing', 'travel'])
+
+    def test_header_bullets_and_numbers(self):
+        self.assertEqual(parse_labels('**Labels:** billing; travel.'), ['billing', 'travel'])
+        self.assertEqual(parse_labels('- billing\n- travel\n- billing'), ['billing', 'travel'])
+        self.assertEqual(parse_labels('1. billing\n2) travel'), ['billing', 'travel'])
+
+    def test_prose_is_rejected(self):
+        self.assertEqual(parse_labels('This email is about an upcoming invoice for your account'), [])
+        self.assertEqual(parse_labels(''), [])
+
+
+class SplitSectionsTest(unittest.TestCase):
+    def test_sections_on_lines(self):
+        text = 'Labels: work\nSummary: Review at the event: demo day.\nEvent: Review | Date: 2025-07-10'
+        self.assertEqual(split_sections(text),
+                         {'labels': 'work', 'summary': 'Review at the event: demo day.',
+                          'event': 'Review | Date: 2025-07-10'})
+
+    def test_sections_on_one_line(self):
+        self.assertEqual(split_sections('Label: work Summary: A review. Event: NO'),
+                         {'labels': 'work', 'summary': 'A review.', 'event': 'NO'})
+
+    def test_inline_event_inside_summary(self):
+        text = 'Labels: travel Summary: Reminder of the event: team offsite. Event: Offsite | Date: 2025-07-10'
+        self.assertEqual(split_sections(text),
+                         {'labels': 'travel', 'summary': 'Reminder of the event: team offsite.',
+                          'event': 'Offsite | Date: 2025-07-10'})
+
+    def test_no_sections(self):
+        self.assertEqual(split_sections('Nothing to see here'), {})
+        self.assertEqual(split_sections(None), {})
+
+
+class ParseCombinedTest(unittest.TestCase):
+    def test_all_facets(self):
+        analysis = parse_combined('**Labels:** work, meetings\n**Summary:** Quarterly review.\n'
+                                  '**Event:** Review | Time: 14:00 | Date: 2025-07-10')
+        self.assertEqual(analysis.labels, ['work', 'meetings'])
+        self.assertEqual(analysis.summary, 'Quarterly review.')
+        self.assertEqual(analysis.events, [ParsedEvent('Review', date(2025, 7, 10), time(14, 0))])
+
+    def test_no_event_is_not_missing(self):
+        analysis = parse_combined('Labels: newsletter\nSummary: Weekly digest.\nEvent: NO')
+        self.assertEqual(analysis.events, [])
+
+    def test_missing_facets_are_none(self):
+        analysis = parse_combined('Summary: Weekly digest.\nEvent: Party | Date: sometime')
+        self.assertIsNone(analysis.labels)
+        self.assertIsNone(analysis.events)
+        self.assertEqual(analysis.summary, 'Weekly digest.')
+
+
+class ExtractJsonTest(unittest.TestCase):
+    def test_fenced_object(self):
+        self.assertEqual(extract_json('Sure:\n```json\n{"labels": ["work"]}\n```\nDone {x}'),
+                         {'labels': ['work']})
+
+    def test_errors(self):
+        for text in ('no object here', '{"labels": [}', '', None):
+            with self.assertRaises(OutputError, msg=text):
+                extract_json(text)
+
+    def test_first_object_wins(self):
+        self.assertEqual(extract_json('{"a": 1} {"b": 2}'), {'a': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,8 @@
 import json
 import logging
 import os
-import requests
-import feedparser
-from ctypes import byref, windll, wintypes
 from typing import Dict, Optional, List
+from rise_plugin import Plugin, configure_logging, generate_failure_response, generate_success_response
 
 # Data Types
 Response = Dict[bool, Optional[str]]
@@ -20,7 +18,7 @@ CONFIG_FILE = os.path.join(
 )
 
 LOG_FILE = os.path.join(os.environ.get("USERPROFILE", "."), 'ifttt_plugin.log')
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+configure_logging(LOG_FILE, level=logging.INFO)
 
 IFTTT_WEBHOOK_KEY = None
 EVENT_NAME = None
@@ -28,120 +26,16 @@ MAIN_RSS_URL = "https://feeds.feedburner.com/ign/pc-articles"  # using IGN PC Ga
 ALTERNATE_RSS_URL = "https://feeds.feedburner.com/ign/all"  # using IGN All RSS feed as default
 
 def main():
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-    ERROR_MESSAGE = 'Plugin Error!'
-
     commands = {
         'initialize': execute_initialize_command,
         'shutdown': execute_shutdown_command,
         'trigger_gaming_setup': execute_run_applet_command,
     }
-    cmd = ''
 
     logging.info('IFTTT Plugin started')
-    while cmd != SHUTDOWN_COMMAND:
-        response = None
-        input = read_command()
-        if input is None:
-            logging.error('Error reading command')
-            continue
-
-        logging.info(f'Received input: {input}')
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logging.info(f'Processing command: {cmd}')
-                    if cmd in commands:
-                        if cmd in [INITIALIZE_COMMAND, SHUTDOWN_COMMAND]:
-                            response = commands[cmd]()
-                        else:
-                            params = tool_call.get(PARAMS_PROPERTY, {})
-                            response = commands[cmd](params)
-                    else:
-                        logging.warning(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    logging.warning('Malformed input: missing function property')
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            logging.warning('Malformed input: missing tool_calls property')
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        logging.info(f'Sending response: {response}')
-        write_response(response)
-
-        if cmd == SHUTDOWN_COMMAND:
-            logging.info('Shutdown command received, terminating plugin')
-            break
-
+    result = Plugin(commands, error_message='Plugin Error!').run()
     logging.info('IFTTT Plugin stopped.')
-    return 0
-
-def read_command() -> dict or None:
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(pipe, buffer, BUFFER_SIZE, byref(message_bytes), None)
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error('Failed to decode JSON input')
-        return None
-    except Exception as e:
-        logging.error(f'Unexpected error in read_command: {str(e)}')
-        return None
-
-def write_response(response: Response) -> None:
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(pipe, message_bytes, message_len, byref(bytes_written), None)
-
-    except Exception as e:
-        logging.error(f'Failed to write response: {str(e)}')
-
-def generate_failure_response(message: str = None) -> Response:
-    response = { 'success': False }
-    if message:
-        response['message'] = message
-    return response
-
-def generate_success_response(message: str = None) -> Response:
-    response = { 'success': True }
-    if message:
-        response['message'] = message
-    return response
+    return result
 
 def execute_initialize_command() -> dict:
     logging.info('Initializing plugin')
@@ -159,6 +53,8 @@ def fetch_ign_gaming_news() -> List[str]:
         List of headlines for the top 3 gaming news articles.
     """
     try:
+        import feedparser
+
         logging.info('Fetching IGN gaming news')
         
         # using feedparser to fetch and parse the IGN gaming news RSS feed
@@ -183,7 +79,7 @@ def fetch_ign_gaming_news() -> List[str]:
         logging.error(f'Error fetching IGN gaming news: {str(e)}')
         return []
 
-def execute_run_applet_command(params: dict = None) -> dict:
+def execute_run_applet_command(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     logging.info(f'Executing run_applet with params: {params}')
 
     global IFTTT_WEBHOOK_KEY, EVENT_NAME, MAIN_RSS_URL, ALTERNATE_RSS_URL, CONFIG_FILE
@@ -200,6 +96,10 @@ def execute_run_applet_command(params: dict = None) -> dict:
         if EVENT_NAME is None or IFTTT_WEBHOOK_KEY is None:
             return generate_failure_response('Missing required parameter: event_name or webhook_key')
 
+        # Imported on first use; requests and feedparser would otherwise
+        # delay the plugin's answer to the initialize command
+        import requests
+
         webhook_url = f'https://maker.ifttt.com/trigger/{EVENT_NAME}/with/key/{IFTTT_WEBHOOK_KEY}'
         
         # initialize webhook data
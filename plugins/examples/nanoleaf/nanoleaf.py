@@ -12,24 +12,24 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import ctypes
 import json
+import logging
 import os
 import sys
 
-from ctypes import byref, windll, wintypes
 from ipaddress import ip_address
 from typing import Optional
 
 from nanoleafapi import Nanoleaf
+from rise_plugin import (Plugin, configure_logging, generate_failure_response, generate_success_response,
+                         load_manifest)
 
 
 # Globals
 # The plugin's configuration file.
 CONFIG_FILE = os.path.join(os.getcwd(), 'config.json')
 
-# By default, logging is turned off. To enable logging, update the following
-# with a path the plugin is allowed to write to.
+# The plugin's log file. Set to None to turn logging off.
 LOG_FILE = os.path.join(os.environ.get('USERPROFILE', '.'), 'nanoleaf.log')
 
 
@@ -41,88 +41,25 @@ type Color = tuple[int, int, int]
 # Globals
 NL: Nanoleaf | None = None
 
+ERROR_MESSAGE = 'Failed to update lighting for Nanoleaf device(s).'
+
 
 def main():
     ''' Main entry point.
 
-    Sits in a loop listening to a pipe, waiting for commands to be issued. After
-    receiving the command, it is processed and the result returned. The loop
-    continues until the "shutdown" command is issued.
+    Registers the command handlers and runs the plugin's command loop, which
+    processes commands from the pipe until the "shutdown" command is issued.
 
     Returns:
         Zero if no errors occurred during execution, otherwise a non-zero value
     '''
-    global NL
-
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'context'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'properties'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
-    ERROR_MESSAGE = 'Failed to update lighting for Nanoleaf device(s).'
-
-    # Generate command handler mapping
-    commands = generate_command_handlers()
-    cmd = ''
-
-    write_log('Starting plugin.')
-    while True:
-        response = None
-        input = read_command()
-        context = input[CONTEXT_PROPERTY] if CONTEXT_PROPERTY in cmd else None
-
-        write_log(f'Input Received: {input}')
-        if input is None:
-            # Error reading command; continue
-            continue
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY].lower()
-
-                    if cmd in commands:
-                        if(cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND):
-                            response = commands[cmd]()
-                        else:
-                            response = execute_initialize_command()
-
-                            if NL is None:
-                                response = generate_failure_response(f'{ERROR_MESSAGE} There is no Nanoleaf device connected. Check the IP address in the configuration file.')
-                            else:
-                                response = commands[cmd](NL, tool_call[PARAMS_PROPERTY] if PARAMS_PROPERTY in tool_call else {}, context)
-                    else:
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        write_log(f'Sending Response: {response}')
-        write_response(response)
-        if cmd == SHUTDOWN_COMMAND:
-            break
-    return 0
-
-
-def write_log(line: str) -> None:
-    ''' Writes a line to the log file.
-
-    Parameters:
-        line: The line to write
-    '''
-    global LOG_FILE
-
-    try:
-        if LOG_FILE is not None:
-            with open(LOG_FILE, 'a') as file:
-                file.write(f'{line}\n')
-                file.flush()
-    except Exception:
-        # Error writing to the log
-        pass
+    configure_logging(LOG_FILE, level=logging.INFO)
+    logging.info('Starting plugin.')
+    # All tool calls share one connection to the Nanoleaf device
+    plugin = Plugin(generate_command_handlers(), error_message=ERROR_MESSAGE,
+                    reinitialize_on_failure=True, lowercase_commands=True, max_workers=1,
+                    manifest=load_manifest())
+    return plugin.run()
 
 
 def generate_command_handlers() -> dict:
@@ -134,117 +71,26 @@ def generate_command_handlers() -> dict:
     commands = dict()
     commands['initialize'] = execute_initialize_command
     commands['shutdown'] = execute_shutdown_command
-    commands['nanoleaf_change_room_lights'] = execute_color_command
-    commands['nanoleaf_change_profile'] = execute_profile_command
+    commands['nanoleaf_change_room_lights'] = requires_device(execute_color_command)
+    commands['nanoleaf_change_profile'] = requires_device(execute_profile_command)
     return commands
 
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                write_log('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        write_log(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        write_log(f'Exception in read_command(): {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
+def requires_device(handler):
+    ''' Wraps a command handler that needs the connected Nanoleaf device.
 
     Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            write_log('Error writing to response pipe')
-
-    except Exception as e:
-        write_log(f'Exception in write_response(): {str(e)}')
-
-
-def generate_failure_response(message:str=None) -> Response:
-    ''' Generates a response indicating failure.
-
-    Parameters:
-        message: String to be returned in the response (optional)
+        handler: Command handler taking the device, parameters and context
 
     Returns:
-        A failure response with the attached message
+        Command handler for the plugin's dispatcher
     '''
-    response = { 'success': False }
-    if message:
-        response['message'] = message
-    return response
+    def device_handler(params:dict=None, context:dict=None, system_info:dict=None) -> Response:
+        if NL is None:
+            return generate_failure_response(f'{ERROR_MESSAGE} There is no Nanoleaf device connected. Check the IP address in the configuration file.')
+        return handler(NL, params, context)
 
-
-def generate_success_response(message:str=None) -> Response:
-    ''' Generates a response indicating success.
-
-    Parameters:
-        message: String to be returned in the response (optional)
-
-    Returns:
-        A success response with the attached massage
-    '''
-    response = { 'success': True }
-    if message:
-        response['message'] = message
-    return response
+    return device_handler
 
 
 def execute_initialize_command() -> Response:
@@ -272,7 +118,7 @@ def execute_initialize_command() -> Response:
         NL.set_color(get_rgb_code('BLACK'))
         return generate_success_response()
     except Exception as e:
-        write_log(f'Error connecting to Nanoleaf device: {str(e)}')
+        logging.error(f'Error connecting to Nanoleaf device: {str(e)}')
         NL = None
         return generate_failure_response('Error initializing Nanoleaf device')
 
@@ -337,9 +183,6 @@ def execute_color_command(nl:Nanoleaf, params:dict=None, context:dict=None) -> R
     COMMANDS = [ 'OFF', 'BRIGHT_UP', 'BRIGHT_DOWN' ]
     RAINBOW = 'RAINBOW'
 
-    if params is None or 'color' not in params:
-        return generate_failure_response(f'{ERROR_MESSAGE} Missing color.')
-
     color = params['color'].upper()
     if color == RAINBOW:
         # this is temporary until the model adds a 'change profile' function
@@ -4,25 +4,23 @@ The following code can be used to create a G-Assist plugin written in Python. G-
 plugins are Windows based executables. They are spawned by the G-Assist plugin
 manager. Communication between the plugin and the manager are done via pipes.
 '''
-import json
 import logging
 import os
-from ctypes import byref, windll, wintypes
-from xmlrpc.client import boolean
-import requests
 from typing import Optional
 from openrgb import OpenRGBClient
-from openrgb.utils import RGBColor, DeviceType
+from openrgb.utils import RGBColor
+from rise_plugin import (Plugin, configure_logging, generate_failure_response, generate_success_response,
+                         load_manifest)
 
 
 # Data Types
 Response = dict[bool,Optional[str]]
 
 LOG_FILE = os.path.join(os.environ.get("USERPROFILE", "."), 'openrgb_plugin.log')
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+configure_logging(LOG_FILE, level=logging.INFO)
 
 SIGNALRGB_URL = "http://127.0.0.1:16038/api/v1"
-global CLI 
+CLI = None
 
 COLOR_MAP = {
     'red': (255, 0, 0),
@@ -39,24 +37,12 @@ COLOR_MAP = {
 def main():
     ''' Main entry point.
 
-    Sits in a loop listening to a pipe, waiting for commands to be issued. After
-    receiving the command, it is processed and the result returned. The loop
-    continues until the "shutdown" command is issued.
+    Registers the command handlers and runs the plugin's command loop, which
+    processes commands from the pipe until the "shutdown" command is issued.
 
     Returns:
         0 if no errors occurred during execution; non-zero if an error occurred
     '''
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    CONTEXT_PROPERTY = 'messages'
-    SYSTEM_INFO_PROPERTY = 'system_info'  # Added for game information
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-
-
-    ERROR_MESSAGE = 'Plugin Error!'
-
     try:
         # Generate command handler mapping
         commands = {
@@ -69,162 +55,17 @@ def main():
             'set_color': execute_set_color,
             'set_mode': execute_set_mode,
         }
-        cmd = ''
-
-        logging.info('Plugin started')
-        while cmd != SHUTDOWN_COMMAND:
-            response = None
-            input = read_command()
-            if input is None:
-                logging.error('Error reading command')
-                continue
-
-            logging.info(f'Received input: {input}')
-            
-            if TOOL_CALLS_PROPERTY in input:
-                tool_calls = input[TOOL_CALLS_PROPERTY]
-                for tool_call in tool_calls:
-                    if FUNCTION_PROPERTY in tool_call:
-                        cmd = tool_call[FUNCTION_PROPERTY]
-                        logging.info(f'Processing command: {cmd}')
-                        if cmd in commands:
-                            if(cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND):
-                                response = commands[cmd]()
-                            else:
-                                response = execute_initialize_command()
-                                response = commands[cmd](
-                                    tool_call.get(PARAMS_PROPERTY, {}),
-                                    input[CONTEXT_PROPERTY] if CONTEXT_PROPERTY in input else None,
-                                    input[SYSTEM_INFO_PROPERTY] if SYSTEM_INFO_PROPERTY in input else None  # Pass system_info directly
-                                )
-                        else:
-                            logging.warning(f'Unknown command: {cmd}')
-                            response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                    else:
-                        logging.warning('Malformed input: missing function property')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-            else:
-                logging.warning('Malformed input: missing tool_calls property')
-                response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-            logging.info(f'Sending response: {response}')
-            write_response(response)
-
-            if cmd == SHUTDOWN_COMMAND:
-                logging.info('Shutdown command received, terminating plugin')
-                break
-        
-        logging.info('G-Assist Plugin stopped.')
-        return 0
+
+        # All tool calls share one connection to the OpenRGB server
+        # Reconnect to the OpenRGB server after a failure
+        plugin = Plugin(commands, error_message='Plugin Error!', reinitialize_on_failure=True,
+                        max_workers=1, manifest=load_manifest())
+        return plugin.run()
     except Exception as e:
         logging.error(f'Unexpected error in main: {str(e)}')
         return 1
 
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = buffer.decode('utf-8')[:message_bytes.value]
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error('Failed to decode JSON input')
-        return None
-    except Exception as e:
-        logging.error(f'Unexpected error in read_command: {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Args:
-        response: Function response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-    except Exception as e:
-        logging.error(f'Failed to write response: {str(e)}')
-        pass
-
-
-def generate_failure_response(message:str=None) -> Response:
-    ''' Generates a response indicating failure.
-
-    Parameters:
-        message: String to be returned in the response (optional)
-
-    Returns:
-        A failure response with the attached message
-    '''
-    response = { 'success': False }
-    if message:
-        response['message'] = message
-    return response
-
-
-def generate_success_response(message:str=None) -> Response:
-    ''' Generates a response indicating success.
-
-    Parameters:
-        message: String to be returned in the response (optional)
-
-    Returns:
-        A success response with the attached massage
-    '''
-    response = { 'success': True }
-    if message:
-        response['message'] = message
-    return response
-
-
 def execute_initialize_command() -> dict:
     ''' Command handler for `initialize` function
 
@@ -239,6 +80,11 @@ def execute_initialize_command() -> dict:
     logging.info('Initializing plugin')
     # initialization function body
     global CLI 
+    if CLI:
+        try:
+            CLI.disconnect()
+        except Exception as e:
+            logging.error(f'Failed to disconnect OpenRGB client: {str(e)}')
     CLI = OpenRGBClient('127.0.0.1', 6742, 'G-Assist Plugin')
 
     return generate_success_response('initialize success.')
@@ -292,11 +138,9 @@ def execute_set_color(params: dict = None, context: dict = None, system_info: di
     logging.info(f'Executing execute_set_color')
 
     try:
-        color = params.get('color_name')
+        color = params['color_name']
         logging.info(f'Color: {color}')
-        if not color:
-            return generate_failure_response(f'{ERROR_MESSAGE} Missing color')
-        
+
         device_name = params.get('device_name')
         logging.info(f'Device Name: {device_name}')
         try:
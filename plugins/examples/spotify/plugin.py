@@ -6,13 +6,13 @@ import webbrowser
 import logging
 import os
 from urllib.parse import urlencode, urlparse, parse_qs
-from ctypes import byref, windll, wintypes
 from requests import Response
+from rise_plugin import Plugin, configure_logging
 
 # Settings specific to the user's system. This is temporary until a
 # configuration file is added to the plugin.
 LOG_FILE = os.path.join(os.environ.get("USERPROFILE", "."), 'spotify-plugin.log')
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+configure_logging(LOG_FILE, level=logging.INFO)
 
 REDIRECT_URI="https://open.spotify.com"
 SCOPE = "user-library-read user-read-currently-playing user-read-playback-state user-modify-playback-state playlist-read-private playlist-read-collaborative"
@@ -22,6 +22,9 @@ AUTHORIZATION_URL = "https://accounts.spotify.com/authorize"
 AUTH_URL = "https://accounts.spotify.com/api/token"
 BASE_URL = "https://api.spotify.com/v1"
 
+CONFIG_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "config.json")
+AUTH_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "auth.json")
+
 AUTH_STATE = None
 ACCESS_TOKEN = None
 REFRESH_TOKEN = None
@@ -121,8 +124,8 @@ def complete_auth_user(callback_url):
 def main():
     """ Main entry point for the Spotify G-Assist plugin.
     
-    Listens for commands on a pipe and processes them in a loop until shutdown.
-    Handles initialization, command processing, and cleanup.
+    Loads the configuration and any saved tokens, then runs the plugin's
+    command loop until shutdown.
     
     Returns:
         int: 0 for successful execution, 1 for failure
@@ -133,14 +136,6 @@ def main():
     global ACCESS_TOKEN
     global REFRESH_TOKEN
     SUCCESS = 0
-    FAILURE = 1
-    TOOL_CALLS_PROPERTY = 'tool_calls'
-    FUNCTION_PROPERTY = 'func'
-    PARAMS_PROPERTY = 'params'
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-    CONFIG_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "config.json")
-    AUTH_FILE = os.path.join(os.environ.get("PROGRAMDATA", "."), "NVIDIA Corporation", "nvtopps", "rise", "plugins", "spotify", "auth.json")
 
     try:
         # Read the IP from the configuration file
@@ -152,9 +147,6 @@ def main():
     except Exception as e:
         logging.error(f'Error reading configuration file: {e}')
 
-    # Generate command handler mapping
-    commands = generate_command_handlers()
-
     logging.info('Starting plugin.')
 
     # Try to load existing tokens first
@@ -175,93 +167,65 @@ def main():
         ACCESS_TOKEN = None
         REFRESH_TOKEN = None
 
-    while True:
-        function = ''
-        response = None
-        input = read_command()
-        if input is None:
-            continue
-        logging.info(f'Command: "{input}"')
-
-        if TOOL_CALLS_PROPERTY in input:
-            tool_calls = input[TOOL_CALLS_PROPERTY]
-            logging.info(f'tool_calls: "{tool_calls}"')
-            
-            # Store the original command for retry after auth
-            original_command = None
-            
-            for tool_call in tool_calls:
-                if FUNCTION_PROPERTY in tool_call: 
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logging.info(f'func: "{cmd}"')
-                    
-                    if cmd == INITIALIZE_COMMAND or cmd == SHUTDOWN_COMMAND:
-                        logging.info(f'cmd: "{cmd}"')
-                        response = commands[cmd]()
-                    else:
-                        # For all other commands, check if we need authorization
-                        if ACCESS_TOKEN is None or REFRESH_TOKEN is None:
-                            # Check if we have an auth_url in the file
-                            try:
-                                with open(AUTH_FILE, 'r') as file:
-                                    data = json.load(file)
-                                    if 'auth_url' in data:
-                                        logging.info('Found auth_url in file, processing...')
-                                        auth_response = execute_auth_command({"callback_url": data['auth_url']})
-                                        if auth_response['success']:
-                                            # Store the original command for retry
-                                            original_command = tool_call
-                                            # Break out of the loop to retry the command
-                                            break
-                            except Exception as e:
-                                logging.error(f'Error checking auth file: {e}')
-                            
-                            # If we get here, we need to start new authorization
-                            logging.info('Starting new authorization process')
-                            authorize_user()
-                            response = generate_success_response({
-                                "message": "Please follow these steps:\n"
-                                          "1. A browser window has opened - log in to Spotify and authorize the app\n"
-                                          "2. After authorizing, you'll be redirected to a URL\n"
-                                          "3. Copy the ENTIRE URL from your browser\n"
-                                          "4. Create or edit the file at this location:\n"
-                                          f"   `{AUTH_FILE}`\n"
-                                          "5. Add the URL to the file in this format:\n"
-                                          "   ```\n"
-                                          "   {\n"
-                                          "     \"auth_url\": \"YOUR_COPIED_URL\"\n"
-                                          "   }\n"
-                                          "    \n"
-                                          "6. Save the file and try your command again"
-                            })
-                            break
-                        
-                        # If we have valid tokens, execute the command
-                        try:
-                            logging.info(f'Executing command: {cmd} {tool_call}')
-                            response = commands[cmd](tool_call[PARAMS_PROPERTY] if PARAMS_PROPERTY in tool_call else {})
-                        except Exception as e:
-                            response = generate_failure_response({'message': f'Spotify Error: {e}'})
-                else:
-                    response = generate_failure_response({ 'message': f'Unknown command "{cmd}"' })
-            
-            # If we have an original command to retry (after successful auth)
-            if original_command is not None:
-                cmd = original_command[FUNCTION_PROPERTY]
-                logging.info(f'Retrying original command after auth: {cmd}')
-                try:
-                    response = commands[cmd](original_command[PARAMS_PROPERTY] if PARAMS_PROPERTY in original_command else {})
-                except Exception as e:
-                    response = generate_failure_response({'message': f'Spotify Error: {e}'})
-        else:
-            response = generate_failure_response({ 'message': 'Malformed input' })
+    # Generate command handler mapping
+    # Playback commands act on the same player, in the order they were asked for
+    Plugin(generate_command_handlers(), error_message='Spotify Error:', max_workers=1).run()
+    sys.exit(SUCCESS)
 
-        logging.info(f'Response: {response}')
-        write_response(response)
-        if function == SHUTDOWN_COMMAND:
-            break
+def requires_authorization(handler):
+    """ Wraps a command handler so it only runs once the user is authorized.
 
-    sys.exit(SUCCESS)
+    Without tokens, a callback URL saved in the auth file completes the
+    authorization first; otherwise the browser is opened for the user to
+    authorize the app and the steps to finish are returned instead.
+
+    Args:
+        handler: Command handler taking the command parameters
+
+    Returns:
+        Command handler for the plugin's dispatcher
+    """
+    def authorized_handler(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
+        if ACCESS_TOKEN is None or REFRESH_TOKEN is None:
+            authorized = False
+            # Check if we have an auth_url in the file
+            try:
+                with open(AUTH_FILE, 'r') as file:
+                    data = json.load(file)
+                    if 'auth_url' in data:
+                        logging.info('Found auth_url in file, processing...')
+                        authorized = execute_auth_command({"callback_url": data['auth_url']})['success']
+            except Exception as e:
+                logging.error(f'Error checking auth file: {e}')
+
+            if not authorized:
+                # We need to start new authorization
+                logging.info('Starting new authorization process')
+                authorize_user()
+                return generate_success_response({
+                    "message": "Please follow these steps:\n"
+                              "1. A browser window has opened - log in to Spotify and authorize the app\n"
+                              "2. After authorizing, you'll be redirected to a URL\n"
+                              "3. Copy the ENTIRE URL from your browser\n"
+                              "4. Create or edit the file at this location:\n"
+                              f"   `{AUTH_FILE}`\n"
+                              "5. Add the URL to the file in this format:\n"
+                              "   ```\n"
+                              "   {\n"
+                              "     \"auth_url\": \"YOUR_COPIED_URL\"\n"
+                              "   }\n"
+                              "    \n"
+                              "6. Save the file and try your command again"
+                })
+
+        # If we have valid tokens, execute the command
+        try:
+            logging.info(f'Executing command: {handler.__name__} {params}')
+            return handler(params if params is not None else {})
+        except Exception as e:
+            return generate_failure_response({'message': f'Spotify Error: {e}'})
+
+    return authorized_handler
 
 def get_auth_state(auth_file: str) -> tuple[str | None, str | None]:
     """Gets the access and refresh tokens from the auth file.
@@ -384,94 +348,18 @@ def generate_command_handlers() -> dict:
     commands = dict()
     commands['initialize'] = execute_initialize_command
     commands['shutdown'] = execute_shutdown_command
-    commands['authorize'] = execute_auth_command
-    commands['spotify_start_playback'] = execute_play_command
-    commands['spotify_pause_playback'] = execute_pause_command
-    commands['spotify_next_track'] = execute_next_track_command
-    commands['spotify_previous_track'] = execute_previous_track_command
-    commands['spotify_shuffle_playback'] = execute_shuffle_command
-    commands['spotify_set_volume'] = execute_volume_command
-    commands['spotify_get_currently_playing'] = execute_currently_playing_command
-    commands['spotify_queue_track'] = execute_queue_track_command
-    commands['spotify_get_user_playlists'] = execute_get_user_playlists_command
+    commands['authorize'] = requires_authorization(execute_auth_command)
+    commands['spotify_start_playback'] = requires_authorization(execute_play_command)
+    commands['spotify_pause_playback'] = requires_authorization(execute_pause_command)
+    commands['spotify_next_track'] = requires_authorization(execute_next_track_command)
+    commands['spotify_previous_track'] = requires_authorization(execute_previous_track_command)
+    commands['spotify_shuffle_playback'] = requires_authorization(execute_shuffle_command)
+    commands['spotify_set_volume'] = requires_authorization(execute_volume_command)
+    commands['spotify_get_currently_playing'] = requires_authorization(execute_currently_playing_command)
+    commands['spotify_queue_track'] = requires_authorization(execute_queue_track_command)
+    commands['spotify_get_user_playlists'] = requires_authorization(execute_get_user_playlists_command)
     return commands
 
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
-    
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            logging.error('Error writing to response pipe')
-
-    except Exception as e:
-        logging.error(f'Exception in write_response(): {str(e)}')
-
 def generate_failure_response(body:dict=None) -> dict:
     ''' Generates a response indicating failure.
 
@@ -1,30 +1,18 @@
 import json
 import logging
 import os
-from ctypes import byref, windll, wintypes
 from typing import Optional, Dict, Any
-import requests
+from rise_plugin import Plugin, configure_logging, load_manifest
 
 # Type definitions
 Response = Dict[bool, Optional[str]]
 
 # Constants
-TOOL_CALLS_PROPERTY = 'tool_calls'
-CONTEXT_PROPERTY = 'messages'
-SYSTEM_INFO_PROPERTY = 'system_info'
-FUNCTION_PROPERTY = 'func'
-PARAMS_PROPERTY = 'params'
-INITIALIZE_COMMAND = 'initialize'
-SHUTDOWN_COMMAND = 'shutdown'
 ERROR_MESSAGE = 'Plugin Error!'
 
 # Configure logging
 LOG_FILE = os.path.join(os.path.expanduser("~"), 'stock_plugin.log')
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+configure_logging(LOG_FILE, level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Load API Key from config file
@@ -54,18 +42,17 @@ def execute_get_ticker_from_company_command(params: Dict[str, Any] = None, *_) -
     """Get stock ticker symbol from company name.
     
     Args:
-        params (Dict[str, Any], optional): Parameters containing company_name.
+        params (Dict[str, Any], optional): Parameters containing the required company_name.
         *_ : Additional unused arguments.
     
     Returns:
         Response: Success response with ticker symbol or failure response.
     """
-    name = params.get("company_name", "")
-    if not name:
-        logger.error("No company name provided.")
-        return generate_failure_response("Missing company_name.")
+    name = params["company_name"]
     url = f"https://api.twelvedata.com/symbol_search?symbol={name}&apikey={API_KEY}"
     try:
+        import requests  # imported on first use to keep the plugin's startup short
+
         response = requests.get(url).json()
         results = response.get("data", [])
         if not results:
@@ -94,6 +81,8 @@ def execute_get_stock_price_command(params: Dict[str, Any] = None, *_) -> Respon
         return generate_failure_response("Provide either ticker or company_name.")
     url = f"https://api.twelvedata.com/quote?symbol={query}&apikey={API_KEY}"
     try:
+        import requests
+
         data = requests.get(url).json()
         if "symbol" not in data:
             logger.error(f"No quote found for that input. {data}")
@@ -142,68 +131,11 @@ def generate_success_response(message: str = None) -> Response:
     """
     return {'success': True, 'message': message or "Command succeeded."}
 
-def read_command() -> Dict[str, Any] | None:
-    """Read command from stdin pipe.
-    
-    Reads JSON-formatted command from Windows pipe.
-    
-    Returns:
-        Dict[str, Any] | None: Parsed command dictionary or None if error.
-    """
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(pipe, buffer, BUFFER_SIZE, byref(message_bytes), None)
-            if not success:
-                return None
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-            if message_bytes.value < BUFFER_SIZE:
-                break
-        retval = ''.join(chunks)
-        return json.loads(retval)
-    except:
-        return None
-
-def write_response(response: Response) -> None:
-    """Write response to stdout pipe.
-    
-    Writes JSON-formatted response to Windows pipe with <<END>> marker.
-    The marker is used by the reader to determine the end of the response.
-    
-    Args:
-        response (Response): Response dictionary to write.
-    
-    Response Format:
-        JSON-encoded dictionary followed by <<END>> marker.
-        Example: {"success":true,"message":"Plugin initialized successfully"}<<END>>
-    """
-    try:
-        pipe = windll.kernel32.GetStdHandle(-11)
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            len(message_bytes),
-            bytes_written,
-            None
-        )
-    except Exception as e:
-        logging.error(f'Error writing response: {e}')
-
 def main() -> int:
     """Main plugin entry point.
     
-    Processes commands from stdin and writes responses to stdout.
-    Commands are processed in a loop until shutdown command is received.
+    Registers the command handlers and runs the plugin's command loop, which
+    processes commands until the shutdown command is received.
     
     Returns:
         int: Exit code (0 for success).
@@ -217,43 +149,7 @@ def main() -> int:
         'get_ticker_from_company': execute_get_ticker_from_company_command
     }
 
-    cmd = ''
-    logger.info('Plugin started')
-    while cmd != SHUTDOWN_COMMAND:
-        response = None
-        input = read_command()
-        if input is None:
-            logger.error('Error reading command')
-            continue
-
-        logger.info(f'Received input: {input}')
-        if TOOL_CALLS_PROPERTY in input:
-            for tool_call in input[TOOL_CALLS_PROPERTY]:
-                if FUNCTION_PROPERTY in tool_call:
-                    cmd = tool_call[FUNCTION_PROPERTY]
-                    logger.info(f'Processing command: {cmd}')
-                    if cmd in commands:
-                        if cmd in ['initialize', 'shutdown']:
-                            response = commands[cmd]()
-                        else:
-                            params = tool_call.get(PARAMS_PROPERTY, {})
-                            context = input.get(CONTEXT_PROPERTY)
-                            system_info = input.get(SYSTEM_INFO_PROPERTY)
-                            response = commands[cmd](params, context, system_info)
-                    else:
-                        logger.error(f'Unknown command: {cmd}')
-                        response = generate_failure_response(f'{ERROR_MESSAGE} Unknown command: {cmd}')
-                else:
-                    logger.error(f'Malformed input: {tool_call}')
-                    response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-        else:
-            logger.error(f'Malformed input: {input}')
-            response = generate_failure_response(f'{ERROR_MESSAGE} Malformed input.')
-
-        write_response(response)
-        if cmd == SHUTDOWN_COMMAND:
-            break
-    return 0
+    return Plugin(commands, error_message=ERROR_MESSAGE, manifest=load_manifest()).run()
 
 if __name__ == "__main__":
     main()
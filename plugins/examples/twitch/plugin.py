@@ -2,8 +2,8 @@
 
 This plugin provides functionality to interact with the Twitch API,
 specifically for checking stream status of Twitch users. It implements
-a Windows pipe-based communication protocol for receiving commands and
-sending responses.
+its commands as handlers of the shared plugin runtime (rise_plugin), which
+handles the pipe communication with the plugin manager.
 
 Configuration:
     Required configuration in config.json:
@@ -22,7 +22,7 @@ Commands Supported:
 
 Dependencies:
     - requests: For making HTTP requests to Twitch API
-    - ctypes: For Windows pipe communication
+    - rise_plugin: For the pipe communication and command dispatch
 """
 
 import json
@@ -30,23 +30,13 @@ import logging
 import os
 import sys
 from typing import Optional, Dict, Any
-import requests
-from ctypes import byref, windll, wintypes
+from rise_plugin import Plugin, configure_logging, load_manifest
 
 # Type definitions
 Response = Dict[str, Any]
 """Type alias for response dictionary containing 'success' and optional 'message'."""
 
 # Constants
-STD_INPUT_HANDLE = -10
-"""Windows standard input handle constant."""
-
-STD_OUTPUT_HANDLE = -11
-"""Windows standard output handle constant."""
-
-BUFFER_SIZE = 4096
-"""Size of buffer for reading from pipe in bytes."""
-
 CONFIG_FILE = os.path.join(
     os.environ.get("PROGRAMDATA", "."),
     r'NVIDIA Corporation\nvtopps\rise\plugins\twitch',
@@ -74,18 +64,15 @@ config: Dict[str, str] = {}
 def setup_logging() -> None:
     """Configure logging with appropriate format and level.
     
-    Sets up the logging configuration with file output, INFO level, and timestamp format.
-    The log file location is determined by LOG_FILE constant.
+    Sets up the logging configuration with rotating file output written from a
+    background thread, INFO level, and timestamp format. The log file location
+    is determined by LOG_FILE constant.
     
     Log Format:
         %(asctime)s - %(levelname)s - %(message)s
         Example: 2024-03-14 12:34:56,789 - INFO - Plugin initialized
     """
-    logging.basicConfig(
-        filename=LOG_FILE,
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s"
-    )
+    configure_logging(LOG_FILE, level=logging.INFO)
 
 def load_config() -> Dict[str, str]:
     """Load configuration from config.json file.
@@ -133,6 +120,10 @@ def get_oauth_token() -> Optional[str]:
         Optional[str]: The OAuth access token if successful, None otherwise.
     """
     global oauth_token
+    # requests is imported when the first Twitch API call is made rather than
+    # at startup, which it would otherwise dominate
+    import requests
+
     try:
         response = requests.post(
             TWITCH_OAUTH_URL,
@@ -168,11 +159,14 @@ def generate_response(success: bool, message: Optional[str] = None) -> Response:
         response['message'] = message
     return response
 
-def check_twitch_live_status(params: Dict[str, str]) -> Response:
+def check_twitch_live_status(params: Dict[str, str], context: Any = None, system_info: Any = None) -> Response:
     """Check if a Twitch user is currently live.
     
     Args:
-        params (Dict[str, str]): Dictionary containing 'username' key with Twitch username.
+        params (Dict[str, str]): Dictionary containing the required 'username' key
+            with the Twitch username.
+        context (Any): Conversation messages (unused).
+        system_info (Any): System information (unused).
     
     Returns:
         Response: Dictionary containing:
@@ -194,16 +188,15 @@ def check_twitch_live_status(params: Dict[str, str]) -> Response:
         }
     """
     global oauth_token
-    username = params.get("username")
-    
-    if not username:
-        return generate_response(False, "Missing required parameter: username")
-    
+    username = params["username"]
+
     if not oauth_token:
         oauth_token = get_oauth_token()
         if not oauth_token:
             return generate_response(False, "Failed to authenticate with Twitch")
-    
+
+    import requests
+
     try:
         headers = {
             "Client-ID": config.get("TWITCH_CLIENT_ID", ""),
@@ -234,95 +227,6 @@ def check_twitch_live_status(params: Dict[str, str]) -> Response:
         logging.error(f"Error checking Twitch live status: {e}")
         return generate_response(False, "Failed to check Twitch live status")
 
-def read_command() -> Optional[Dict[str, Any]]:
-    """Read command from stdin pipe.
-    
-    Reads data from Windows pipe in chunks until complete message is received.
-    Expects JSON-formatted input.
-    
-    Returns:
-        Optional[Dict[str, Any]]: Parsed command dictionary if successful,
-                                 None if reading or parsing fails.
-    
-    Expected Command Format:
-        {
-            "tool_calls": [
-                {
-                    "func": "command_name",
-                    "params": {
-                        "param1": "value1",
-                        ...
-                    }
-                }
-            ]
-        }
-    """
-    try:
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-        chunks = []
-        
-        while True:
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
-
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        retval = ''.join(chunks)
-        logging.info(f'Raw Input: {retval}')
-        return json.loads(retval)
-        
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        logging.exception("JSON decoding failed:")
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {e}')
-        return None
-
-def write_response(response: Response) -> None:
-    """Write response to stdout pipe.
-    
-    Writes JSON-formatted response to Windows pipe with <<END>> marker.
-    The marker is used by the reader to determine the end of the response.
-    
-    Args:
-        response (Response): Response dictionary to write.
-    
-    Response Format:
-        JSON-encoded dictionary followed by <<END>> marker.
-        Example: {"success":true,"message":"Plugin initialized successfully"}<<END>>
-    """
-    try:
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        
-        bytes_written = wintypes.DWORD()
-        windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            len(message_bytes),
-            bytes_written,
-            None
-        )
-    except Exception as e:
-        logging.error(f'Error writing response: {e}')
-
 def initialize() -> Response:
     """Initialize the plugin.
     
@@ -348,9 +252,8 @@ def shutdown() -> Response:
 def main() -> None:
     """Main plugin loop.
     
-    Sets up logging and enters main command processing loop.
-    Handles incoming commands and routes them to appropriate handlers.
-    Continues running until shutdown command is received.
+    Sets up logging, registers the command handlers and runs the plugin's
+    command loop until the shutdown command is received.
     
     Command Processing Flow:
         1. Read command from pipe
@@ -366,30 +269,13 @@ def main() -> None:
     """
     setup_logging()
     logging.info("Twitch Plugin Started")
-    
-    while True:
-        command = read_command()
-        if command is None:
-            logging.error('Error reading command')
-            continue
-        
-        tool_calls = command.get("tool_calls", [])
-        for tool_call in tool_calls:
-            func = tool_call.get("func")
-            params = tool_call.get("params", {})
-            
-            if func == "initialize":
-                response = initialize()
-            elif func == "check_twitch_live_status":
-                response = check_twitch_live_status(params)
-            elif func == "shutdown":
-                response = shutdown()
-                write_response(response)
-                return
-            else:
-                response = generate_response(False, "Unknown function call")
-            
-            write_response(response)
+
+    commands = {
+        "initialize": initialize,
+        "check_twitch_live_status": check_twitch_live_status,
+        "shutdown": shutdown,
+    }
+    Plugin(commands, error_message="", manifest=load_manifest()).run()
 
 if __name__ == "__main__":
     config = load_config()
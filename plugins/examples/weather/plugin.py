@@ -1,7 +1,8 @@
 """
 Weather Plugin - A Windows-based plugin that provides weather information for specified cities.
 
-This plugin communicates through standard input/output pipes and provides weather data
+This plugin communicates through standard input/output pipes (using the shared
+rise_plugin runtime) and provides weather data
 using the wttr.in service. It includes logging functionality and proper error handling.
 
 The plugin is a service that:
@@ -12,9 +13,8 @@ The plugin is a service that:
 
 Dependencies:
     - requests: For making HTTP requests to wttr.in
-    - ctypes: For Windows API interaction
+    - rise_plugin: For the pipe communication and command dispatch
     - logging: For operation logging
-    - json: For message serialization/deserialization
 
 Usage:
     The plugin is designed to be run as a Windows service and communicates through
@@ -40,11 +40,10 @@ Example Response Format:
 
 import json
 import sys
-import requests
 import logging
 import os
-from ctypes import byref, windll, wintypes
 from typing import Optional, Dict, Any
+from rise_plugin import Plugin, configure_logging, load_manifest
 
 # Type definitions
 Response = Dict[bool, Optional[str]]
@@ -52,19 +51,22 @@ Response = Dict[bool, Optional[str]]
 
 # Configure logging with a more detailed format
 LOG_FILE = os.path.join(os.environ.get('USERPROFILE', '.'), 'weather-plugin.log')
-logging.basicConfig(
-    filename=LOG_FILE,
+configure_logging(
+    LOG_FILE,
     level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
+    fmt="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
 )
 
-def get_weather_info(params: dict = None) -> dict:
+def get_weather_info(params: dict = None, context: dict = None, system_info: dict = None) -> dict:
     """
     Retrieves weather information for a specified city using the wttr.in service.
     
     Args:
-        params (dict, optional): Dictionary containing parameters. Must include 'city' key.
+        params (dict, optional): Dictionary containing parameters. Includes the 'city'
+            key, which the manifest marks as required.
             Example: {"city": "London"}
+        context (dict, optional): Conversation messages (unused).
+        system_info (dict, optional): System information (unused).
         
     Returns:
         dict: A dictionary containing:
@@ -81,13 +83,12 @@ def get_weather_info(params: dict = None) -> dict:
     Raises:
         No exceptions are raised. All errors are caught and returned in the response dict.
     """
-    if not params or "city" not in params:
-        logging.error("City parameter is required in get_weather_info")
-        return {"success": False, "message": "City parameter is required."}
-    
     city = params["city"]
     url = f"https://wttr.in/{city}?format=j1"
-    
+
+    # Imported by the first weather request, not when the plugin starts
+    import requests
+
     try:
         response = requests.get(url, timeout=10)  # Add timeout for better reliability
         if response.status_code == 200:
@@ -130,7 +131,7 @@ def main():
     """
     Main entry point for the weather plugin.
     
-    Sets up command handling and maintains the main event loop for processing commands.
+    Registers the command handlers and runs the plugin's command loop.
     The plugin supports the following commands:
         - initialize: Initializes the plugin
         - shutdown: Terminates the plugin
@@ -145,125 +146,17 @@ def main():
         4. Writes the response to standard output
         
     Error Handling:
-        - Invalid commands are logged and ignored
+        - Invalid commands are logged and answered with an error response
         - Communication errors are logged
         - All errors are caught and handled gracefully
     """
-    INITIALIZE_COMMAND = 'initialize'
-    SHUTDOWN_COMMAND = 'shutdown'
-    GET_WEATHER_INFO_COMMAND = 'get_weather_info'
-
     commands = {
-        'initialize': lambda _: {"success": True, "message": "Plugin initialized"},
-        'shutdown': lambda _: {"success": True, "message": "Plugin shutdown"},
+        'initialize': lambda: {"success": True, "message": "Plugin initialized"},
+        'shutdown': lambda: {"success": True, "message": "Plugin shutdown"},
         'get_weather_info': get_weather_info,
     }
-    
-    while True:
-        command = read_command()
-        if command is None:
-            logging.error('Error reading command')
-            continue
-        
-        tool_calls = command.get("tool_calls", [])
-        for tool_call in tool_calls:
-            logging.info(f"Tool call: {tool_call}")
-            func = tool_call.get("func")
-            logging.info(f"Function: {func}")
-            params = tool_call.get("params", {})
-            logging.info(f"Params: {params}")
-            
-            if func == INITIALIZE_COMMAND:
-                response = commands.get(INITIALIZE_COMMAND, lambda _: {"success": False, "message": "Unknown command"})()
-            elif func == GET_WEATHER_INFO_COMMAND:
-                logging.info(f"Getting weather info for {params}")
-                response = get_weather_info(params)
-                logging.info(f"Weather info: {response}")
-            elif func == SHUTDOWN_COMMAND:
-                response = commands.get(SHUTDOWN_COMMAND, lambda _: {"success": False, "message": "Unknown command"})()
-                write_response(response)
-                return
-            else:
-                response = {'success': False, 'message': "Unknown function call"}
-            
-            write_response(response)
-    
-def read_command() -> dict | None:
-    ''' Reads a command from the communication pipe.
-
-    Returns:
-        Command details if the input was proper JSON; `None` otherwise
-    '''
-    try:
-        STD_INPUT_HANDLE = -10
-        pipe = windll.kernel32.GetStdHandle(STD_INPUT_HANDLE)
-
-        # Read in chunks until we get the full message
-        chunks = []
-        while True:
-            BUFFER_SIZE = 4096
-            message_bytes = wintypes.DWORD()
-            buffer = bytes(BUFFER_SIZE)
-            success = windll.kernel32.ReadFile(
-                pipe,
-                buffer,
-                BUFFER_SIZE,
-                byref(message_bytes),
-                None
-            )
 
-            if not success:
-                logging.error('Error reading from command pipe')
-                return None
-            
-            # Add the chunk we read
-            chunk = buffer.decode('utf-8')[:message_bytes.value]
-            chunks.append(chunk)
-
-             # If we read less than the buffer size, we're done
-            if message_bytes.value < BUFFER_SIZE:
-                break
-
-        # Combine all chunks and parse JSON
-        retval = ''.join(chunks)
-        return json.loads(retval)
-
-    except json.JSONDecodeError:
-        logging.error(f'Received invalid JSON: {retval}')
-        return None
-    except Exception as e:
-        logging.error(f'Exception in read_command(): {str(e)}')
-        return None
-
-
-def write_response(response:Response) -> None:
-    ''' Writes a response to the communication pipe.
-
-    Parameters:
-        response: Response
-    '''
-    try:
-        STD_OUTPUT_HANDLE = -11
-        pipe = windll.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
-
-        json_message = json.dumps(response) + '<<END>>'
-        message_bytes = json_message.encode('utf-8')
-        message_len = len(message_bytes)
-
-        bytes_written = wintypes.DWORD()
-        success = windll.kernel32.WriteFile(
-            pipe,
-            message_bytes,
-            message_len,
-            bytes_written,
-            None
-        )
-
-        if not success:
-            logging.error('Error writing to response pipe')
-
-    except Exception as e:
-        logging.error(f'Exception in write_response(): {str(e)}')
+    Plugin(commands, error_message='', manifest=load_manifest()).run()
 
 
 if __name__ == '__main__':
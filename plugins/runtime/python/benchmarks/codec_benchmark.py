@@ -0,0 +1,95 @@
+"""
+Codec and input filter benchmark for plugin messages
+
+Builds a command carrying about 100 KB of conversation context, like the
+ones the plugin manager sends to the Gmail and Gemini plugins, and reports
+for every installed codec the time to split and parse it from the raw bytes
+and to serialize a response echoing it. It also compares unescape_printable
+with the per-character filter it replaced.
+
+Usage:
+    python benchmarks/codec_benchmark.py [--iterations 200] [--context-size 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise_plugin.codec import CODECS  # noqa: E402
+from rise_plugin.framing import FrameDecoder  # noqa: E402
+from rise_plugin.transport import unescape_printable  # noqa: E402
+
+TURNS = [
+    'Summarize my unread emails from today, please.',
+    'You have 3 unread emails:\n1. "Build failed" from CI\t(09:12)\n2. Lunch on Friday?\n3. Invoice #4411',
+    "What's the weather like in Zürich — and should I take an umbrella?",
+    'It is 14°C and cloudy in Zürich with a 60% chance of rain ☔; take the umbrella.',
+]
+
+
+def per_character_filter(text: str) -> str:
+    """The input clean-up the plugins used before unescape_printable."""
+    text = text.encode('utf-8').decode('raw_unicode_escape')
+    return ''.join(ch for ch in text if ch.isprintable() or ch in '\n\t\r')
+
+
+def build_command(size: int) -> dict:
+    messages = []
+    length = 0
+    while length < size:
+        content = TURNS[len(messages) % len(TURNS)]
+        messages.append({'role': 'user' if len(messages) % 2 == 0 else 'assistant', 'content': content})
+        length += len(content) + 40
+    return {'tool_calls': [{'func': 'query_gemini', 'params': {'query': 'and tomorrow?'}}],
+            'messages': messages, 'system_info': 'GPU: GeForce RTX 4090'}
+
+
+def measure(function, iterations: int) -> float:
+    """Median time of one call, in milliseconds."""
+    samples = timeit.repeat(function, number=1, repeat=iterations)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e3
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--context-size', type=int, default=100000,
+                        help='Approximate size of the conversation context in characters')
+    args = parser.parse_args()
+
+    command = build_command(args.context_size)
+    data = json.dumps(command).encode('utf-8')
+    response = {'success': True, 'message': json.dumps(command['messages'])}
+    print(f'Command: {len(data)} bytes, {len(command["messages"])} messages')
+
+    print(f'{"codec":>8} {"parse ms":>9} {"serialize ms":>13}')
+    for name, codec_class in CODECS.items():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f'{name:>8} {"not installed":>23}')
+            continue
+
+        def parse():
+            frames = FrameDecoder(codec).feed(data)
+            return frames[0].value if frames[0].value is not None else codec.loads(frames[0].text)
+
+        assert parse() == command
+        print(f'{name:>8} {measure(parse, args.iterations):>9.3f} '
+              f'{measure(lambda: codec.dumps(response), args.iterations):>13.3f}')
+
+    text = data.decode('utf-8')
+    assert unescape_printable(text) == per_character_filter(text)
+    print(f'\n{"input filter":>22} {"ms":>8}')
+    print(f'{"per-character":>22} {measure(lambda: per_character_filter(text), args.iterations):>8.3f}')
+    print(f'{"unescape_printable":>22} {measure(lambda: unescape_printable(text), args.iterations):>8.3f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
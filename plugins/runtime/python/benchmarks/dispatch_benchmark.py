@@ -0,0 +1,53 @@
+"""
+Dispatch benchmark for commands with several tool calls
+
+Dispatches commands such as "set the lights red and check the weather",
+whose tool calls wait on I/O, once with the tool calls run one after the
+other (max_workers=1) and once with the default thread pool, and reports
+the time per command.
+
+Usage:
+    python benchmarks/dispatch_benchmark.py [--iterations 20] [--calls 4] [--latency 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise_plugin import Plugin, generate_success_response  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--calls', type=int, default=4, help='Tool calls per command')
+    parser.add_argument('--latency', type=float, default=50, help='Latency of each tool call in milliseconds')
+    args = parser.parse_args()
+
+    def slow_call(params=None, context=None, system_info=None):
+        time.sleep(args.latency / 1e3)
+        return generate_success_response(f'done {params["index"]}')
+
+    command = {'tool_calls': [{'func': 'slow_call', 'params': {'index': index}} for index in range(args.calls)]}
+    expected = '\n'.join(f'done {index}' for index in range(args.calls))
+
+    print(f'{args.calls} tool calls of {args.latency:g} ms each')
+    print(f'{"max_workers":>11} {"median ms":>10}')
+    for max_workers in (1, Plugin().max_workers):
+        plugin = Plugin({'slow_call': slow_call}, max_workers=max_workers)
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            response = plugin.dispatch(command)
+            samples.append(time.perf_counter() - start)
+            assert response['success'] and response['message'] == expected, response
+        print(f'{max_workers:>11} {statistics.median(samples) * 1e3:>10.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Logging overhead benchmark
+
+Measures the time the command loop spends logging one command and its
+response, for a command carrying conversation context, with:
+
+- the synchronous file logging plugins used to set up with
+  logging.basicConfig(), logging the whole command and response, and
+- configure_logging(), which hands abbreviated records to a background
+  thread writing a rotating log file.
+
+Usage:
+    python benchmarks/logging_benchmark.py [--iterations 500] [--context-size 100000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rise_plugin import abbreviate, configure_logging, stop_logging  # noqa: E402
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def reset_logging() -> None:
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(log_command, command: dict, response: dict, iterations: int) -> float:
+    """Median time to log a command and its response, in milliseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        log_command(command, response)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e3
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--context-size', type=int, default=100000,
+                        help='Approximate size of the conversation context in characters')
+    args = parser.parse_args()
+
+    turn = {'role': 'user', 'content': 'Set my keyboard lighting to red and tell me the weather in Santa Clara.'}
+    command = {'tool_calls': [{'func': 'query_gemini', 'params': {'query': 'and tomorrow?'}}],
+               'messages': [turn] * (args.context_size // 100)}
+    response = {'success': True, 'message': 'Tomorrow will be sunny with a high of 24°C.'}
+    logger = logging.getLogger('rise_plugin.dispatcher')
+
+    def log_whole(command, response):
+        logger.info(f'Received input: {command}')
+        logger.info(f'Sending response: {response}')
+
+    def log_abbreviated(command, response):
+        logger.info('Received input: %s', abbreviate(command))
+        logger.info('Sending response: %s', abbreviate(response))
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, 'plugin.log')
+
+        logging.basicConfig(filename=log_file, level=logging.INFO, format=FORMAT)
+        synchronous = measure(log_whole, command, response, args.iterations)
+        reset_logging()
+
+        configure_logging(log_file, level=logging.INFO)
+        queued = measure(log_abbreviated, command, response, args.iterations)
+        stop_logging()
+        reset_logging()
+
+    print(f'{"logging":>24} {"ms per command":>15}')
+    print(f'{"basicConfig, whole":>24} {synchronous:>15.3f}')
+    print(f'{"configure_logging":>24} {queued:>15.3f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
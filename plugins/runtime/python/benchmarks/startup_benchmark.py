@@ -0,0 +1,102 @@
+"""
+Plugin startup benchmark
+
+Spawns plugins on the stdio transport, the way the plugin manager does over
+its pipes, and measures the time from starting the process to the response
+to the "initialize" command: how long the user waits before a plugin that
+is not yet running can act on its first tool call.
+
+Each argument is a plugin script or a plugin directory (the Python file in
+it that imports rise_plugin is run). Without arguments, the example plugins
+and the Python template are measured. The plugins run with USERPROFILE and
+PROGRAMDATA pointing to a temporary directory, so they find no configuration
+and write their logs there. A plugin that fails to start, e.g. because its
+dependencies are not installed, is reported and skipped.
+
+With --max-ms, the exit status is 1 if a plugin's median time to the first
+response exceeds that many milliseconds.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 10] [--python PATH] [--max-ms 500] [plugin ...]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from transport_benchmark import RUNTIME_DIR, PluginProcess
+
+PLUGINS_DIR = os.path.dirname(os.path.dirname(RUNTIME_DIR))
+# The Python example plugins and the Python template
+DEFAULT_PLUGINS = sorted(os.path.dirname(path) for path in glob.glob(os.path.join(PLUGINS_DIR, 'examples', '*', '*.py'))
+                         if os.path.basename(path) in ('plugin.py', f'{os.path.basename(os.path.dirname(path))}.py'))
+DEFAULT_PLUGINS.append(os.path.join(PLUGINS_DIR, 'templates', 'python'))
+
+
+def find_script(path: str) -> str:
+    """The plugin script at path, or the one in the plugin directory at path."""
+    if os.path.isfile(path):
+        return path
+    for script in sorted(glob.glob(os.path.join(path, '*.py'))):
+        with open(script, encoding='utf-8', errors='replace') as file:
+            if 'rise_plugin' in file.read():
+                return script
+    raise FileNotFoundError(f'No plugin script in {path}')
+
+
+def time_to_first_response(python: str, script: str, directory: str) -> float:
+    """Seconds from spawning the plugin to its response to "initialize"."""
+    env = dict(os.environ, RISE_PLUGIN_TRANSPORT='stdio', USERPROFILE=directory, PROGRAMDATA=directory,
+               PYTHONPATH=os.pathsep.join(filter(None, [RUNTIME_DIR, os.environ.get('PYTHONPATH')])))
+    with tempfile.TemporaryFile() as errors:
+        start = time.perf_counter()
+        plugin = PluginProcess([python, script], env=env, cwd=directory, stderr=errors)
+        try:
+            plugin.initialize()
+            elapsed = time.perf_counter() - start
+            plugin.close()
+        except Exception:
+            plugin.process.kill()
+            plugin.process.wait()
+            errors.seek(0)
+            lines = errors.read().decode('utf-8', 'replace').strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else 'Plugin exited') from None
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('plugins', nargs='*', default=DEFAULT_PLUGINS,
+                        help='Plugin scripts or directories (default: the examples and the Python template)')
+    parser.add_argument('--runs', type=int, default=10, help='Times each plugin is started')
+    parser.add_argument('--python', default=sys.executable, help='Interpreter running the plugins')
+    parser.add_argument('--max-ms', type=float,
+                        help='Exit with status 1 if a median time to first response exceeds this')
+    args = parser.parse_args()
+
+    over_budget = False
+    print(f'{"plugin":>12} {"median ms":>10} {"min ms":>8} {"max ms":>8}')
+    for path in args.plugins:
+        name = os.path.basename(os.path.normpath(path))
+        try:
+            script = find_script(path)
+            samples = []
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as directory:
+                    samples.append(time_to_first_response(args.python, os.path.abspath(script), directory))
+        except Exception as e:
+            print(f'{name:>12} failed: {e}')
+            continue
+        median = statistics.median(samples) * 1e3
+        print(f'{name:>12} {median:>10.1f} {min(samples) * 1e3:>8.1f} {max(samples) * 1e3:>8.1f}')
+        if args.max_ms is not None and median > args.max_ms:
+            over_budget = True
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Round-trip benchmark for the plugin transport
+
+Spawns a small plugin on the stdio transport, drives it over its standard
+input/output the way the plugin manager does, and reports the round-trip
+latency for commands of several sizes. The payloads mix multi-byte UTF-8
+characters into the text, and the plugin echoes the length it decoded, so a
+command that was split or decoded wrongly fails the run.
+
+With --framing length-prefixed, the benchmark negotiates length-prefixed
+messages in the initialize command, as a plugin manager supporting them would.
+
+Usage:
+    python benchmarks/transport_benchmark.py [--iterations 200] [--sizes 100,4096,65536]
+                                             [--framing delimited|length-prefixed]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import time
+
+RUNTIME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+END_MARKER = b'<<END>>'
+LENGTH = struct.Struct('>I')
+
+PLUGIN_SOURCE = '''
+from rise_plugin import Plugin, generate_success_response
+
+def echo(params=None, context=None, system_info=None):
+    return generate_success_response(str(len(params.get('text', ''))))
+
+Plugin({
+    'initialize': lambda: generate_success_response('initialize success.'),
+    'shutdown': lambda: generate_success_response('shutdown success.'),
+    'echo': echo,
+}).run()
+'''
+
+
+class PluginProcess:
+    """A plugin child process driven over its standard streams."""
+
+    def __init__(self, args, env=None, **popen_args):
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, **popen_args)
+        self.pending = b''
+        self.length_prefixed = False
+
+    def initialize(self, framing: str = 'delimited') -> dict:
+        """Send the initialize command, asking for the given framing."""
+        command = {'tool_calls': [{'func': 'initialize'}]}
+        if framing != 'delimited':
+            command['framing'] = framing
+        response = self.request(command)
+        if response.get('framing', 'delimited') != framing:
+            raise RuntimeError(f'Plugin did not accept {framing} framing')
+        self.length_prefixed = framing == 'length-prefixed'
+        return response
+
+    def _fill(self, size: int) -> None:
+        data = os.read(self.process.stdout.fileno(), max(size, 65536))
+        if not data:
+            raise RuntimeError('Plugin exited')
+        self.pending += data
+
+    def send(self, command: dict) -> None:
+        payload = json.dumps(command, ensure_ascii=False).encode('utf-8')
+        if self.length_prefixed:
+            payload = LENGTH.pack(len(payload)) + payload
+        self.process.stdin.write(payload)
+        self.process.stdin.flush()
+
+    def receive(self) -> dict:
+        if self.length_prefixed:
+            while len(self.pending) < LENGTH.size:
+                self._fill(LENGTH.size)
+            (length,) = LENGTH.unpack_from(self.pending)
+            while len(self.pending) < LENGTH.size + length:
+                self._fill(LENGTH.size + length - len(self.pending))
+            message = self.pending[LENGTH.size:LENGTH.size + length]
+            self.pending = self.pending[LENGTH.size + length:]
+        else:
+            while END_MARKER not in self.pending:
+                self._fill(65536)
+            message, self.pending = self.pending.split(END_MARKER, 1)
+        return json.loads(message)
+
+    def request(self, command: dict) -> dict:
+        self.send(command)
+        return self.receive()
+
+    def close(self) -> None:
+        try:
+            self.request({'tool_calls': [{'func': 'shutdown'}]})
+        finally:
+            self.process.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sizes', default='100,4000,65536,1048576',
+                        help='Comma-separated command payload sizes in characters')
+    parser.add_argument('--framing', choices=('delimited', 'length-prefixed'), default='delimited')
+    args = parser.parse_args()
+
+    env = dict(os.environ, RISE_PLUGIN_TRANSPORT='stdio',
+               PYTHONPATH=os.pathsep.join(filter(None, [RUNTIME_DIR, os.environ.get('PYTHONPATH')])))
+    plugin = PluginProcess([sys.executable, '-c', PLUGIN_SOURCE], env=env)
+    try:
+        plugin.initialize(args.framing)
+        print(f'{"size":>8} {"median ms":>10} {"p95 ms":>8} {"cmd/s":>8}')
+        for size in (int(s) for s in args.sizes.split(',')):
+            text = ('ab\u20ac' * size)[:size]
+            command = {'tool_calls': [{'func': 'echo', 'params': {'text': text}}]}
+            samples = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                response = plugin.request(command)
+                samples.append(time.perf_counter() - start)
+                assert response == {'success': True, 'message': str(size)}, response
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f'{size:>8} {statistics.median(samples) * 1e3:>10.3f} {p95 * 1e3:>8.3f} '
+                  f'{len(samples) / sum(samples):>8.0f}')
+    finally:
+        plugin.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+G-Assist plugin runtime
+
+Shared pipe transport, command dispatcher and response helpers for Python
+plugins. A plugin registers its handlers and runs the loop:
+
+    from rise_plugin import Plugin, generate_success_response
+
+    def execute_initialize_command():
+        return generate_success_response('initialize success.')
+
+    def execute_hello_command(params=None, context=None, system_info=None):
+        return generate_success_response(f'Hello {params.get("name")}!')
+
+    Plugin({
+        'initialize': execute_initialize_command,
+        'hello': execute_hello_command,
+    }).run()
+"""
+
+import logging
+
+from .codec import JsonCodec, open_codec
+from .dispatcher import Plugin
+from .framing import DELIMITED_FRAMING, LENGTH_PREFIXED_FRAMING
+from .lifecycle import Lifecycle
+from .log import abbreviate, configure_logging, stop_logging
+from .manifest import Manifest, ValidationError, load_manifest
+from .responses import (Response, generate_batch_response, generate_failure_response, generate_message_response,
+                        generate_success_response)
+from .transport import (StdioTransport, Transport, WindowsPipeTransport, open_transport, remove_unprintable,
+                        unescape_printable)
+
+# Plugins configure logging themselves; stay quiet if they do not
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+__all__ = [
+    'DELIMITED_FRAMING',
+    'JsonCodec',
+    'LENGTH_PREFIXED_FRAMING',
+    'Lifecycle',
+    'Manifest',
+    'Plugin',
+    'Response',
+    'StdioTransport',
+    'Transport',
+    'ValidationError',
+    'WindowsPipeTransport',
+    'abbreviate',
+    'configure_logging',
+    'generate_batch_response',
+    'generate_failure_response',
+    'generate_message_response',
+    'generate_success_response',
+    'load_manifest',
+    'open_codec',
+    'open_transport',
+    'remove_unprintable',
+    'stop_logging',
+    'unescape_printable',
+]
@@ -0,0 +1,143 @@
+"""
+JSON codecs for plugin messages
+
+Every command is parsed and every response serialized by the transport's
+codec. The standard library codec is the default; orjson and msgspec are
+faster and are used when selected and installed:
+
+- "json": the standard library (default)
+- "orjson": orjson, if installed
+- "msgspec": msgspec, if installed
+- "auto": the fastest installed codec
+
+The RISE_PLUGIN_CODEC environment variable selects the codec when the
+plugin does not pass one to open_transport().
+
+Codecs raise ValueError for text that is not valid JSON and TypeError for
+values that cannot be serialized, whichever library they use.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CODEC_ENV = 'RISE_PLUGIN_CODEC'
+DEFAULT_CODEC = 'json'
+
+
+class JsonCodec:
+    """Codec backed by the standard library json module."""
+
+    name = 'json'
+    # loads() of a message that arrives alone is faster than raw_decode()
+    parses_whole = False
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+
+    def loads(self, text: str) -> Any:
+        """Parse a message."""
+        return json.loads(text)
+
+    def dumps(self, value: Any) -> bytes:
+        """Serialize a message as UTF-8 JSON."""
+        return json.dumps(value).encode('utf-8')
+
+    def raw_decode(self, text: str, pos: int) -> Tuple[Any, int]:
+        """
+        Parse the JSON value starting at pos, which may be followed by more text.
+
+        Returns:
+            Tuple[Any, int]: The value and the position after it
+        """
+        return self._decoder.raw_decode(text, pos)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson."""
+
+    name = 'orjson'
+    parses_whole = True
+
+    def __init__(self):
+        super().__init__()
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, text: str) -> Any:
+        return self._orjson.loads(text)
+
+    def dumps(self, value: Any) -> bytes:
+        # Dictionaries with integer keys serialize as they do with json
+        return self._orjson.dumps(value, option=self._orjson.OPT_NON_STR_KEYS)
+
+
+class MsgspecCodec(JsonCodec):
+    """Codec backed by msgspec."""
+
+    name = 'msgspec'
+    parses_whole = True
+
+    def __init__(self):
+        super().__init__()
+        import msgspec
+
+        self._msgspec = msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._json_decoder = msgspec.json.Decoder()
+
+    def loads(self, text: str) -> Any:
+        try:
+            return self._json_decoder.decode(text)
+        except self._msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return self._encoder.encode(value)
+        except self._msgspec.EncodeError as e:
+            raise TypeError(str(e)) from e
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+}
+# Tried in order for "auto"
+_FASTEST_FIRST = (OrjsonCodec, MsgspecCodec, JsonCodec)
+
+
+def open_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Create a codec.
+
+    Args:
+        name: "json", "orjson", "msgspec" or "auto"; defaults to
+            RISE_PLUGIN_CODEC, then to "json". A codec whose library is not
+            installed falls back to "json".
+
+    Returns:
+        JsonCodec: The codec
+
+    Raises:
+        ValueError: If the codec name is unknown
+    """
+    name = name or os.environ.get(CODEC_ENV) or DEFAULT_CODEC
+    if name == 'auto':
+        candidates = _FASTEST_FIRST
+    elif name in CODECS:
+        candidates = (CODECS[name], JsonCodec)
+    else:
+        raise ValueError(f'Unknown JSON codec: {name}')
+    for codec in candidates:
+        try:
+            return codec()
+        except ImportError:
+            if name != 'auto':
+                logger.warning(f'{name} is not installed, using the json codec')
+    return JsonCodec()
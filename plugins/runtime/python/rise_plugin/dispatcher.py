@@ -0,0 +1,348 @@
+"""
+Command dispatch for G-Assist plugins
+
+A Plugin maps function names to handlers and runs the command loop: read a
+command from the transport, call the handlers for its tool calls and write the
+response back, until the "shutdown" command arrives or the plugin manager
+closes the pipe.
+
+Handlers for "initialize" and "shutdown" take no arguments. All other
+handlers are called as handler(params, context, system_info), where params
+are the tool call's parameters, context the conversation messages and
+system_info the system information sent with the command.
+
+The plugin is initialized once (see rise_plugin.lifecycle): by the
+"initialize" command, or before the first other command if it did not
+succeed.
+
+Given the plugin's manifest (see rise_plugin.manifest), the dispatcher
+validates the parameters of each tool call against the function's
+properties before the plugin is initialized or the handler runs, and
+answers a malformed call with a failure. If the manifest could not be
+loaded, every call other than "initialize" and "shutdown" is answered with
+a failure, since none of them can be validated.
+
+The tool calls of one command run concurrently on a bounded thread pool, so
+a command asking for several independent actions takes as long as the
+slowest of them. "initialize" and "shutdown" calls run on their own, after
+the calls before them have finished. A command with several tool calls gets
+one response listing the results in order (see generate_batch_response()).
+
+A plugin manager that supports length-prefixed framing asks for it with a
+"framing" property on the command carrying the "initialize" tool call. The
+plugin echoes the framing it accepted in the initialize response, which is
+still delimited, and both sides use that framing from the next message on.
+Plugin managers that do not ask keep the delimited framing.
+"""
+
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from .framing import FRAMINGS
+from .lifecycle import Hook, Lifecycle
+from .log import abbreviate
+from .manifest import Manifest, ValidationError
+from .responses import Response, generate_batch_response, generate_failure_response
+from .transport import Transport, open_transport
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TOOL_CALLS_PROPERTY = 'tool_calls'
+FUNCTION_PROPERTY = 'func'
+# Plugins have received their parameters under either name
+PARAMS_PROPERTIES = ('params', 'properties')
+CONTEXT_PROPERTY = 'messages'
+SYSTEM_INFO_PROPERTY = 'system_info'
+INITIALIZE_COMMAND = 'initialize'
+SHUTDOWN_COMMAND = 'shutdown'
+FRAMING_PROPERTY = 'framing'
+
+Handler = Callable[..., Response]
+# Function name, params, context and system_info of a tool call
+Call = Tuple[str, Any, Any, Any]
+
+
+def get_params(command: Dict[str, Any], tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    """Parameters of a tool call, looked up on the tool call first and then on the command."""
+    for source in (tool_call, command):
+        for name in PARAMS_PROPERTIES:
+            if source.get(name) is not None:
+                return source[name]
+    return {}
+
+
+class Plugin:
+    """A plugin's command handlers and its command loop."""
+
+    def __init__(self, commands: Optional[Mapping[str, Handler]] = None,
+                 transport: Optional[Transport] = None, error_message: str = 'Plugin Error!',
+                 reinitialize_on_failure: bool = False, lowercase_commands: bool = False,
+                 max_workers: int = 4, call_timeout: Optional[float] = None,
+                 manifest: Optional[Manifest] = None):
+        """
+        Args:
+            commands: Initial mapping of function names to handlers
+            transport: Transport to use; opened with open_transport() on first use
+            error_message: Prefix of the failure messages the dispatcher generates
+            reinitialize_on_failure: Initialize again before the next command
+                after a call fails, e.g. to reconnect to a device
+            lowercase_commands: Match function names case-insensitively
+            max_workers: Tool calls of one command run at the same time; 1
+                runs them one after the other, for handlers that are not
+                thread-safe or whose order matters
+            call_timeout: Seconds after which a tool call is answered with a
+                failure. The handler is not interrupted and keeps its worker
+                until it returns.
+            manifest: The plugin's manifest (see load_manifest()), to validate
+                the parameters of the functions it declares. Tool calls fail
+                if it could not be loaded.
+        """
+        self.commands: Dict[str, Handler] = dict(commands or {})
+        self._transport = transport
+        self.error_message = error_message
+        self.reinitialize_on_failure = reinitialize_on_failure
+        self.lifecycle = Lifecycle()
+        self.lowercase_commands = lowercase_commands
+        self.max_workers = max(1, max_workers)
+        self.call_timeout = call_timeout
+        self.shutdown_requested = False
+        self._executor: Optional['ThreadPoolExecutor'] = None
+        self.manifest = manifest
+        # Parameter validator of each function declared in the manifest
+        self.validators: Dict[str, Callable[[Any], Dict[str, Any]]] = {}
+        if manifest is not None:
+            for name, signature in manifest.functions.items():
+                self.validators[name.lower() if lowercase_commands else name] = signature.validate
+
+    @property
+    def transport(self) -> Transport:
+        if self._transport is None:
+            self._transport = open_transport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: Transport) -> None:
+        self._transport = transport
+
+    def register(self, name: str, handler: Handler) -> None:
+        """Register the handler for a function name, replacing any previous one."""
+        self.commands[name] = handler
+
+    def register_commands(self, commands: Mapping[str, Handler]) -> None:
+        """Register several handlers at once."""
+        self.commands.update(commands)
+
+    def command(self, name: Optional[str] = None) -> Callable[[Handler], Handler]:
+        """
+        Decorator registering a handler.
+
+        Args:
+            name: Function name; defaults to the handler's own name
+        """
+        def decorator(handler: Handler) -> Handler:
+            self.register(name or handler.__name__, handler)
+            return handler
+        return decorator
+
+    def on_setup(self, hook: Hook) -> Hook:
+        """Register a hook acquiring resources when the plugin initializes; usable as a decorator."""
+        return self.lifecycle.on_setup(hook)
+
+    def on_teardown(self, hook: Hook) -> Hook:
+        """Register a hook releasing resources when the plugin shuts down; usable as a decorator."""
+        return self.lifecycle.on_teardown(hook)
+
+    def failure(self, message: str) -> Response:
+        """Failure response for an error detected by the dispatcher, prefixed with error_message."""
+        return generate_failure_response(f'{self.error_message} {message}' if self.error_message else message)
+
+    def send(self, response: Response) -> bool:
+        """Write a response right away, e.g. a partial message from a streaming handler."""
+        return self.transport.write_response(response)
+
+    def call(self, cmd: str, params: Any = None, context: Any = None, system_info: Any = None) -> Response:
+        """
+        Call the handler registered for a function name, initializing the
+        plugin first if it is not ready.
+
+        Exceptions raised by the handler are logged and turned into a failure response.
+        """
+        handler = self.commands.get(cmd)
+        if handler is None:
+            logger.warning(f'Unknown command: {cmd}')
+            return self.failure(f'Unknown command: {cmd}')
+        try:
+            if cmd == INITIALIZE_COMMAND:
+                return self.lifecycle.initialize(handler)
+            if cmd == SHUTDOWN_COMMAND:
+                return self.lifecycle.shutdown(handler)
+            self.lifecycle.ensure_ready(self.commands.get(INITIALIZE_COMMAND))
+            response = handler(params, context, system_info)
+        except Exception as e:
+            logger.exception(f'Error executing command {cmd}')
+            response = self.failure(str(e))
+        if self.reinitialize_on_failure and isinstance(response, dict) and response.get('success') is False:
+            self.lifecycle.invalidate()
+        return response
+
+    def requested_framing(self, command: Dict[str, Any]) -> Optional[str]:
+        """
+        Framing the plugin manager asks for with an "initialize" command.
+
+        Returns:
+            Optional[str]: The requested framing, if this plugin supports it
+        """
+        tool_calls = command.get(TOOL_CALLS_PROPERTY)
+        if not isinstance(tool_calls, list):
+            return None
+        for tool_call in tool_calls:
+            if not isinstance(tool_call, dict):
+                continue
+            cmd = tool_call.get(FUNCTION_PROPERTY)
+            if self.lowercase_commands and isinstance(cmd, str):
+                cmd = cmd.lower()
+            if cmd == INITIALIZE_COMMAND:
+                framing = command.get(FRAMING_PROPERTY, tool_call.get(FRAMING_PROPERTY))
+                if framing is None:
+                    return None
+                if framing not in FRAMINGS:
+                    logger.warning(f'Unsupported framing requested: {framing}')
+                    return None
+                return framing
+        return None
+
+    def dispatch(self, command: Dict[str, Any]) -> Response:
+        """
+        Execute the tool calls of a command.
+
+        Returns:
+            Response: The response of the tool call if there is one, the
+            results of all of them combined by generate_batch_response() if
+            there are several, or a failure response if the command is malformed
+        """
+        tool_calls = command.get(TOOL_CALLS_PROPERTY)
+        if not isinstance(tool_calls, list):
+            logger.warning('Malformed input: missing tool_calls property')
+            return self.failure('Malformed input.')
+        if not tool_calls:
+            logger.warning('Malformed input: no tool calls')
+            return self.failure('Malformed input.')
+
+        results: List[Optional[Response]] = []
+        batch: List[Tuple[int, Call]] = []
+        for tool_call in tool_calls:
+            call = self._prepare(command, tool_call)
+            if isinstance(call, dict):
+                results.append(call)
+                continue
+            logger.info(f'Processing command: {call[0]}')
+            if call[0] == INITIALIZE_COMMAND or call[0] == SHUTDOWN_COMMAND:
+                # Lifecycle calls see the effects of the calls before them
+                self._execute(batch, results)
+                batch = []
+                results.append(self.call(*call))
+                if call[0] == SHUTDOWN_COMMAND:
+                    self.shutdown_requested = True
+            else:
+                results.append(None)
+                batch.append((len(results) - 1, call))
+        self._execute(batch, results)
+
+        return results[0] if len(results) == 1 else generate_batch_response(results)
+
+    def _prepare(self, command: Dict[str, Any], tool_call: Any) -> Union[Call, Response]:
+        """The arguments of a tool call, or a failure response if it is malformed."""
+        if not isinstance(tool_call, dict) or FUNCTION_PROPERTY not in tool_call:
+            logger.warning('Malformed input: missing function property')
+            return self.failure('Malformed input.')
+        cmd = tool_call[FUNCTION_PROPERTY]
+        if self.lowercase_commands and isinstance(cmd, str):
+            cmd = cmd.lower()
+        if (self.manifest is not None and self.manifest.error is not None
+                and cmd != INITIALIZE_COMMAND and cmd != SHUTDOWN_COMMAND):
+            logger.warning(f'Rejected call to {cmd}: the manifest could not be loaded')
+            return self.failure('The plugin manifest could not be loaded.')
+        params = get_params(command, tool_call)
+        validate = self.validators.get(cmd) if isinstance(cmd, str) else None
+        if validate is not None:
+            try:
+                params = validate(params)
+            except ValidationError as e:
+                logger.warning(f'Rejected call to {cmd}: {str(e)}')
+                return self.failure(str(e))
+        return (
+            cmd,
+            params,
+            command.get(CONTEXT_PROPERTY, tool_call.get(CONTEXT_PROPERTY)),
+            command.get(SYSTEM_INFO_PROPERTY, tool_call.get(SYSTEM_INFO_PROPERTY)),
+        )
+
+    def _execute(self, batch: List[Tuple[int, Call]], results: List[Optional[Response]]) -> None:
+        """Run a batch of tool calls, storing each response at its index in results."""
+        if self.call_timeout is None and (len(batch) == 1 or self.max_workers == 1):
+            for index, call in batch:
+                results[index] = self.call(*call)
+            return
+
+        # Imported here: most commands carry one tool call and never start the pool
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='tool-call')
+        # Submit no more calls than there are workers, so every call's timeout
+        # starts when the call does
+        for start in range(0, len(batch), self.max_workers):
+            chunk = batch[start:start + self.max_workers]
+            futures = [self._executor.submit(self.call, *call) for _, call in chunk]
+            done, _ = wait(futures, timeout=self.call_timeout)
+            for (index, call), future in zip(chunk, futures):
+                if future in done:
+                    results[index] = future.result()
+                else:
+                    logger.error(f'Command {call[0]} timed out after {self.call_timeout} seconds')
+                    results[index] = self.failure(f'{call[0]} timed out.')
+
+    def run(self) -> int:
+        ''' Runs the command loop.
+
+        Sits in a loop reading commands from the transport. Each command is
+        dispatched and its response written back. The loop ends after the
+        "shutdown" command or when the plugin manager closes the pipe.
+
+        Returns:
+            0 when the loop ended normally
+        '''
+        transport = self.transport
+        logger.info('Plugin started')
+        for name in self.validators:
+            if name not in self.commands:
+                logger.warning(f'No handler for manifest function {name}')
+        while not self.shutdown_requested:
+            command = transport.read_command()
+            if command is None:
+                if transport.closed:
+                    logger.info('Command pipe closed')
+                    break
+                logger.error('Error reading command')
+                continue
+
+            logger.info('Received input: %s', abbreviate(command))
+            framing = self.requested_framing(command)
+            response = self.dispatch(command)
+            if framing is not None:
+                response[FRAMING_PROPERTY] = framing
+            logger.info('Sending response: %s', abbreviate(response))
+            transport.write_response(response)
+            if framing is not None:
+                logger.info(f'Switching to {framing} framing')
+                transport.set_framing(framing)
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self.shutdown_requested:
+            logger.info('Shutdown command received, terminating plugin')
+        logger.info('G-Assist Plugin stopped.')
+        return 0
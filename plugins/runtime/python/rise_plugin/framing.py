@@ -0,0 +1,332 @@
+"""
+Message framing for the plugin pipe
+
+Reads from a pipe do not line up with messages: a read may return part of a
+command, or the end of one command and the start of the next. The decoders
+take the bytes as they arrive and return complete messages.
+
+Two framings are supported:
+
+- DELIMITED_FRAMING, the default, which every plugin manager understands
+  (FrameDecoder, encode_delimited()).
+- LENGTH_PREFIXED_FRAMING, which the plugin manager can opt into while
+  initializing the plugin: every message in either direction is a 4-byte
+  big-endian length followed by that many bytes of UTF-8 JSON
+  (LengthPrefixedDecoder, encode_length_prefixed()).
+
+In the delimited framing a message is a JSON object, optionally followed
+by the END_MARKER delimiter the plugins write after their responses. A
+message that arrives whole is parsed straight away by the codec, which also
+tells where it ends. For a message spread over several reads, the decoder
+finds the end by tracking brace depth outside of JSON strings, scanning
+each read once. A message may therefore be of any size and may contain the
+delimiter inside its strings. Bytes are decoded with an incremental UTF-8 decoder, so a
+character split across two reads is decoded correctly.
+"""
+
+import codecs
+import re
+import struct
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from .codec import JsonCodec
+
+END_MARKER = '<<END>>'
+DELIMITED_FRAMING = 'delimited'
+LENGTH_PREFIXED_FRAMING = 'length-prefixed'
+
+_LENGTH = struct.Struct('>I')
+# Largest length-prefixed message accepted; a larger length means the stream is out of step
+MAX_FRAME_SIZE = 1 << 30
+
+# Whitespace and end markers between messages
+_GAP = re.compile(r'(?:\s|' + re.escape(END_MARKER) + r')*')
+# Outside of a string: a brace, a short string without escapes (matched whole,
+# which covers most keys and values), or the opening quote of any other string.
+# The scanner moves through those with str.find, which is much faster than the
+# regular expression engine over long text.
+_TOKEN = re.compile(r'"[^"\\]{0,256}"|["{}]')
+
+
+class Frame(NamedTuple):
+    """A message split out of the input."""
+    text: str
+    # The parsed message, when the decoder already parsed it
+    value: Optional[Any] = None
+
+
+class FrameDecoder:
+    """Splits a stream of bytes into JSON object messages."""
+
+    def __init__(self, codec: Optional[JsonCodec] = None):
+        """
+        Args:
+            codec: Parses the messages that arrive whole; defaults to the json codec
+        """
+        self._codec = codec or JsonCodec()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        # Text of the message being received
+        self._parts: List[str] = []
+        self._in_frame = False
+        self._depth = 0
+        self._in_string = False
+        # Backslashes that ended the previous read inside a string
+        self._backslashes = 0
+        # Text after a message that may be the start of an end marker
+        self._gap = ''
+
+    @property
+    def pending(self) -> bool:
+        """True while part of a message has been received."""
+        return self._in_frame
+
+    def feed(self, data) -> List[Frame]:
+        """
+        Add bytes read from the pipe.
+
+        Args:
+            data: Bytes-like object, e.g. a memoryview over the read buffer
+
+        Returns:
+            List[Frame]: The messages completed by these bytes, in order
+        """
+        return self._scan(self._decoder.decode(data))
+
+    def finish(self) -> List[Frame]:
+        """
+        Flush the decoder at the end of the input.
+
+        Returns:
+            List[Frame]: Remaining messages; an incomplete message is returned
+            as is, so that parsing it reports the error
+        """
+        frames = self._scan(self._decoder.decode(b'', final=True))
+        rest = ''.join(self._parts) if self._in_frame else self._gap.strip()
+        self._reset()
+        if rest:
+            frames.append(Frame(rest))
+        return frames
+
+    def _skip_string(self, text: str, pos: int, end: int) -> int:
+        """
+        Move past the end of the string the scanner is in.
+
+        Returns:
+            int: The position after the closing quote, or end if the string
+            goes on in the next read
+        """
+        carried = self._backslashes
+        self._backslashes = 0
+        while True:
+            quote = text.find('"', pos)
+            if quote < 0:
+                run = end
+                while run > pos and text[run - 1] == '\\':
+                    run -= 1
+                self._backslashes = end - run + (carried if run == pos else 0)
+                return end
+            run = quote
+            while run > pos and text[run - 1] == '\\':
+                run -= 1
+            escapes = quote - run + (carried if run == pos else 0)
+            carried = 0
+            if escapes % 2 == 0:
+                self._in_string = False
+                return quote + 1
+            pos = quote + 1
+
+    def _parse(self, text: str, pos: int) -> Tuple[Any, int]:
+        """Parse the message starting at pos, returning it and the position after it."""
+        if self._codec.parses_whole:
+            # Usually the message is all there is, up to an end marker
+            end = len(text.rstrip())
+            if text.endswith(END_MARKER, 0, end):
+                end -= len(END_MARKER)
+            try:
+                return self._codec.loads(text[pos:end]), end
+            except ValueError:
+                pass
+        return self._codec.raw_decode(text, pos)
+
+    def _scan(self, text: str) -> List[Frame]:
+        frames = []
+        if self._gap:
+            text = self._gap + text
+            self._gap = ''
+        pos = 0
+        end = len(text)
+
+        while pos < end:
+            if not self._in_frame:
+                pos = _GAP.match(text, pos).end()
+                if pos == end:
+                    break
+                if text[pos] != '{':
+                    rest = text[pos:]
+                    if END_MARKER.startswith(rest):
+                        # Possibly an end marker cut by the read; decide with the next bytes
+                        self._gap = rest
+                        break
+                    # Not a JSON object; hand it over as a message so the error is reported
+                    next_object = text.find('{', pos)
+                    if next_object < 0:
+                        frames.append(Frame(rest))
+                        break
+                    frames.append(Frame(text[pos:next_object]))
+                    pos = next_object
+                try:
+                    value, stop = self._parse(text, pos)
+                except ValueError:
+                    # Incomplete (or invalid); scan for its end
+                    pass
+                else:
+                    frames.append(Frame(text[pos:stop], value))
+                    pos = stop
+                    continue
+                self._in_frame = True
+                self._depth = 0
+
+            start = pos
+            completed = False
+            while pos < end and not completed:
+                if self._in_string:
+                    pos = self._skip_string(text, pos, end)
+                    continue
+                depth = self._depth
+                for match in _TOKEN.finditer(text, pos):
+                    token = match.group()
+                    if token == '{':
+                        depth += 1
+                    elif token == '}':
+                        depth -= 1
+                        if depth == 0:
+                            pos = match.end()
+                            completed = True
+                            break
+                    elif token == '"':
+                        # A long string or one with escapes; skip it with str.find
+                        pos = match.end()
+                        self._in_string = True
+                        break
+                else:
+                    pos = end
+                self._depth = depth
+
+            self._parts.append(text[start:pos])
+            if completed:
+                frames.append(Frame(''.join(self._parts)))
+                self._parts = []
+                self._in_frame = False
+        return frames
+
+
+class FramingError(Exception):
+    """The input does not follow the framing; the stream cannot be resynchronized."""
+
+
+class LengthPrefixedDecoder:
+    """Splits a stream of length-prefixed messages."""
+
+    def __init__(self, codec: Optional[JsonCodec] = None):
+        """
+        Args:
+            codec: Parses the messages as they complete; they are returned
+                unparsed without one
+        """
+        self._codec = codec
+        self._reset()
+
+    def _reset(self) -> None:
+        self._header = bytearray()
+        # Payload of the message being received, allocated once its length is known
+        self._payload: Optional[bytearray] = None
+        self._received = 0
+
+    @property
+    def pending(self) -> bool:
+        """True while part of a message has been received."""
+        return bool(self._header) or self._payload is not None
+
+    def feed(self, data) -> List[Frame]:
+        """
+        Add bytes read from the pipe.
+
+        Args:
+            data: Bytes-like object, e.g. a memoryview over the read buffer
+
+        Returns:
+            List[Frame]: The messages completed by these bytes, in order
+
+        Raises:
+            FramingError: If a message length is out of range
+        """
+        frames = []
+        data = memoryview(data)
+        pos = 0
+        end = len(data)
+        while pos < end:
+            if self._payload is None:
+                needed = _LENGTH.size - len(self._header)
+                self._header += data[pos:pos + needed]
+                pos += needed
+                if len(self._header) < _LENGTH.size:
+                    break
+                (length,) = _LENGTH.unpack(self._header)
+                self._header.clear()
+                if length > MAX_FRAME_SIZE:
+                    raise FramingError(f'Message length {length} exceeds {MAX_FRAME_SIZE}')
+                self._payload = bytearray(length)
+                self._received = 0
+            count = min(len(self._payload) - self._received, end - pos)
+            self._payload[self._received:self._received + count] = data[pos:pos + count]
+            self._received += count
+            pos += count
+            if self._received == len(self._payload):
+                frames.append(self._frame(self._payload.decode('utf-8', errors='replace')))
+                self._payload = None
+        return frames
+
+    def _frame(self, text: str) -> Frame:
+        if self._codec is not None:
+            try:
+                return Frame(text, self._codec.loads(text))
+            except ValueError:
+                # Reported when the message is parsed again
+                pass
+        return Frame(text)
+
+    def finish(self) -> List[Frame]:
+        """
+        Flush the decoder at the end of the input.
+
+        Returns:
+            List[Frame]: An incomplete message, as is, so that parsing it reports the error
+        """
+        frames = []
+        if self._payload is not None:
+            frames.append(Frame(self._payload[:self._received].decode('utf-8', errors='replace')))
+        self._reset()
+        return frames
+
+
+_END_MARKER_BYTES = END_MARKER.encode('ascii')
+
+
+def encode_delimited(payload: bytes) -> bytes:
+    """Frame a UTF-8 JSON message for the delimited framing."""
+    return payload + _END_MARKER_BYTES
+
+
+def encode_length_prefixed(payload: bytes) -> bytes:
+    """Frame a UTF-8 JSON message for the length-prefixed framing."""
+    return _LENGTH.pack(len(payload)) + payload
+
+
+# Decoder class and encoder of each framing
+FRAMINGS = {
+    DELIMITED_FRAMING: (FrameDecoder, encode_delimited),
+    LENGTH_PREFIXED_FRAMING: (LengthPrefixedDecoder, encode_length_prefixed),
+}
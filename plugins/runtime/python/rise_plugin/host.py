@@ -0,0 +1,330 @@
+"""
+Plugin host simulator
+
+Runs a plugin the way the G-Assist plugin manager does, on any platform, so
+plugins can be exercised, load tested and benchmarked without G-Assist.
+PluginHost reads the plugin's manifest.json, spawns the plugin on the stdio
+transport and sends it commands with one tool call each, recording how long
+every function took.
+
+A persistent plugin ("persistent": true in its manifest) is started and
+initialized once and then serves every call until the host stops it. Any
+other plugin is started, initialized and shut down around each call.
+
+On Windows, the executable named in the manifest is run if it has been
+built. Otherwise the host runs the plugin's Python source, plugin.py or the
+script named after the plugin directory, with the interpreter running the
+host and this runtime on its path.
+
+The host is not imported by rise_plugin, so plugins do not load it. From the
+command line, it sends the calls of a JSON script and reports the latency
+of each function:
+
+    python -m rise_plugin.host ../../examples/weather --script calls.json
+
+where calls.json is a list of calls:
+
+    [{"func": "get_weather_info", "params": {"city": "Santa Clara"}, "repeat": 5}]
+
+A single call can be given instead of a script:
+
+    python -m rise_plugin.host ../../examples/weather --call get_weather_info --params '{"city": "Paris"}'
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .dispatcher import (CONTEXT_PROPERTY, FRAMING_PROPERTY, FUNCTION_PROPERTY, SYSTEM_INFO_PROPERTY,
+                         TOOL_CALLS_PROPERTY)
+from .framing import DELIMITED_FRAMING, FRAMINGS
+from .manifest import MANIFEST_FILE
+from .responses import Response
+from .transport import TRANSPORT_ENV, StdioTransport
+
+# Directory holding the rise_plugin package, put on the plugin's path
+RUNTIME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class PluginError(Exception):
+    """The plugin exited, timed out or sent something that is not a response."""
+
+
+class CallResult(NamedTuple):
+    """What a plugin answered to a tool call."""
+    response: Response
+    # Partial responses the plugin sent before its final response
+    messages: List[Response]
+    # Seconds from sending the command to receiving the final response
+    latency: float
+
+
+def plugin_command(plugin_dir: str, manifest: Dict[str, Any], python: str = sys.executable) -> List[str]:
+    """
+    Command line running the plugin in plugin_dir.
+
+    Raises:
+        FileNotFoundError: If there is neither a built executable nor a plugin script
+    """
+    executable = os.path.join(plugin_dir, manifest.get('executable', ''))
+    if sys.platform == 'win32' and os.path.isfile(executable):
+        return [executable]
+    name = os.path.basename(os.path.normpath(plugin_dir))
+    for script in ('plugin.py', f'{name}.py'):
+        path = os.path.join(plugin_dir, script)
+        if os.path.isfile(path):
+            return [python, os.path.abspath(path)]
+    raise FileNotFoundError(f'No plugin executable or script in {plugin_dir}')
+
+
+class PluginHost:
+    """Spawns a plugin described by its manifest and sends it tool calls."""
+
+    def __init__(self, plugin_dir: str, command: Optional[List[str]] = None,
+                 framing: str = DELIMITED_FRAMING, env: Optional[Dict[str, str]] = None,
+                 timeout: Optional[float] = 60):
+        """
+        Args:
+            plugin_dir: Directory holding the plugin's manifest.json
+            command: Command line running the plugin; see plugin_command() for the default
+            framing: Message framing to ask for in the initialize command
+            env: Extra environment variables for the plugin
+            timeout: Seconds to wait for a response before killing the plugin; None waits forever
+
+        Raises:
+            OSError: If the manifest cannot be read
+            ValueError: If the manifest is not valid JSON or the framing is unknown
+        """
+        if framing not in FRAMINGS:
+            raise ValueError(f'Unknown message framing: {framing}')
+        with open(os.path.join(plugin_dir, MANIFEST_FILE), encoding='utf-8') as file:
+            self.manifest: Dict[str, Any] = json.load(file)
+        self.plugin_dir = plugin_dir
+        self.persistent = bool(self.manifest.get('persistent', False))
+        self.functions: Dict[str, Dict[str, Any]] = {
+            function['name']: function for function in self.manifest.get('functions', [])}
+        self.command = command or plugin_command(plugin_dir, self.manifest)
+        self.framing = framing
+        self.env = env or {}
+        self.timeout = timeout
+        # Seconds taken by each call, by function; "initialize" is timed from
+        # spawning the plugin to its response
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        # Times the plugin was started
+        self.starts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._transport: Optional[StdioTransport] = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None
+
+    def start(self) -> Response:
+        """
+        Spawn and initialize the plugin.
+
+        Returns:
+            Response: The initialize response
+
+        Raises:
+            PluginError: If the plugin did not answer or refused the framing
+        """
+        if self.running:
+            self.stop()
+        env = dict(os.environ, **self.env)
+        env[TRANSPORT_ENV] = 'stdio'
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [RUNTIME_DIR, env.get('PYTHONPATH')]))
+        start = time.perf_counter()
+        self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         cwd=self.plugin_dir, env=env)
+        # Commands and responses are framed alike, so the plugin's own
+        # transport serves the host with the pipes swapped
+        self._transport = StdioTransport(input_fd=self._process.stdout.fileno(),
+                                         output_fd=self._process.stdin.fileno())
+        self.starts += 1
+
+        command: Dict[str, Any] = {TOOL_CALLS_PROPERTY: [{FUNCTION_PROPERTY: 'initialize'}]}
+        if self.framing != DELIMITED_FRAMING:
+            command[FRAMING_PROPERTY] = self.framing
+        try:
+            response, _ = self._request(command)
+            self.latencies['initialize'].append(time.perf_counter() - start)
+            if response.get(FRAMING_PROPERTY, DELIMITED_FRAMING) != self.framing:
+                raise PluginError(f'Plugin did not accept {self.framing} framing')
+        except PluginError:
+            self._kill()
+            raise
+        self._transport.set_framing(self.framing)
+        return response
+
+    def call(self, func: str, params: Optional[Dict[str, Any]] = None,
+             messages: Optional[List[Dict[str, Any]]] = None,
+             system_info: Optional[str] = None) -> CallResult:
+        """
+        Send a command with one tool call, starting the plugin if it is not running.
+
+        Args:
+            func: Function name from the manifest
+            params: The tool call's parameters
+            messages: Conversation context sent with the command
+            system_info: System information sent with the command
+
+        Returns:
+            CallResult: The plugin's answer
+
+        Raises:
+            ValueError: If the manifest does not list func
+            PluginError: If the plugin did not answer
+        """
+        if func not in self.functions:
+            raise ValueError(f'{func} is not a function of the plugin')
+        if not self.running:
+            self.start()
+        command: Dict[str, Any] = {
+            TOOL_CALLS_PROPERTY: [{FUNCTION_PROPERTY: func, 'params': params or {}}],
+            CONTEXT_PROPERTY: messages or [],
+            SYSTEM_INFO_PROPERTY: system_info or '',
+        }
+        try:
+            start = time.perf_counter()
+            response, partial = self._request(command)
+            latency = time.perf_counter() - start
+        except PluginError:
+            self._kill()
+            raise
+        self.latencies[func].append(latency)
+        if not self.persistent:
+            self.stop()
+        return CallResult(response, partial, latency)
+
+    def stop(self) -> Optional[Response]:
+        """
+        Shut the plugin down, if it is running.
+
+        Returns:
+            Optional[Response]: The shutdown response, or None if the plugin
+            was not running or did not answer
+        """
+        if not self.running:
+            return None
+        response = None
+        try:
+            response, _ = self._request({TOOL_CALLS_PROPERTY: [{FUNCTION_PROPERTY: 'shutdown'}]})
+            self._process.wait(timeout=self.timeout)
+        except (PluginError, subprocess.TimeoutExpired):
+            pass
+        self._kill()
+        return response
+
+    def _request(self, command: Dict[str, Any]):
+        """Send a command; returns its final response and the partial responses before it."""
+        timer = None
+        if self.timeout is not None:
+            timer = threading.Timer(self.timeout, self._process.kill)
+            timer.start()
+        try:
+            if not self._transport.write_response(command):
+                raise PluginError(f'Plugin exited with status {self._process.wait()}')
+            partial = []
+            while True:
+                response = self._transport.read_command()
+                if response is None:
+                    if timer is not None and timer.finished.is_set():
+                        raise PluginError(f'Plugin did not respond within {self.timeout} seconds')
+                    if self._transport.closed:
+                        raise PluginError(f'Plugin exited with status {self._process.wait()}')
+                    raise PluginError('Plugin sent a response that is not valid JSON')
+                # Streaming handlers send messages without "success" before the final response
+                if 'success' in response:
+                    return response, partial
+                partial.append(response)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _kill(self) -> None:
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        self._process.stdin.close()
+        self._process.stdout.close()
+        self._process = None
+        self._transport = None
+
+    def statistics(self) -> Dict[str, Dict[str, float]]:
+        """Count and median, 95th percentile and maximum latency in milliseconds of each function."""
+        table = {}
+        for func, samples in self.latencies.items():
+            ordered = sorted(samples)
+            table[func] = {
+                'count': len(ordered),
+                'median': statistics.median(ordered) * 1e3,
+                'p95': ordered[math.ceil(len(ordered) * 0.95) - 1] * 1e3,
+                'max': ordered[-1] * 1e3,
+            }
+        return table
+
+    def __enter__(self) -> 'PluginHost':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m rise_plugin.host', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('plugin_dir', help='Directory holding the plugin and its manifest.json')
+    parser.add_argument('--script', help='JSON file with the list of calls to send')
+    parser.add_argument('--call', help='Function to call, instead of a script')
+    parser.add_argument('--params', default='{}', help='Parameters of --call, as JSON')
+    parser.add_argument('--repeat', type=int, default=1, help='Times to send each call')
+    parser.add_argument('--framing', choices=sorted(FRAMINGS), default=DELIMITED_FRAMING)
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for each response')
+    parser.add_argument('--quiet', action='store_true', help='Print only the latency table')
+    args = parser.parse_args()
+
+    if args.script:
+        with open(args.script, encoding='utf-8') as file:
+            calls = json.load(file)
+    elif args.call:
+        calls = [{'func': args.call, 'params': json.loads(args.params)}]
+    else:
+        parser.error('give a --script or a --call')
+
+    failed = False
+    with PluginHost(args.plugin_dir, framing=args.framing, timeout=args.timeout) as host:
+        for call in calls:
+            for _ in range(call.get('repeat', 1) * args.repeat):
+                try:
+                    result = host.call(call['func'], call.get('params'), call.get('messages'),
+                                       call.get('system_info'))
+                except (PluginError, ValueError) as e:
+                    print(f'{call["func"]}: {e}', file=sys.stderr)
+                    failed = True
+                    continue
+                failed = failed or not result.response.get('success')
+                if not args.quiet:
+                    for message in result.messages:
+                        print(f'{call["func"]}: {message.get("message", message)}')
+                    print(f'{call["func"]}: {json.dumps(result.response, ensure_ascii=False)}')
+
+    print(f'{"function":>32} {"calls":>6} {"median ms":>10} {"p95 ms":>8} {"max ms":>8}')
+    for func, row in host.statistics().items():
+        print(f'{func:>32} {row["count"]:>6} {row["median"]:>10.1f} {row["p95"]:>8.1f} {row["max"]:>8.1f}')
+    print(f'Plugin started {host.starts} time(s) ({"persistent" if host.persistent else "not persistent"})')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
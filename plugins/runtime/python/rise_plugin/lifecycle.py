@@ -0,0 +1,124 @@
+"""
+Plugin lifecycle
+
+A plugin is initialized once, by the "initialize" command or, if the plugin
+manager has not sent it, right before the first other command. Lifecycle
+tracks whether that succeeded and initializes again before the next command
+only when it did not, or when the plugin asked for it (invalidate(), or
+Plugin's reinitialize_on_failure after a failed call).
+
+Setup hooks acquire expensive resources (configuration, connections to
+devices or services) and run before the initialize handler; teardown hooks
+release them after the shutdown handler and before initializing again.
+"""
+
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from .responses import Response
+
+logger = logging.getLogger(__name__)
+
+Hook = Callable[[], None]
+
+
+class Lifecycle:
+    """Initialization state and resource hooks of a plugin."""
+
+    def __init__(self):
+        # True once initialization succeeded, until shutdown or invalidate()
+        self.ready = False
+        # Times the plugin was initialized
+        self.initializations = 0
+        self._setup_hooks: List[Hook] = []
+        self._teardown_hooks: List[Hook] = []
+        # Setup hooks ran and teardown hooks have not yet
+        self._set_up = False
+        # Concurrent tool calls wait for one initialization
+        self._lock = threading.RLock()
+
+    def on_setup(self, hook: Hook) -> Hook:
+        """Register a hook run before the initialize handler; usable as a decorator."""
+        self._setup_hooks.append(hook)
+        return hook
+
+    def on_teardown(self, hook: Hook) -> Hook:
+        """Register a hook run after the shutdown handler and before initializing again; usable as a decorator."""
+        self._teardown_hooks.append(hook)
+        return hook
+
+    def invalidate(self) -> None:
+        """Initialize again before the next command, e.g. after losing a connection."""
+        self.ready = False
+
+    def initialize(self, handler: Optional[Callable[[], Response]] = None) -> Optional[Response]:
+        """
+        Initialize the plugin: tear down what a previous initialization set
+        up, run the setup hooks, then the initialize handler.
+
+        The plugin is ready if no hook raised and the handler did not return a
+        failure response.
+
+        Returns:
+            Optional[Response]: The initialize handler's response
+
+        Raises:
+            Exception: Whatever a setup hook or the handler raised
+        """
+        with self._lock:
+            self.ready = False
+            self._teardown()
+            self.initializations += 1
+            self._set_up = True
+            for hook in self._setup_hooks:
+                hook()
+            response = handler() if handler is not None else None
+            self.ready = not isinstance(response, dict) or response.get('success', True) is not False
+            if not self.ready:
+                logger.warning('Plugin initialization failed; retrying before the next command')
+            return response
+
+    def ensure_ready(self, handler: Optional[Callable[[], Response]] = None) -> bool:
+        """
+        Initialize the plugin unless it is ready.
+
+        Initialization errors are logged rather than raised, so the command
+        still runs and reports the problem itself.
+
+        Returns:
+            bool: True if the plugin is ready
+        """
+        if self.ready:
+            return True
+        with self._lock:
+            if not self.ready:
+                try:
+                    self.initialize(handler)
+                except Exception:
+                    logger.exception('Error initializing plugin')
+            return self.ready
+
+    def shutdown(self, handler: Optional[Callable[[], Response]] = None) -> Optional[Response]:
+        """
+        Run the shutdown handler, then the teardown hooks.
+
+        Returns:
+            Optional[Response]: The shutdown handler's response
+        """
+        with self._lock:
+            self.ready = False
+            try:
+                return handler() if handler is not None else None
+            finally:
+                self._teardown()
+
+    def _teardown(self) -> None:
+        if not self._set_up:
+            return
+        self._set_up = False
+        for hook in reversed(self._teardown_hooks):
+            try:
+                hook()
+            except Exception:
+                logger.exception('Error in teardown hook')
@@ -0,0 +1,133 @@
+"""
+Logging for plugins
+
+configure_logging() sends the plugin's log records through a queue to a
+rotating log file. A QueueListener thread formats and writes the records,
+so a command waits neither on the disk nor on the file lock. Messages
+longer than max_message_length are truncated before they are queued, and
+abbreviate() bounds the cost of logging whole commands and responses.
+
+The log level is set by each plugin and can be overridden without
+rebuilding it with the RISE_PLUGIN_LOG_LEVEL environment variable
+(e.g. "DEBUG" or "WARNING").
+"""
+
+import atexit
+import logging
+import os
+import queue
+import reprlib
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Optional, Union
+
+LOG_LEVEL_ENV = 'RISE_PLUGIN_LOG_LEVEL'
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+DEFAULT_MAX_MESSAGE_LENGTH = 4096
+# Characters of a command or response written to the log
+PAYLOAD_LOG_LENGTH = 1024
+
+_listener: Optional[QueueListener] = None
+
+
+class _TruncatingQueueHandler(QueueHandler):
+    """Queues records with their message formatted and cut to a maximum length."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_message_length: int):
+        super().__init__(log_queue)
+        self.max_message_length = max_message_length
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        excess = len(record.msg) - self.max_message_length
+        if excess > 0:
+            record.msg = f'{record.msg[:self.max_message_length]}... [{excess} more characters]'
+        return record
+
+
+def configure_logging(log_file: Optional[str], level: Union[int, str] = logging.INFO,
+                      fmt: str = DEFAULT_FORMAT, max_bytes: int = DEFAULT_MAX_BYTES,
+                      backup_count: int = DEFAULT_BACKUP_COUNT,
+                      max_message_length: int = DEFAULT_MAX_MESSAGE_LENGTH) -> None:
+    """
+    Log to a rotating file from a background thread.
+
+    Replaces the handlers of the root logger. Records still queued when the
+    process exits normally are written out (see stop_logging()); a plugin
+    killed by the plugin manager may lose its last records.
+
+    Args:
+        log_file: Path of the log file; None leaves logging unconfigured
+        level: Level of the root logger, unless RISE_PLUGIN_LOG_LEVEL is set
+        fmt: Format of the lines in the log file
+        max_bytes: Size at which the log file is rotated
+        backup_count: Rotated log files kept
+        max_message_length: Longer messages are truncated
+    """
+    global _listener
+
+    if log_file is None:
+        return
+    level = os.environ.get(LOG_LEVEL_ENV, level)
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                       encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter(fmt))
+
+    stop_logging()
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_TruncatingQueueHandler(log_queue, max_message_length))
+    root.setLevel(level)
+
+
+@atexit.register
+def stop_logging() -> None:
+    """Write out the queued records and stop the thread started by configure_logging()."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class _Abbreviated:
+    """Formats a value for the log only if the record is emitted, and only up to a length."""
+
+    __slots__ = ('value', 'length')
+
+    _repr = reprlib.Repr()
+    _repr.maxlevel = 4
+    _repr.maxdict = _repr.maxlist = _repr.maxtuple = 8
+    _repr.maxstring = _repr.maxother = 256
+
+    def __init__(self, value: Any, length: int):
+        self.value = value
+        self.length = length
+
+    def __str__(self) -> str:
+        text = self._repr.repr(self.value) if not isinstance(self.value, str) else self.value
+        if len(text) > self.length:
+            text = f'{text[:self.length]}... [{len(text) - self.length} more characters]'
+        return text
+
+
+def abbreviate(value: Any, length: int = PAYLOAD_LOG_LENGTH) -> Any:
+    """
+    Wrap a command, response or other large value for a log message.
+
+    Use as an argument of the logging call (logger.info('Received %s',
+    abbreviate(command))) so nothing is formatted unless the record is logged.
+    """
+    return _Abbreviated(value, length)
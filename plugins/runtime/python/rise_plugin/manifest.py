@@ -0,0 +1,206 @@
+"""
+Plugin manifests
+
+Every plugin ships a manifest.json describing its functions and their
+properties to the plugin manager. load_manifest() reads it once and
+compiles, for each function, a validator of its parameters; a Plugin given
+the manifest runs the validator before the handler, so malformed tool
+calls are answered with a failure and handlers can rely on their
+parameters. A manifest that cannot be read does not turn validation off:
+load_manifest() then returns a Manifest carrying the error, and the Plugin
+answers every tool call with a failure.
+
+A function's "properties" give each parameter's JSON type ("string",
+"integer", "number", "boolean", "array" or "object"). Its optional
+"required" list names the parameters that must be present and not empty.
+Values are converted to the declared type where that loses nothing, e.g.
+"5" for an integer or 5 for a string. Parameters the manifest does not
+declare are passed through.
+"""
+
+import json
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+
+Check = Callable[[Any], Any]
+
+
+class ValidationError(ValueError):
+    """The parameters of a tool call do not match the manifest."""
+
+
+def _check_string(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError
+
+
+def _check_integer(value: Any) -> Any:
+    if isinstance(value, bool):
+        raise TypeError
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise TypeError
+
+
+def _check_number(value: Any) -> Any:
+    if isinstance(value, bool):
+        raise TypeError
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.lstrip('+-').isdigit() else float(value)
+    raise TypeError
+
+
+def _check_boolean(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise TypeError
+
+
+def _check_type(expected: type) -> Check:
+    def check(value: Any) -> Any:
+        if not isinstance(value, expected):
+            raise TypeError
+        return value
+    return check
+
+
+# Validation of the values of each JSON type; a check returns the value,
+# converted if needed, or raises TypeError or ValueError
+_CHECKS: Dict[str, Check] = {
+    'string': _check_string,
+    'integer': _check_integer,
+    'number': _check_number,
+    'boolean': _check_boolean,
+    'array': _check_type(list),
+    'object': _check_type(dict),
+}
+
+
+class FunctionSignature:
+    """A function of the manifest, with the validator of its parameters."""
+
+    __slots__ = ('name', 'required', '_checks')
+
+    def __init__(self, spec: Mapping[str, Any]):
+        """
+        Args:
+            spec: The function's entry in the manifest's "functions" list
+        """
+        self.name: str = spec['name']
+        properties = spec.get('properties') or {}
+        # Declared parameters of a known type, with their check
+        self._checks: Tuple[Tuple[str, str, Check], ...] = tuple(
+            (name, prop['type'], _CHECKS[prop['type']]) for name, prop in properties.items()
+            if isinstance(prop, dict) and prop.get('type') in _CHECKS)
+        self.required: Tuple[str, ...] = tuple(spec.get('required') or ())
+
+    def validate(self, params: Any) -> Dict[str, Any]:
+        """
+        Check the parameters of a call.
+
+        Args:
+            params: The tool call's parameters; None means none
+
+        Returns:
+            Dict[str, Any]: The parameters, with values converted to their declared types
+
+        Raises:
+            ValidationError: If the parameters are not an object, a required
+                parameter is missing or a value does not have its declared type
+        """
+        if params is None:
+            params = {}
+        elif not isinstance(params, dict):
+            raise ValidationError(f'Parameters of {self.name} must be an object.')
+        for name in self.required:
+            if params.get(name) in (None, ''):
+                raise ValidationError(f'Missing required parameter: {name}.')
+        checked = None
+        for name, expected, check in self._checks:
+            value = params.get(name)
+            if value is None:
+                continue
+            try:
+                converted = check(value)
+            except (TypeError, ValueError):
+                raise ValidationError(f'Parameter {name} must be of type {expected}.') from None
+            if converted is not value:
+                if checked is None:
+                    checked = dict(params)
+                checked[name] = converted
+        return params if checked is None else checked
+
+
+class Manifest:
+    """The functions a plugin declares to the plugin manager."""
+
+    def __init__(self, data: Mapping[str, Any], path: Optional[str] = None, error: Optional[str] = None):
+        """
+        Args:
+            data: The parsed manifest
+            path: Where the manifest was read from, if it was
+            error: Why the manifest could not be loaded, if it could not
+
+        Raises:
+            ValueError: If a function has no name or a malformed "required" list
+        """
+        self.data = data
+        self.path = path
+        self.error = error
+        self.persistent = bool(data.get('persistent', False))
+        self.functions: Dict[str, FunctionSignature] = {}
+        for spec in data.get('functions') or []:
+            if not isinstance(spec, dict) or not isinstance(spec.get('name'), str):
+                raise ValueError(f'Manifest function without a name: {spec}')
+            required = spec.get('required') or []
+            if not isinstance(required, list) or not all(isinstance(name, str) for name in required):
+                raise ValueError(f'"required" of {spec["name"]} must be a list of property names')
+            self.functions[spec['name']] = FunctionSignature(spec)
+
+
+def default_manifest_path() -> str:
+    """The manifest.json next to the plugin's executable, or its script when not built."""
+    if getattr(sys, 'frozen', False):
+        directory = os.path.dirname(sys.executable)
+    else:
+        main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+        directory = os.path.dirname(os.path.abspath(main_file)) if main_file else os.getcwd()
+    return os.path.join(directory, MANIFEST_FILE)
+
+
+def load_manifest(path: Optional[str] = None) -> Manifest:
+    """
+    Read a plugin manifest and compile its validators.
+
+    Args:
+        path: Path of the manifest; defaults to default_manifest_path()
+
+    Returns:
+        Manifest: The manifest. If it could not be read, an empty one whose
+        error says why; a Plugin given it answers tool calls with a failure.
+    """
+    path = path or default_manifest_path()
+    try:
+        with open(path, encoding='utf-8') as file:
+            return Manifest(json.load(file), path)
+    except (OSError, ValueError) as e:
+        logger.error(f'Cannot load manifest {path}; tool calls will fail: {str(e)}')
+        return Manifest({}, path, error=str(e))
@@ -0,0 +1,82 @@
+"""
+Response helpers shared by plugins
+
+Handlers return plain dictionaries; these build the common shapes.
+"""
+
+from typing import Any, Dict, List, Optional
+
+Response = Dict[str, Any]
+
+
+def generate_failure_response(message: Optional[str] = None, **fields: Any) -> Response:
+    ''' Generates a response indicating failure.
+
+    Args:
+        message: String to be returned in the response (optional)
+        **fields: Extra fields added to the response
+
+    Returns:
+        A failure response with the attached message
+    '''
+    response = {'success': False}
+    if message:
+        response['message'] = message
+    response.update(fields)
+    return response
+
+
+def generate_success_response(message: Optional[str] = None, **fields: Any) -> Response:
+    ''' Generates a response indicating success.
+
+    Args:
+        message: String to be returned in the response (optional)
+        **fields: Extra fields added to the response, e.g. type='calendar_event'
+
+    Returns:
+        A success response with the attached message
+    '''
+    response = {'success': True}
+    if message:
+        response['message'] = message
+    response.update(fields)
+    return response
+
+
+def generate_message_response(message: str) -> Response:
+    ''' Generates a partial response carrying a piece of text.
+
+    Handlers that stream their output send these with Plugin.send() before
+    returning their final response.
+
+    Args:
+        message: String to be returned to the driver
+
+    Returns:
+        A message response dictionary
+    '''
+    return {'message': message}
+
+
+def generate_batch_response(results: List[Response]) -> Response:
+    ''' Combines the responses of several tool calls into one response.
+
+    The combined response succeeds if every tool call succeeded, and its
+    message joins theirs, so plugin managers reading only "success" and
+    "message" still get the whole answer. A result that is not a dictionary,
+    e.g. from a handler that forgot to return, is listed as a failure.
+
+    Args:
+        results: Responses of the tool calls, in the order they were requested
+
+    Returns:
+        A response with the results listed under "results"
+    '''
+    results = [result if isinstance(result, dict)
+               else generate_failure_response('Tool call returned no valid response.') for result in results]
+    messages = [result['message'] for result in results if result.get('message')]
+    return {
+        'success': all(result.get('success', False) for result in results),
+        'message': '\n'.join(messages),
+        'results': results,
+    }
@@ -0,0 +1,321 @@
+"""
+Pipe transport between a plugin and the G-Assist plugin manager
+
+The plugin manager writes each command to the plugin's standard input as a
+JSON object and reads the responses from its standard output. Every response
+is a JSON object followed by the END_MARKER delimiter. Commands are split
+out of the input by rise_plugin.framing, so they may be of any size and
+several may arrive in one read. The plugin manager may switch both
+directions to length-prefixed messages while initializing the plugin (see
+Plugin.run()). Messages are parsed and serialized by a pluggable codec
+(rise_plugin.codec).
+
+Two backends implement the same interface:
+
+- WindowsPipeTransport reads and writes the standard handles with
+  ReadFile/WriteFile, which is how plugins run under the plugin manager.
+- StdioTransport uses the standard file descriptors directly, so a plugin
+  can be run, driven and benchmarked on any platform.
+
+open_transport() picks the backend for the current platform; the
+RISE_PLUGIN_TRANSPORT environment variable ("pipe" or "stdio") overrides it.
+"""
+
+import io
+import logging
+import os
+import sys
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .codec import JsonCodec, open_codec
+from .framing import DELIMITED_FRAMING, FRAMINGS, Frame, FramingError
+from .log import abbreviate
+
+logger = logging.getLogger(__name__)
+
+# Size of the read buffer; messages may be larger
+BUFFER_SIZE = 65536
+TRANSPORT_ENV = 'RISE_PLUGIN_TRANSPORT'
+
+
+def _keep(char: str) -> bool:
+    return char.isprintable() or char in '\n\t\r'
+
+
+class _PrintableTable(dict):
+    """
+    str.translate() table that deletes non-printable characters other than
+    newlines and tabs.
+
+    Each character is classified the first time it is seen, so the table only
+    holds the characters that occur in the input.
+    """
+
+    def __missing__(self, code_point: int) -> Optional[int]:
+        value = code_point if _keep(chr(code_point)) else None
+        self[code_point] = value
+        return value
+
+
+_PRINTABLE = _PrintableTable()
+_LATIN1_UNPRINTABLE = bytes(code_point for code_point in range(256) if not _keep(chr(code_point)))
+
+
+def remove_unprintable(text: str) -> str:
+    """Drop non-printable characters other than newlines and tabs."""
+    try:
+        # Most input is Latin-1, which bytes.translate() filters in one pass
+        data = text.encode('latin-1')
+    except UnicodeEncodeError:
+        # str.translate() is only fast on ASCII; translate just the lines
+        # that need it
+        return '\n'.join([line if line.isprintable() else line.translate(_PRINTABLE)
+                          for line in text.split('\n')])
+    return data.translate(None, _LATIN1_UNPRINTABLE).decode('latin-1')
+
+
+def unescape_printable(text: str) -> str:
+    """
+    Decode escape sequences in raw input and drop non-printable characters.
+
+    This is the input clean-up the Gmail and Gemini plugins apply before
+    parsing commands; pass it as input_filter to keep that behaviour.
+    """
+    return remove_unprintable(text.encode('utf-8').decode('raw_unicode_escape'))
+
+
+class Transport:
+    """
+    Reads commands from and writes responses to the plugin manager.
+
+    Subclasses provide _read_into() and _write_bytes(); message framing and
+    JSON handling live here so every backend behaves the same way.
+    """
+
+    def __init__(self, input_filter: Optional[Callable[[str], str]] = None,
+                 codec: Optional[JsonCodec] = None):
+        """
+        Args:
+            input_filter: Applied to the raw text of each command before it is
+                parsed as JSON (e.g. unescape_printable)
+            codec: Parses commands and serializes responses; defaults to open_codec()
+        """
+        self.input_filter = input_filter
+        self.codec = codec or open_codec()
+        # Set once the plugin manager closed its end; nothing more can be read
+        self.closed = False
+        # Reads land in this buffer; the framer decodes straight from a view of it
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self.framing = DELIMITED_FRAMING
+        decoder, self._encode = FRAMINGS[DELIMITED_FRAMING]
+        self._framer = decoder(self.codec)
+        # Messages already split out of the input but not returned yet
+        self._frames: Deque[Frame] = deque()
+        # Handlers running concurrently may send partial responses
+        self._write_lock = threading.Lock()
+
+    def _read_into(self, view: memoryview) -> Optional[int]:
+        """
+        Read into the start of view.
+
+        Returns:
+            Optional[int]: The number of bytes read (0 at end of input), or None on a read error
+        """
+        raise NotImplementedError
+
+    def _write_bytes(self, data: bytes) -> bool:
+        """Write all of data; returns False if the write failed."""
+        raise NotImplementedError
+
+    def set_framing(self, framing: str) -> None:
+        """
+        Switch the framing of the messages read and written from now on.
+
+        Raises:
+            ValueError: If the framing is unknown
+        """
+        if framing not in FRAMINGS:
+            raise ValueError(f'Unknown message framing: {framing}')
+        decoder, self._encode = FRAMINGS[framing]
+        if framing != self.framing:
+            if self._framer.pending:
+                logger.warning('Discarding a partial message on framing change')
+            self._framer = decoder(self.codec)
+        self.framing = framing
+
+    def read_frame(self) -> Optional[Frame]:
+        """
+        Read the next message, however many reads it spans.
+
+        Returns:
+            Optional[Frame]: The message, or None once the input has ended
+        """
+        while not self._frames:
+            if self.closed:
+                return None
+            count = self._read_into(self._view)
+            if not count:
+                if count is None:
+                    logger.error('Error reading from command pipe')
+                self.closed = True
+                self._frames.extend(self._framer.finish())
+                continue
+            try:
+                self._frames.extend(self._framer.feed(self._view[:count]))
+            except FramingError as e:
+                logger.error(f'Cannot read command pipe: {str(e)}')
+                self.closed = True
+        return self._frames.popleft()
+
+    def read_message(self) -> Optional[str]:
+        """
+        Read the text of the next message.
+
+        Returns:
+            Optional[str]: The message, or None once the input has ended
+        """
+        frame = self.read_frame()
+        return None if frame is None else frame.text
+
+    def read_command(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the next command.
+
+        Returns:
+            Optional[Dict[str, Any]]: The command, or None if it could not be read or
+            was not valid JSON. `closed` is set when the input has ended.
+        """
+        frame = self.read_frame()
+        if frame is None:
+            return None
+        text = frame.text
+        try:
+            if self.input_filter is not None:
+                text = self.input_filter(text)
+            elif frame.value is not None:
+                return frame.value
+            return self.codec.loads(text)
+        except ValueError:
+            logger.error('Received invalid JSON: %s', abbreviate(text))
+            return None
+        except Exception as e:
+            logger.error(f'Exception in read_command(): {str(e)}')
+            return None
+
+    def write_response(self, response: Dict[str, Any]) -> bool:
+        """
+        Write a response framed as negotiated.
+
+        Returns:
+            bool: True if the response was written
+        """
+        try:
+            data = self._encode(self.codec.dumps(response))
+        except (TypeError, ValueError) as e:
+            logger.error(f'Response is not serializable: {str(e)}')
+            return False
+        with self._write_lock:
+            written = self._write_bytes(data)
+        if not written:
+            logger.error('Error writing to response pipe')
+            return False
+        return True
+
+
+class StdioTransport(Transport):
+    """Transport over the standard input/output file descriptors."""
+
+    def __init__(self, input_filter: Optional[Callable[[str], str]] = None,
+                 codec: Optional[JsonCodec] = None, input_fd: int = 0, output_fd: int = 1):
+        super().__init__(input_filter, codec)
+        self.input_fd = input_fd
+        self.output_fd = output_fd
+        self._input = io.FileIO(input_fd, 'rb', closefd=False)
+
+    def _read_into(self, view: memoryview) -> Optional[int]:
+        try:
+            return self._input.readinto(view)
+        except OSError as e:
+            logger.error(f'Exception reading standard input: {str(e)}')
+            return None
+
+    def _write_bytes(self, data: bytes) -> bool:
+        view = memoryview(data)
+        try:
+            while view:
+                view = view[os.write(self.output_fd, view):]
+        except OSError as e:
+            logger.error(f'Exception writing standard output: {str(e)}')
+            return False
+        return True
+
+
+class WindowsPipeTransport(Transport):
+    """Transport over the Windows standard handles, used under the plugin manager."""
+
+    STD_INPUT_HANDLE = -10
+    STD_OUTPUT_HANDLE = -11
+    ERROR_MORE_DATA = 234
+
+    def __init__(self, input_filter: Optional[Callable[[str], str]] = None,
+                 codec: Optional[JsonCodec] = None):
+        super().__init__(input_filter, codec)
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._kernel32 = ctypes.windll.kernel32
+        self._input = self._kernel32.GetStdHandle(self.STD_INPUT_HANDLE)
+        self._output = self._kernel32.GetStdHandle(self.STD_OUTPUT_HANDLE)
+        # ReadFile writes straight into the transport's read buffer
+        self._read_target = (ctypes.c_char * BUFFER_SIZE).from_buffer(self._buffer)
+        self._count = wintypes.DWORD()
+
+    def _read_into(self, view: memoryview) -> Optional[int]:
+        success = self._kernel32.ReadFile(self._input, self._read_target, len(view),
+                                          self._ctypes.byref(self._count), None)
+        # A message-mode pipe reports a message larger than the buffer as
+        # ERROR_MORE_DATA; the rest of it comes with the next read.
+        if not success and self._kernel32.GetLastError() != self.ERROR_MORE_DATA:
+            return None
+        return self._count.value
+
+    def _write_bytes(self, data: bytes) -> bool:
+        written = self._ctypes.c_ulong()
+        offset = 0
+        while offset < len(data):
+            remaining = data[offset:] if offset else data
+            if not self._kernel32.WriteFile(self._output, remaining, len(remaining),
+                                            self._ctypes.byref(written), None):
+                return False
+            offset += written.value
+        return True
+
+
+def open_transport(name: Optional[str] = None,
+                   input_filter: Optional[Callable[[str], str]] = None,
+                   codec: Optional[JsonCodec] = None) -> Transport:
+    """
+    Open the transport for this process.
+
+    Args:
+        name: "pipe" or "stdio"; defaults to RISE_PLUGIN_TRANSPORT, then to
+            "pipe" on Windows and "stdio" elsewhere
+        input_filter: See Transport
+        codec: See Transport
+
+    Returns:
+        Transport: The opened transport
+
+    Raises:
+        ValueError: If the transport name is unknown
+    """
+    name = name or os.environ.get(TRANSPORT_ENV) or ('pipe' if sys.platform == 'win32' else 'stdio')
+    if name == 'pipe':
+        return WindowsPipeTransport(input_filter, codec)
+    if name == 'stdio':
+        return StdioTransport(input_filter, codec)
+    raise ValueError(f'Unknown plugin transport: {name}')
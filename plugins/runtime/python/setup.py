@@ -0,0 +1,15 @@
+from setuptools import setup, find_packages
+
+setup(
+    name="rise-plugin",               # Name of the package
+    version="0.0.1",                  # Version of your package
+    description="Shared runtime for G-Assist Python plugins",  # Short description
+    url="",                           # URL to the project (e.g., GitHub)
+    packages=find_packages(),         # Automatically find the package(s) in the project
+    install_requires=[],              # Standard library only
+    extras_require={                  # Optional faster JSON codecs
+        "orjson": ["orjson"],
+        "msgspec": ["msgspec"],
+    },
+    zip_safe=True
+)